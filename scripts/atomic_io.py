@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Crash- and concurrency-safe file writes shared by the pipeline stages.
+
+  atomic_write_text(path, text)   unique temp file in the same directory,
+                                  fsync, rename over path, fsync the directory
+  atomic_write_bytes(path, data)  the same for binary content (images)
+  write_json(path, data, ...)     json.dumps + atomic_write_text
+  file_lock(path)                 exclusive advisory lock on path + ".lock"
+
+A reader sees either the old or the new file, never a truncated one, and
+two writers of the same file each use their own temp file. Writers that
+read-modify-write a shared file (BuildManifest.save, paper_store.export_json)
+hold file_lock() around the whole sequence so concurrent stages merge
+instead of overwriting each other.
+"""
+
+import fcntl
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+# mkstemp creates 0600 files; give replacements the usual umask permissions
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive flock on path + ".lock" (blocks until available)."""
+    lock_path = path + ".lock"
+    os.makedirs(os.path.dirname(os.path.abspath(lock_path)), exist_ok=True)
+    with open(lock_path, "a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _fsync_dir(directory):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass  # Not supported on every filesystem
+    finally:
+        os.close(fd)
+
+
+def _atomic_write(path, data, mode, **open_kwargs):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                    dir=directory)
+    try:
+        with os.fdopen(fd, mode, **open_kwargs) as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _fsync_dir(directory)
+
+
+def atomic_write_text(path, text, newline=None):
+    """Replace path with text so that a crash leaves either file intact."""
+    _atomic_write(path, text, "w", encoding="utf-8", newline=newline)
+
+
+def atomic_write_bytes(path, data):
+    """Binary counterpart of atomic_write_text()."""
+    _atomic_write(path, data, "wb")
+
+
+def write_json(path, data, **dump_kwargs):
+    """json.dumps(data, ensure_ascii=False, **dump_kwargs) written atomically."""
+    dump_kwargs.setdefault("ensure_ascii", False)
+    atomic_write_text(path, json.dumps(data, **dump_kwargs))
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""Accuracy and speed benchmark for the metric extractors.
+
+Scores each extractor against the curated data as golden values: the
+paper fields process_node, die_area_mm2, power_mw and energy_efficiency
+plus metrics_detailed, read from the paper store (paper_store.py; --papers
+takes a papers.json file instead). Values are compared per
+normalize_metrics.py field (process_nm, die_area_mm2, power_mw,
+frequency_mhz, energy_efficiency_tops_w, throughput_tops), after parsing
+both sides with the same unit handling.
+
+Extractors:
+  regex      extract_metrics.extract_from_text (one value per metric, as in metrics.json)
+  regex-all  metric_scanner.detailed_metrics (every occurrence, metrics_regex.json)
+  llm        extract_metrics_llm.py on recorded responses (--llm, see below)
+
+A predicted value is correct when it is within TOLERANCE of a golden value
+of the same field. Per field, over the papers that have a golden value:
+
+  precision = correct predicted values / predicted values
+  recall    = golden values predicted / golden values
+
+Speed: papers/s of each regex extractor over the corpus (best of
+--repeat runs) and the time of every PATTERNS regex over the full texts
+(scan() runs them only around anchors; this shows which are expensive).
+
+The llm extractor never calls the API: responses are replayed from a
+response cache (llm_cache.py) with an offline LLMBackend, so runs are
+deterministic. Record once with the same model/prompt flags, e.g.
+
+    python3 scripts/extract_metrics_llm.py --api-key ... --hybrid --cache-dir data/bench/llm
+    python3 scripts/bench_metrics.py --llm --hybrid --cache-dir data/bench/llm
+
+Papers without a recorded response are reported and left out.
+
+--json writes all numbers to a file, to compare runs before and after a
+scanner change.
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+
+import extract_metrics_llm
+import paper_store
+from atomic_io import write_json
+from extract_metrics import extract_from_text
+from image_prep import add_image_args, image_options
+from llm_backend import LLMBackend, OfflineMiss
+from llm_cache import CACHE_DIR, ResponseCache
+from metric_scanner import PATTERNS, detailed_metrics, scan
+from normalize_metrics import SOURCES, parse_process_node, parse_quantity, source_texts
+
+BASE = "/home/sdu/obsidian/isscc_accelerator"
+DATA_DIR = os.path.join(BASE, "data")
+
+# Relative difference under which two values are the same (rounding in the text)
+TOLERANCE = 0.01
+
+# Where each side's values come from: a SOURCES group ("" = top-level papers.json)
+GOLDEN_GROUPS = ("", "metrics_detailed")
+PREDICTED_GROUPS = {"regex": ("metrics",), "regex-all": ("metrics_detailed",),
+                    "llm": ("metrics_detailed",)}
+
+
+def field_values(paper, field, groups):
+    """Distinct values of a normalized field from the given SOURCES groups."""
+    values = []
+    for source, implied_unit in SOURCES[field]:
+        group = source.split(".")[0] if "." in source else ""
+        if group not in groups:
+            continue
+        for text in source_texts(paper, source):
+            if field == "process_nm":
+                candidates = parse_process_node(text)
+            else:
+                candidates = parse_quantity(text, field, implied_unit)
+            for value, _ in candidates:
+                if not any(same_value(value, v) for v in values):
+                    values.append(value)
+    return values
+
+
+def same_value(a, b):
+    return abs(a - b) <= TOLERANCE * max(abs(a), abs(b))
+
+
+def new_counts():
+    return {field: {"papers": 0, "predicted": 0, "correct": 0, "golden": 0, "found": 0}
+            for field in SOURCES}
+
+
+def score_paper(counts, golden_paper, predicted_paper, groups):
+    """Add one paper's comparison to counts (see new_counts())."""
+    for field, c in counts.items():
+        golden = field_values(golden_paper, field, GOLDEN_GROUPS)
+        if not golden:
+            continue
+        predicted = field_values(predicted_paper, field, groups)
+        c["papers"] += 1
+        c["golden"] += len(golden)
+        c["predicted"] += len(predicted)
+        c["correct"] += sum(1 for p in predicted if any(same_value(p, g) for g in golden))
+        c["found"] += sum(1 for g in golden if any(same_value(p, g) for p in predicted))
+
+
+def summarize(counts):
+    """{field: {"papers", "precision", "recall"}}; None where undefined."""
+    summary = {}
+    for field, c in counts.items():
+        summary[field] = {
+            "papers": c["papers"],
+            "precision": round(c["correct"] / c["predicted"], 3) if c["predicted"] else None,
+            "recall": round(c["found"] / c["golden"], 3) if c["golden"] else None,
+        }
+    return summary
+
+
+def load_texts(papers):
+    """{paper_id: text.md} for the papers that have one."""
+    texts = {}
+    for paper in papers:
+        path = os.path.join(DATA_DIR, paper["id"], "text.md")
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                texts[paper["id"]] = f.read()
+    return texts
+
+
+def run_regex(papers, texts, repeat):
+    """Accuracy and papers/s of both regex extractors."""
+    results = {}
+    extractors = {
+        "regex": lambda text: {"metrics": extract_from_text(text)},
+        "regex-all": lambda text: {"metrics_detailed": detailed_metrics(text)},
+    }
+    for name, extract in extractors.items():
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            outputs = {pid: extract(text) for pid, text in texts.items()}
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        counts = new_counts()
+        for paper in papers:
+            if paper["id"] in outputs:
+                score_paper(counts, paper, outputs[paper["id"]], PREDICTED_GROUPS[name])
+        results[name] = {"papers": len(outputs), "seconds": round(best, 4),
+                         "papers_per_s": round(len(outputs) / best, 1) if best else None,
+                         "fields": summarize(counts)}
+    return results
+
+
+def pattern_timings(texts, repeat):
+    """[(category, priority, pattern, seconds)] for every PATTERNS regex, slowest first."""
+    timings = []
+    for category, _, patterns in PATTERNS:
+        for priority, pattern in enumerate(patterns):
+            compiled = re.compile(pattern, re.IGNORECASE)
+            best = None
+            for _ in range(repeat):
+                started = time.perf_counter()
+                for text in texts.values():
+                    for _ in compiled.finditer(text):
+                        pass
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            timings.append((category, priority, pattern, best))
+    return sorted(timings, key=lambda t: -t[3])
+
+
+def scan_seconds(texts, repeat):
+    """Best time of one metric_scanner.scan() pass over the corpus."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for text in texts.values():
+            scan(text)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_llm(papers, texts, args):
+    """Accuracy of extract_metrics_llm.py on recorded responses."""
+    backend = LLMBackend(provider=args.provider, model=args.model,
+                         cache=ResponseCache(args.cache_dir), offline=True)
+    token_budget = args.token_budget
+    if token_budget is None:
+        token_budget = extract_metrics_llm.HYBRID_TOKEN_BUDGET if args.hybrid \
+            else extract_metrics_llm.DEFAULT_TOKEN_BUDGET
+    process = extract_metrics_llm.process_paper_hybrid if args.hybrid \
+        else extract_metrics_llm.process_paper
+
+    counts = new_counts()
+    scored, missing, failed = 0, [], []
+    for paper in papers:
+        pid = paper["id"]
+        if pid not in texts:
+            continue
+        try:
+            metrics = process(pid, backend, 0, token_budget, image_options(args))
+        except OfflineMiss:
+            missing.append(pid)
+            continue
+        if not metrics:
+            failed.append(pid)
+            continue
+        scored += 1
+        score_paper(counts, paper, {"metrics_detailed": metrics}, PREDICTED_GROUPS["llm"])
+    return {"papers": scored, "missing": missing, "failed": failed,
+            "fields": summarize(counts)}
+
+
+def print_fields(name, result):
+    print(f"\n{name}: {result['papers']} papers")
+    print(f"  {'field':26s} {'papers':>6s} {'precision':>9s} {'recall':>7s}")
+    for field, s in result["fields"].items():
+        precision = "-" if s["precision"] is None else f"{s['precision']:.2f}"
+        recall = "-" if s["recall"] is None else f"{s['recall']:.2f}"
+        print(f"  {field:26s} {s['papers']:6d} {precision:>9s} {recall:>7s}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark metric extraction accuracy and speed against the curated papers"
+    )
+    parser.add_argument("--papers",
+                        help="Golden papers.json file (default: the paper store)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Timing runs per measurement, best is kept (default: 3)")
+    parser.add_argument("--top-patterns", type=int, default=10,
+                        help="Slowest patterns to list (default: 10)")
+    parser.add_argument("--llm", action="store_true",
+                        help="Also score extract_metrics_llm.py on recorded responses")
+    parser.add_argument("--hybrid", action="store_true",
+                        help="Replay the --hybrid mode of extract_metrics_llm.py")
+    parser.add_argument("--token-budget", type=int, default=None,
+                        help="Token budget the responses were recorded with "
+                             "(default: extract_metrics_llm.py's)")
+    parser.add_argument("--json", help="Write all results to this JSON file")
+    parser.add_argument("--provider", default="openai",
+                        help="Provider the responses were recorded with (default: openai)")
+    parser.add_argument("--model", default=None,
+                        help="Model the responses were recorded with (default: provider default)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR,
+                        help=f"Recorded responses (default: {CACHE_DIR})")
+    # Image options are part of the recorded request, so they must match too
+    add_image_args(parser)
+    args = parser.parse_args()
+
+    if args.papers:
+        with open(args.papers, "r", encoding="utf-8") as f:
+            papers = json.load(f)
+    else:
+        papers = paper_store.get_papers(paper_store.connect())
+    texts = load_texts(papers)
+    print(f"{len(papers)} papers, {len(texts)} with text.md")
+    if not texts:
+        print("Nothing to benchmark: no data/{id}/text.md (run export_markdown.py first)")
+        return
+
+    results = run_regex(papers, texts, args.repeat)
+    for name, result in results.items():
+        print_fields(name, result)
+        print(f"  speed: {result['papers_per_s']} papers/s ({result['seconds']:.3f}s)")
+
+    scan_s = scan_seconds(texts, args.repeat)
+    timings = pattern_timings(texts, args.repeat)
+    total = sum(t[3] for t in timings)
+    print(f"\nscan(): {scan_s * 1000:.1f} ms over the corpus; "
+          f"patterns one by one: {total * 1000:.1f} ms")
+    for category, priority, pattern, seconds in timings[:args.top_patterns]:
+        print(f"  {seconds * 1000:8.2f} ms  {category}[{priority}]  {pattern}")
+    results["scan_ms"] = round(scan_s * 1000, 2)
+    results["patterns"] = [{"category": c, "priority": p, "pattern": pat, "ms": round(s * 1000, 3)}
+                           for c, p, pat, s in timings]
+
+    if args.llm:
+        llm = run_llm(papers, texts, args)
+        print_fields("llm (recorded)", llm)
+        if llm["missing"]:
+            print(f"  no recorded response: {len(llm['missing'])} papers "
+                  f"({', '.join(llm['missing'][:5])}{', ...' if len(llm['missing']) > 5 else ''})")
+        if llm["failed"]:
+            print(f"  unparseable: {', '.join(llm['failed'])}")
+        results["llm"] = llm
+
+    if args.json:
+        write_json(args.json, results, indent=2)
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
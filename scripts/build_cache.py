@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Content-addressed build manifest for incremental data pipeline runs.
+
+Each stage records, per paper, a digest of everything its output depends on
+(input files, curated fields, PDF page range, and the stage script's own
+source). On the next run a paper whose digest is unchanged - and whose
+outputs still exist - is skipped.
+
+Manifest: data/.build_manifest.json
+  {"version": 1, "stages": {"<stage>": {"<paper_id>": "<sha256>"}}}
+
+Usage from a stage script:
+
+    manifest = BuildManifest()
+    key = input_digest(file_digest(text_path), script_version(__file__))
+    if not args.force and manifest.is_fresh("extract_metrics", pid, key, [out_path]):
+        continue
+    ...write outputs...
+    manifest.record("extract_metrics", pid, key)
+    manifest.save()
+
+save() re-reads the manifest under a file lock and applies only this run's
+records, so stages running in parallel keep each other's entries.
+"""
+
+import hashlib
+import json
+import os
+
+from atomic_io import file_lock, write_json
+
+BASE = "/home/sdu/obsidian/isscc_accelerator"
+DATA_DIR = os.path.join(BASE, "data")
+MANIFEST_PATH = os.path.join(DATA_DIR, ".build_manifest.json")
+MANIFEST_VERSION = 1
+
+_CHUNK = 1 << 20
+
+
+def file_digest(path):
+    """sha256 of a file's bytes, or None if it does not exist."""
+    if not os.path.exists(path):
+        return None
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def value_digest(value):
+    """sha256 of a JSON-serializable value (key order independent)."""
+    data = json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def script_version(script_path):
+    """Digest of a stage script's source: editing the script invalidates its outputs."""
+    return file_digest(os.path.abspath(script_path))
+
+
+def input_digest(*parts):
+    """Combine component digests (or plain strings / None) into one key."""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(b"\0" if part is None else str(part).encode("utf-8"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+
+class BuildManifest:
+    """Per-stage, per-paper input digests persisted between runs."""
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = path
+        self.stages = self._load()
+        self._changes = {}  # stage -> {key: digest} recorded since the last save
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            # A corrupt manifest only costs a full rebuild
+            return {}
+        if data.get("version") != MANIFEST_VERSION:
+            return {}
+        return data.get("stages", {})
+
+    def get(self, stage, key):
+        return self.stages.get(stage, {}).get(key)
+
+    def is_fresh(self, stage, key, digest, outputs=()):
+        """True if the recorded digest matches and every output file exists."""
+        if self.get(stage, key) != digest:
+            return False
+        return all(os.path.exists(p) for p in outputs)
+
+    def record(self, stage, key, digest):
+        stage_entries = self.stages.setdefault(stage, {})
+        if stage_entries.get(key) != digest:
+            stage_entries[key] = digest
+            self._changes.setdefault(stage, {})[key] = digest
+
+    def save(self):
+        """Merge this run's records into the manifest on disk, if any."""
+        if not self._changes:
+            return
+        with file_lock(self.path):
+            stages = self._load()
+            for stage, entries in self._changes.items():
+                stages.setdefault(stage, {}).update(entries)
+            write_json(self.path, {"version": MANIFEST_VERSION, "stages": stages},
+                       indent=1, sort_keys=True)
+        self.stages = stages
+        self._changes = {}
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""Build web-sized image derivatives in images_web/ from images/.
+
+For every images/{paper_id}/*.png|jpg this writes:
+  images_web/{paper_id}/{name}-{size}.webp    size = thumb | medium | full
+  images_web/{paper_id}/{name}-{size}.avif    (if Pillow has AVIF support)
+  images_web/{paper_id}/{name}.png            PNG fallback at the "full" size
+
+The PNG fallback keeps the source file name, so paths in papers.json
+("images/2.1/fig_1.png") map onto images_web/ by swapping the prefix.
+Derivatives are named by stem, so a fig_N.jpg next to a fig_N.png (both
+extractors write into images/{id}/) is skipped in favour of the PNG.
+
+images_web/manifest.json records each image's source hash and the
+dimensions of every variant, so the site can emit srcset and reserve
+layout space before an image loads:
+
+  {"version": 1, "sizes": {"thumb": 320, ...},
+   "images": {"2.1/fig_1.png": {"source": "<sha256>", "width": 1920, "height": 1080,
+                                "fallback": "2.1/fig_1.png",
+                                "variants": [{"size": "thumb", "width": 320, "height": 180,
+                                              "webp": "2.1/fig_1-thumb.webp",
+                                              "avif": "2.1/fig_1-thumb.avif"}, ...]}}}
+
+Sources whose hash (and this script) are unchanged and whose outputs still
+exist are skipped. --jobs N converts images in N worker processes.
+"""
+
+import argparse
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from atomic_io import atomic_write_bytes, write_json
+from build_cache import file_digest, input_digest, script_version
+
+BASE = "/home/sdu/obsidian/isscc_accelerator"
+IMG_DIR = os.path.join(BASE, "images")
+WEB_DIR = os.path.join(BASE, "images_web")
+MANIFEST_PATH = os.path.join(WEB_DIR, "manifest.json")
+MANIFEST_VERSION = 1
+
+# Long edge in px; images are never upscaled
+SIZES = {"thumb": 320, "medium": 960, "full": 1920}
+SOURCE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+WEBP_QUALITY = 82
+AVIF_QUALITY = 60
+
+
+def _import_pil():
+    try:
+        from PIL import Image, features
+    except ImportError:
+        raise SystemExit("ERROR: Pillow not installed. Run: pip install Pillow")
+    return Image, features
+
+
+def list_sources(img_dir):
+    """Relative paths ("2.1/fig_1.png") of every source image.
+
+    A JPEG with a PNG of the same stem is left out: both would write the
+    same images_web/ files.
+    """
+    sources = []
+    if not os.path.isdir(img_dir):
+        return sources
+    for paper_id in sorted(os.listdir(img_dir)):
+        paper_dir = os.path.join(img_dir, paper_id)
+        if not os.path.isdir(paper_dir):
+            continue
+        names = sorted(n for n in os.listdir(paper_dir) if n.lower().endswith(SOURCE_EXTENSIONS))
+        pngs = {os.path.splitext(n)[0] for n in names if n.lower().endswith(".png")}
+        for name in names:
+            stem, ext = os.path.splitext(name)
+            if ext.lower() != ".png" and stem in pngs:
+                continue
+            sources.append(f"{paper_id}/{name}")
+    return sources
+
+
+def _save(img, path, fmt, **params):
+    buf = io.BytesIO()
+    img.save(buf, fmt, **params)
+    atomic_write_bytes(path, buf.getvalue())
+
+
+def convert_image(rel_path, digest, formats, img_dir, web_dir):
+    """Write every variant of one source image; returns its manifest entry."""
+    Image, _ = _import_pil()
+    stem = os.path.splitext(rel_path)[0]
+    out_dir = os.path.join(web_dir, os.path.dirname(rel_path))
+    os.makedirs(out_dir, exist_ok=True)
+
+    with Image.open(os.path.join(img_dir, rel_path)) as src:
+        src = src.convert("RGBA" if "A" in src.getbands() or "transparency" in src.info else "RGB")
+        variants = []
+        for size, edge in SIZES.items():
+            img = src.copy()
+            if max(img.size) > edge:
+                img.thumbnail((edge, edge), Image.LANCZOS)
+            # Small sources: a larger size would only duplicate the previous one
+            if variants and (variants[-1]["width"], variants[-1]["height"]) == img.size:
+                continue
+            variant = {"size": size, "width": img.width, "height": img.height}
+            if "webp" in formats:
+                variant["webp"] = f"{stem}-{size}.webp"
+                _save(img, os.path.join(web_dir, variant["webp"]), "WEBP",
+                      quality=WEBP_QUALITY, method=4)
+            if "avif" in formats:
+                variant["avif"] = f"{stem}-{size}.avif"
+                _save(img, os.path.join(web_dir, variant["avif"]), "AVIF", quality=AVIF_QUALITY)
+            variants.append(variant)
+
+        # PNG fallback at the largest emitted size
+        fallback = f"{stem}.png"
+        _save(img, os.path.join(web_dir, fallback), "PNG", optimize=True)
+
+    return {"source": digest, "width": img.width, "height": img.height,
+            "fallback": fallback, "variants": variants}
+
+
+def _convert_task(task):
+    return task[0], convert_image(*task)
+
+
+def entry_outputs(entry):
+    """All files a manifest entry refers to."""
+    paths = [entry["fallback"]]
+    for variant in entry["variants"]:
+        paths.extend(variant[fmt] for fmt in ("webp", "avif") if fmt in variant)
+    return paths
+
+
+def load_manifest(path):
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                return data
+        except (OSError, ValueError):
+            pass
+    return {"version": MANIFEST_VERSION, "sizes": SIZES, "images": {}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build responsive images_web/ derivatives")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--formats", default="webp,avif",
+                        help="Comma-separated modern formats to emit (default: webp,avif)")
+    parser.add_argument("--force", action="store_true",
+                        help="Rebuild every image, ignoring source hashes")
+    args = parser.parse_args()
+
+    _, features = _import_pil()
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    if "avif" in formats and not features.check("avif"):
+        print("WARNING: this Pillow build has no AVIF support, emitting WebP only")
+        formats.remove("avif")
+
+    manifest = load_manifest(MANIFEST_PATH)
+    old_images = manifest.get("images", {})
+    version = script_version(__file__)
+
+    sources = list_sources(IMG_DIR)
+    images = {}
+    tasks = []
+    for rel_path in sources:
+        digest = input_digest(file_digest(os.path.join(IMG_DIR, rel_path)), version, *formats)
+        entry = old_images.get(rel_path)
+        if (not args.force and entry and entry.get("source") == digest and
+                all(os.path.exists(os.path.join(WEB_DIR, p)) for p in entry_outputs(entry))):
+            images[rel_path] = entry
+        else:
+            tasks.append((rel_path, digest, formats, IMG_DIR, WEB_DIR))
+
+    print(f"  {len(sources)} source images, {len(tasks)} to convert "
+          f"({', '.join(formats + ['png'])})")
+    if args.jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            results = list(pool.map(_convert_task, tasks))
+    else:
+        results = [_convert_task(task) for task in tasks]
+    for rel_path, entry in results:
+        images[rel_path] = entry
+
+    # Remove derivatives of sources that no longer exist (unless a current
+    # entry still refers to the same file)
+    current = {path for entry in images.values() for path in entry_outputs(entry)}
+    for rel_path, entry in old_images.items():
+        if rel_path not in images:
+            for path in entry_outputs(entry):
+                full = os.path.join(WEB_DIR, path)
+                if path not in current and os.path.exists(full):
+                    os.remove(full)
+
+    manifest = {"version": MANIFEST_VERSION, "sizes": SIZES,
+                "images": {k: images[k] for k in sorted(images)}}
+    os.makedirs(WEB_DIR, exist_ok=True)
+    write_json(MANIFEST_PATH, manifest, indent=1, ensure_ascii=True)
+
+    src_bytes = sum(os.path.getsize(os.path.join(IMG_DIR, p)) for p in images)
+    web_bytes = sum(os.path.getsize(os.path.join(WEB_DIR, images[p]["fallback"])) for p in images)
+    print(f"  Manifest: {MANIFEST_PATH} ({len(images)} images)")
+    if src_bytes:
+        print(f"  PNG fallbacks: {web_bytes / 1e6:.1f} MB vs {src_bytes / 1e6:.1f} MB sources")
+
+
+if __name__ == "__main__":
+    main()
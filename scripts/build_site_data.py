@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Export papers.json and split it into a compact index and per-paper shards.
+
+The overview page only needs a handful of fields per paper, but papers.json
+also carries title annotations, challenges/ideas, detailed metrics, abstracts
+and figure paragraphs for every paper. This script reads the paper store
+(paper_store.py) and writes:
+
+  - data/papers.json: every record, the exported artifact committed to git
+  - data/index.json: {"version": 1, "papers": [...], "assets": {...}} with
+    only the fields the overview table, filters and stats bar use
+    (INDEX_FIELDS), plus the asset manifest below
+  - data/{paper_id}/paper.json: the full record of one paper, fetched by the
+    detail page on demand
+  Both carry "normalized": canonical numeric metrics (normalize_metrics.py)
+  used for sorting instead of parsing metric strings in the browser.
+  - data/search.json: inverted index for the overview keyword search
+    (search_index.py), fetched in the background after the first render
+
+The asset manifest tells the site which local-only files exist, so it never
+has to probe for them at runtime:
+
+  "assets": {"image_sets": ["images_web", "images"],
+             "papers": {"2.1": {"images": ["images_web", "images"],
+                                "sizes": ["thumb", "medium", "full"],
+                                "text": ["text.json", "text.md"]}}}
+
+image_sets lists the directories present at all; per paper, "images" is in
+order of preference, "sizes" are the images_web variants (from
+images_web/manifest.json) and "text" the reader files in data/{id}/. A
+paper without local files has no entry; the site then uses images/ and
+still tries to fetch its text files.
+
+Files are only rewritten when their content changes. The site falls back to
+papers.json (and full-resolution images/) when index.json is missing.
+"""
+
+import json
+import os
+import sys
+
+import paper_store
+from atomic_io import atomic_write_text
+from normalize_metrics import normalize_metrics
+from search_index import build_search_index
+
+BASE = "/home/sdu/obsidian/isscc_accelerator"
+DATA_DIR = os.path.join(BASE, "data")
+PAPERS_JSON = os.path.join(DATA_DIR, "papers.json")
+INDEX_JSON = os.path.join(DATA_DIR, "index.json")
+STORE_PATH = os.path.join(DATA_DIR, "papers.db")
+SEARCH_JSON = os.path.join(DATA_DIR, "search.json")
+IMAGE_SETS = {
+    "images_web": os.path.join(BASE, "images_web"),
+    "images": os.path.join(BASE, "images"),
+}
+WEB_MANIFEST = os.path.join(BASE, "images_web", "manifest.json")
+TEXT_FILES = ["text.json", "text.md"]
+
+INDEX_VERSION = 1
+SHARD_NAME = "paper.json"
+
+# Fields read by site/js/overview.js (table, filters, search, stats bar)
+# and by the detail page sidebar / prev-next navigation
+INDEX_FIELDS = [
+    "id", "session", "title", "title_zh", "affiliation", "affiliation_info",
+    "process_node", "die_area_mm2", "power_mw", "energy_efficiency",
+    "target_model", "application", "tags", "analytical_tags", "metrics",
+]
+
+
+def index_record(paper):
+    """The overview subset of a paper record."""
+    record = {key: paper[key] for key in INDEX_FIELDS if key in paper}
+    # Filters only look at the innovation type
+    record["innovations"] = [{"type": inn.get("type")} for inn in paper.get("innovations", [])]
+    # Sorting needs value and confidence; the shard keeps the source too
+    if "normalized" in paper:
+        record["normalized"] = {field: {"value": e["value"], "confidence": e["confidence"]}
+                                for field, e in paper["normalized"].items()}
+    return record
+
+
+def write_if_changed(path, data, indent=None):
+    """Write JSON to path unless the file already has this content. Returns True if written."""
+    text = json.dumps(data, ensure_ascii=False, indent=indent,
+                      separators=None if indent else (",", ":"))
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == text:
+                return False
+    atomic_write_text(path, text)
+    return True
+
+
+def web_image_sizes():
+    """{paper_id: [size, ...]} from images_web/manifest.json (build_images_web.py)."""
+    if not os.path.exists(WEB_MANIFEST):
+        return {}
+    with open(WEB_MANIFEST, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    order = list(manifest.get("sizes", {}))
+    sizes = {}
+    for rel_path, entry in manifest.get("images", {}).items():
+        paper_sizes = sizes.setdefault(rel_path.split("/", 1)[0], set())
+        paper_sizes.update(v["size"] for v in entry.get("variants", []))
+    return {pid: sorted(s, key=lambda x: order.index(x) if x in order else len(order))
+            for pid, s in sizes.items()}
+
+
+def build_assets(papers):
+    """Which image sets and reader text files exist, per paper."""
+    sizes = web_image_sizes()
+    image_sets = [name for name, path in IMAGE_SETS.items() if os.path.isdir(path)]
+    per_paper = {}
+    for paper in papers:
+        pid = paper["id"]
+        entry = {}
+        images = [name for name in image_sets
+                  if os.path.isdir(os.path.join(IMAGE_SETS[name], pid))]
+        if images:
+            entry["images"] = images
+        if pid in sizes:
+            entry["sizes"] = sizes[pid]
+        text = [name for name in TEXT_FILES if os.path.exists(os.path.join(DATA_DIR, pid, name))]
+        if text:
+            entry["text"] = text
+        if entry:
+            per_paper[pid] = entry
+    return {"image_sets": image_sets, "papers": per_paper}
+
+
+def build_index(papers):
+    return {
+        "version": INDEX_VERSION,
+        "papers": [index_record(p) for p in papers],
+        "assets": build_assets(papers),
+    }
+
+
+def main():
+    conn = paper_store.connect(STORE_PATH, PAPERS_JSON)
+    papers = paper_store.get_papers(conn)
+    try:
+        exported = paper_store.export_json(conn, PAPERS_JSON, papers=papers)
+    except RuntimeError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    print(f"  papers.json: {'written' if exported else 'unchanged'}")
+
+    for paper in papers:
+        paper["normalized"] = normalize_metrics(paper)
+
+    shards_written = 0
+    for paper in papers:
+        shard_path = os.path.join(DATA_DIR, paper["id"], SHARD_NAME)
+        if write_if_changed(shard_path, paper, indent=1):
+            shards_written += 1
+
+    index = build_index(papers)
+    index_written = write_if_changed(INDEX_JSON, index)
+    search = build_search_index(papers)
+    search_written = write_if_changed(SEARCH_JSON, search)
+
+    full_size = os.path.getsize(PAPERS_JSON)
+    index_size = os.path.getsize(INDEX_JSON)
+    print(f"  Shards: {shards_written}/{len(papers)} written")
+    print(f"  Index: {'written' if index_written else 'unchanged'} "
+          f"({index_size / 1024:.0f} KB vs {full_size / 1024:.0f} KB papers.json)")
+    print(f"  Search: {'written' if search_written else 'unchanged'} "
+          f"({len(search['terms'])} terms, {os.path.getsize(SEARCH_JSON) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
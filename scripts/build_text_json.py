@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""Pre-parse data/{id}/text.md into the text.json sections read by the site.
+
+The private-mode reader (site/js/detail.js) pairs each figure with the body
+paragraphs that reference it, and renders body paragraphs as full text. With
+text.json present the browser does no text parsing at all.
+
+Output: data/{paper_id}/text.json
+  {"version": 1, "paper_id": "31.3", "sections": [
+      {"type": "abstract", "figure": null, "text": "..."},
+      {"type": "body", "figure": 2, "text": "... Fig. 31.3.2 ..."},
+      {"type": "caption", "figure": 2, "text": "Figure 31.3.2: ..."},
+      {"type": "references", "figure": null, "text": "..."}]}
+
+Processing per paper:
+  - page headers/footers/copyright lines are dropped (restructure_data's
+    clean_caption rules)
+  - PDF lines are re-joined into paragraphs (blank lines, or a short line
+    ending a sentence), undoing end-of-line hyphenation
+  - "Figure {id}.N: ..." blocks become caption sections
+  - the paragraph before the "Abstract" label is the abstract
+  - body paragraphs get the first figure of this paper they reference
+  - short fragments (text inside vector figures, stray labels) are dropped
+
+Like the other stages this one is incremental (build_cache.py); --force
+rebuilds every paper. text.json carries the paper's full text and is not
+committed, same as text.md.
+"""
+
+import argparse
+import os
+import re
+
+import paper_store
+import pdf_text
+from atomic_io import write_json
+from build_cache import BuildManifest, file_digest, input_digest, script_version
+from extract_figure_paragraphs import FIGURE_REF_PATTERN, extract_figure_number
+from pdf_text import CAPTION_START, SENTENCE_END, join_lines
+from restructure_data import clean_caption
+
+BASE = "/home/sdu/obsidian/isscc_accelerator"
+DATA_DIR = os.path.join(BASE, "data")
+
+STAGE = "build_text_json"
+TEXT_JSON_VERSION = 1
+
+PAGE_SEPARATOR = re.compile(r'\n-{3,}\n')
+ABSTRACT_LABEL = re.compile(r'^\s*Abstract\s*$')
+REFERENCES_LABEL = re.compile(r'^\s*References\s*:?\s*$', re.IGNORECASE)
+
+# A line shorter than this fraction of the page's typical line ends a paragraph
+SHORT_LINE_RATIO = 0.7
+# Body paragraphs with fewer words are figure-internal text or debris
+MIN_BODY_WORDS = 8
+
+
+def is_boilerplate(line):
+    """True for a line that is entirely header/footer/page-number text."""
+    return not clean_caption(line)
+
+
+def split_pages(text):
+    """text.md -> list of page texts (drops the '# Paper X' title line)."""
+    text = re.sub(r'^# Paper .*\n', '', text, count=1)
+    return [p for p in PAGE_SEPARATOR.split(text) if p.strip()]
+
+
+def page_paragraphs(page_text):
+    """Split one page into paragraphs (lists of lines), skipping boilerplate lines."""
+    lines = [line.rstrip() for line in page_text.split("\n")]
+    content = [line for line in lines if line.strip() and not is_boilerplate(line)]
+    if not content:
+        return []
+    lengths = sorted(len(line.strip()) for line in content)
+    typical = lengths[int(len(lengths) * 0.75)]
+
+    paragraphs = []
+    current = []
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            if current:
+                paragraphs.append(current)
+                current = []
+            continue
+        if is_boilerplate(stripped):
+            continue
+        is_label = ABSTRACT_LABEL.match(stripped) or REFERENCES_LABEL.match(stripped)
+        is_caption = CAPTION_START.match(stripped)
+        # Labels and captions always start a paragraph of their own
+        if (is_label or is_caption) and current:
+            paragraphs.append(current)
+            current = []
+        current.append(stripped)
+        sentence_end = SENTENCE_END.search(stripped)
+        # Captions end at their first full stop; figure labels follow them
+        caption = CAPTION_START.match(current[0])
+        if is_label or (sentence_end and (caption or len(stripped) < typical * SHORT_LINE_RATIO)):
+            paragraphs.append(current)
+            current = []
+    if current:
+        paragraphs.append(current)
+    return paragraphs
+
+
+def paper_figure(paper_id, paragraph):
+    """First figure number of this paper referenced in a paragraph, or None."""
+    for ref in FIGURE_REF_PATTERN.findall(paragraph):
+        if ref.rsplit(".", 1)[0] == paper_id:
+            return extract_figure_number(paper_id, ref)
+    return None
+
+
+def build_sections(paper_id, text):
+    """Parse text.md content into the text.json section list."""
+    caption_re = re.compile(rf'^Figure\s+{re.escape(paper_id)}\.(\d+)\s*:')
+    sections = []
+    in_references = False
+    seen_captions = set()
+
+    paragraphs = []
+    for page in split_pages(text):
+        paragraphs.extend(page_paragraphs(page))
+
+    for lines in paragraphs:
+        para = join_lines(lines)
+        if not para:
+            continue
+
+        if ABSTRACT_LABEL.match(para):
+            # The paragraph before the label is the abstract
+            for sec in reversed(sections):
+                if sec["type"] == "body":
+                    sec["type"] = "abstract"
+                    sec["figure"] = None
+                    break
+            in_references = False
+            continue
+
+        if REFERENCES_LABEL.match(para):
+            in_references = True
+            continue
+
+        m = caption_re.match(para)
+        if m:
+            fig_num = int(m.group(1))
+            if fig_num not in seen_captions:
+                seen_captions.add(fig_num)
+                sections.append({"type": "caption", "figure": fig_num, "text": clean_caption(para)})
+            continue
+
+        if len(para.split()) < MIN_BODY_WORDS and not (in_references and para.startswith("[")):
+            continue
+        if in_references:
+            sections.append({"type": "references", "figure": None, "text": para})
+            continue
+        sections.append({"type": "body", "figure": paper_figure(paper_id, para), "text": para})
+
+    return sections
+
+
+def build_paper(paper_id, manifest=None, force=False, version=None):
+    """Write data/{paper_id}/text.json.
+
+    Returns the number of sections written, or None if the paper has no
+    text.md or its text.json is up to date.
+    """
+    paper_dir = os.path.join(DATA_DIR, paper_id)
+    text_path = os.path.join(paper_dir, "text.md")
+    out_path = os.path.join(paper_dir, "text.json")
+    if not os.path.exists(text_path):
+        return None
+
+    key = input_digest(file_digest(text_path), version)
+    if manifest is not None and not force and manifest.is_fresh(STAGE, paper_id, key, [out_path]):
+        return None
+
+    with open(text_path, "r", encoding="utf-8") as f:
+        sections = build_sections(paper_id, f.read())
+    if not sections:
+        print(f"  [{paper_id}] WARNING - no sections found in text.md")
+
+    write_json(out_path, {"version": TEXT_JSON_VERSION, "paper_id": paper_id,
+                          "sections": sections}, indent=1)
+
+    if manifest is not None:
+        manifest.record(STAGE, paper_id, key)
+    return len(sections)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build data/{id}/text.json from text.md")
+    parser.add_argument("--paper-id", help="Process only this paper ID (e.g., 31.3)")
+    parser.add_argument("--force", action="store_true",
+                        help="Rebuild every paper, ignoring the build manifest")
+    args = parser.parse_args()
+
+    paper_ids = [p["id"] for p in paper_store.get_papers(paper_store.connect())]
+    if args.paper_id:
+        paper_ids = [args.paper_id]
+
+    manifest = BuildManifest()
+    # join_lines and the caption/sentence rules live in pdf_text.py
+    version = input_digest(script_version(__file__), script_version(pdf_text.__file__))
+    built = skipped = missing = 0
+    for pid in paper_ids:
+        if not os.path.exists(os.path.join(DATA_DIR, pid, "text.md")):
+            missing += 1
+            continue
+        count = build_paper(pid, manifest, args.force, version)
+        if count is None:
+            skipped += 1
+        else:
+            built += 1
+            print(f"  [{pid}] {count} sections")
+    manifest.save()
+
+    print(f"\nBuilt: {built}, unchanged: {skipped}, no text.md: {missing}")
+
+
+if __name__ == "__main__":
+    main()
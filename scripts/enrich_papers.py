@@ -1,15 +1,15 @@
 #!/usr/bin/env python3
 """
-Enrich papers.json with analytical_tags, affiliation_info, abstract,
+Enrich the paper store (paper_store.py) with analytical_tags, affiliation_info, abstract,
 text_en stubs for challenges/ideas, metrics_detailed stub, and figure_paragraphs stub.
 """
 
-import json
 import re
 import os
 
+import paper_store
+
 BASE_DIR = "/home/sdu/obsidian/isscc_accelerator"
-PAPERS_JSON = os.path.join(BASE_DIR, "data", "papers.json")
 
 # --- Analytical Tags ---
 ANALYTICAL_TAGS = {
@@ -167,11 +167,10 @@ def extract_abstract(paper_id):
 
 
 def main():
-    # Load existing papers.json
-    with open(PAPERS_JSON, "r", encoding="utf-8") as f:
-        papers = json.load(f)
+    conn = paper_store.connect()
+    papers = paper_store.get_papers(conn)
 
-    print(f"Loaded {len(papers)} papers from papers.json")
+    print(f"Loaded {len(papers)} papers from the paper store")
 
     abstracts_extracted = 0
     affiliation_matched = 0
@@ -221,24 +220,26 @@ def main():
             if "text_en" not in idea:
                 idea["text_en"] = ""
 
+        fields = {key: paper[key] for key in ("analytical_tags", "affiliation_info", "abstract")}
+
         # 5. Add metrics_detailed stub
         if "metrics_detailed" not in paper:
-            paper["metrics_detailed"] = {}
+            fields["metrics_detailed"] = {}
 
         # 6. Add figure_paragraphs stub
         if "figure_paragraphs" not in paper:
-            paper["figure_paragraphs"] = []
+            fields["figure_paragraphs"] = []
 
-    # Write enriched papers.json
-    with open(PAPERS_JSON, "w", encoding="utf-8") as f:
-        json.dump(papers, f, ensure_ascii=False, indent=2)
+        paper_store.update_fields(conn, pid, fields)
+        # Stubs never replace a translation another stage wrote meanwhile
+        paper_store.save_translations(conn, paper, overwrite=False)
 
     print(f"\n=== Enrichment Summary ===")
     print(f"Total papers: {len(papers)}")
     print(f"Analytical tags added: {tags_added}")
     print(f"Affiliations matched: {affiliation_matched}")
     print(f"Abstracts extracted: {abstracts_extracted}")
-    print(f"Papers enriched and written to {PAPERS_JSON}")
+    print(f"Papers enriched in {paper_store.STORE_PATH}")
 
 
 if __name__ == "__main__":
@@ -2,71 +2,50 @@
 """Export each ISSCC 2026 paper's text content to Markdown files.
 
 Outputs one .md file per paper to data/markdown/{paper_id}.md.
+
+By default each page is written as page.get_text() returns it. With
+--layout the text is rebuilt from block coordinates (pdf_layout.py): the
+two columns in reading order, page headers/footers and figure text
+removed, one paragraph per line and the captions at the end of each page.
 """
 
-import fitz
+import argparse
+import functools
 import os
-import re
+
+import pdf_ingest
 
 BASE = "/home/sdu/obsidian/isscc_accelerator"
 PDF_DIR = os.path.join(BASE, "pdfs")
 MD_DIR = os.path.join(BASE, "data", "markdown")
 
 
-def find_paper_pages(doc):
-    """Map paper IDs to their page indices."""
-    paper_pages = {}
-    for i in range(doc.page_count):
-        text = doc[i].get_text()[:500]
-        m = re.search(r'SESSION\s+\d+\s*/[^/]+/\s*(\d+\.\d+)', text)
-        if m:
-            pid = m.group(1)
-            if pid not in paper_pages:
-                paper_pages[pid] = []
-            paper_pages[pid].append(i)
-        figs = re.findall(r'Figure\s+(\d+\.\d+)\.\d+', text)
-        for fig_id in figs:
-            if fig_id not in paper_pages:
-                paper_pages[fig_id] = []
-            if i not in paper_pages[fig_id]:
-                paper_pages[fig_id].append(i)
-    return paper_pages
-
-
-def export_markdown():
-    os.makedirs(MD_DIR, exist_ok=True)
-    total = 0
+def export_paper(paper, layout=False):
+    """pdf_ingest consumer: write one paper's page text to data/markdown/{id}.md."""
+    md_path = os.path.join(MD_DIR, f"{paper.id}.md")
+    with open(md_path, "w", encoding="utf-8") as f:
+        f.write(paper.layout_markdown() if layout else paper.markdown())
 
-    for pdf_name in sorted(os.listdir(PDF_DIR)):
-        if not pdf_name.endswith('.pdf'):
-            continue
-        pdf_path = os.path.join(PDF_DIR, pdf_name)
-        doc = fitz.open(pdf_path)
-        print(f"Processing {pdf_name}...")
+    print(f"  Paper {paper.id} -> {md_path}")
+    return md_path
 
-        paper_pages = find_paper_pages(doc)
 
-        for pid in sorted(paper_pages.keys(), key=lambda x: (int(x.split('.')[0]), int(x.split('.')[1]))):
-            pages = sorted(paper_pages[pid])
-            md_lines = [f"# Paper {pid}\n\n"]
-
-            for page_num in pages:
-                page = doc[page_num]
-                text = page.get_text()
-                md_lines.append(text)
-                md_lines.append("\n\n---\n\n")
-
-            md_path = os.path.join(MD_DIR, f"{pid}.md")
-            with open(md_path, "w", encoding="utf-8") as f:
-                f.write("".join(md_lines))
-
-            total += 1
-            print(f"  Paper {pid} -> {md_path}")
+def export_markdown(layout=False):
+    os.makedirs(MD_DIR, exist_ok=True)
+    paths, = pdf_ingest.run([functools.partial(export_paper, layout=layout)], PDF_DIR)
+    print(f"\nDone! Exported {len(paths)} markdown files.")
 
-        doc.close()
 
-    print(f"\nDone! Exported {total} markdown files.")
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export each paper's text to data/markdown/{id}.md"
+    )
+    parser.add_argument("--layout", action="store_true",
+                        help="Rebuild columns, reading order and paragraphs from block "
+                             "coordinates instead of raw page text")
+    args = parser.parse_args()
+    export_markdown(args.layout)
 
 
 if __name__ == "__main__":
-    export_markdown()
+    main()
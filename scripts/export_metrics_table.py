@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""Export metrics_detailed as a long-format table for cross-paper analytics.
+
+One row per reported value:
+
+  paper_id | metric | value_num | unit | condition | source_figure | value
+  2.3      | energy_efficiency | 71.3 | mJ/frame | real-time end-to-end ... | fig_7 | 71.3
+
+metrics_detailed nesting is flattened:
+  - {"values": [{value, unit, condition}, ...]} -> one row per entry
+  - {value, unit, note}                         -> one row (note as condition)
+  - {"model", "metric", "detail"} benchmarks    -> value = metric, condition = model; detail
+  - other dicts                                 -> metric "parent.child" per key
+  - plain strings / lists of strings            -> one row each, no unit
+
+Each paper also gets one row per canonical metric from normalize_metrics.py
+(metric "normalized.<field>", e.g. normalized.energy_efficiency_tops_w in
+TOPS/W, condition "confidence=high|low"), so cross-paper plots need no
+unit handling.
+
+value is the original text, value_num its leading number (upper end of a
+range such as "104.56-137.75"), or empty when there is none ("varies").
+
+Always writes data/metrics_long.csv; with pyarrow installed also the columnar
+formats from --formats (default parquet; "arrow" is an Arrow IPC file).
+Load with e.g. pandas.read_parquet() or duckdb "SELECT * FROM 'metrics_long.parquet'".
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import re
+
+import paper_store
+from atomic_io import atomic_write_text
+
+from normalize_metrics import FIELD_UNITS, normalize_metrics
+
+BASE = "/home/sdu/obsidian/isscc_accelerator"
+DATA_DIR = os.path.join(BASE, "data")
+OUTPUT_STEM = os.path.join(DATA_DIR, "metrics_long")
+
+COLUMNS = ["paper_id", "metric", "value_num", "unit", "condition", "source_figure", "value"]
+
+# Identification fields some extractions repeat inside metrics_detailed
+SKIP_KEYS = {"paper_id", "title"}
+
+LEADING_NUMBER = re.compile(r'[<>~≤≥]?\s*(-?\d+(?:,\d{3})*(?:\.\d+)?)(?:\s*[-–~]\s*(\d+(?:,\d{3})*(?:\.\d+)?))?')
+
+
+def parse_number(text):
+    """Leading number of a value string (upper end of a range), or None."""
+    m = LEADING_NUMBER.match(str(text).strip())
+    if not m:
+        return None
+    return float((m.group(2) or m.group(1)).replace(",", ""))
+
+
+def _row(metric, value, unit="", condition=""):
+    value = "" if value is None else str(value)
+    return {"metric": metric, "value_num": parse_number(value), "unit": unit or "",
+            "condition": condition or "", "value": value}
+
+
+def flatten(metric, node):
+    """Rows (without paper columns) for one metrics_detailed entry."""
+    if isinstance(node, list):
+        rows = []
+        for item in node:
+            rows.extend(flatten(metric, item))
+        return rows
+    if not isinstance(node, dict):
+        return [_row(metric, node)]
+    if "values" in node:
+        return flatten(metric, node["values"] or [])
+    if "value" in node:
+        return [_row(metric, node["value"], node.get("unit"),
+                     node.get("condition") or node.get("note"))]
+    if "metric" in node:
+        condition = "; ".join(str(node[k]) for k in ("model", "detail") if node.get(k))
+        return [_row(metric, node["metric"], node.get("unit"), condition)]
+    rows = []
+    for key, value in node.items():
+        rows.extend(flatten(f"{metric}.{key}", value))
+    return rows
+
+
+def load_detailed(paper):
+    """metrics_detailed of a paper: the stored field, else data/{id}/metrics_detailed.json."""
+    detailed = paper.get("metrics_detailed")
+    if detailed:
+        return detailed
+    path = os.path.join(DATA_DIR, paper["id"], "metrics_detailed.json")
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def build_rows(papers):
+    """Long-format rows for every paper, in paper store order."""
+    rows = []
+    for paper in papers:
+        source_figure = (paper.get("metrics") or {}).get("source_figure", "")
+        paper_rows = []
+        for metric, node in load_detailed(paper).items():
+            if metric in SKIP_KEYS:
+                continue
+            paper_rows.extend(flatten(metric, node))
+        for field, entry in normalize_metrics(paper).items():
+            row = _row(f"normalized.{field}", entry["value"], FIELD_UNITS[field],
+                       f"confidence={entry['confidence']}")
+            paper_rows.append(row)
+        for row in paper_rows:
+            row.update(paper_id=paper["id"], source_figure=source_figure)
+            rows.append({col: row[col] for col in COLUMNS})
+    return rows
+
+
+def write_csv(rows, path):
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=COLUMNS)
+    writer.writeheader()
+    writer.writerows(rows)
+    atomic_write_text(path, buf.getvalue(), newline="")
+
+
+def arrow_table(rows):
+    import pyarrow as pa
+    schema = pa.schema([(col, pa.float64() if col == "value_num" else pa.string())
+                        for col in COLUMNS])
+    return pa.Table.from_pydict({col: [row[col] for row in rows] for col in COLUMNS},
+                                schema=schema)
+
+
+def write_parquet(rows, path):
+    import pyarrow.parquet as pq
+    pq.write_table(arrow_table(rows), path + ".tmp", compression="zstd")
+    os.replace(path + ".tmp", path)
+
+
+def write_arrow(rows, path):
+    import pyarrow as pa
+    table = arrow_table(rows)
+    with pa.OSFile(path + ".tmp", "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(path + ".tmp", path)
+
+
+COLUMNAR_WRITERS = {"parquet": write_parquet, "arrow": write_arrow}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export metrics_detailed as a long-format table")
+    parser.add_argument("--formats", default="parquet",
+                        help="Comma-separated columnar formats besides the CSV: "
+                             "parquet, arrow (default: parquet)")
+    parser.add_argument("--output", default=OUTPUT_STEM,
+                        help="Output path without extension (default: data/metrics_long)")
+    args = parser.parse_args()
+
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    unknown = [f for f in formats if f not in COLUMNAR_WRITERS]
+    if unknown:
+        parser.error(f"unknown format(s): {', '.join(unknown)}")
+    if formats:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("WARNING: pyarrow not installed (pip install pyarrow), writing CSV only")
+            formats = []
+
+    papers = paper_store.get_papers(paper_store.connect())
+    rows = build_rows(papers)
+
+    numeric = sum(1 for row in rows if row["value_num"] is not None)
+    print(f"  {len(rows)} rows from {len(papers)} papers ({numeric} with a numeric value)")
+    writers = [("csv", write_csv)] + [(fmt, COLUMNAR_WRITERS[fmt]) for fmt in formats]
+    for fmt, writer in writers:
+        path = f"{args.output}.{fmt}"
+        writer(rows, path)
+        print(f"  Wrote {path} ({os.path.getsize(path) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
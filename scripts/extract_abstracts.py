@@ -1,17 +1,21 @@
 #!/usr/bin/env python3
-"""Extract abstracts from data/{id}/text.md files and update papers.json.
+"""Extract abstracts from data/{id}/text.md files into the paper store.
 
 The ISSCC abstract format: Each text.md has a line containing only "Abstract"
 near the end. The abstract text is the paragraph just before this label.
+
+Only the abstract field is written (paper_store.update_fields), so this can
+run alongside the other enrichment stages; papers.json is exported by
+build_site_data.py.
 """
 
-import json
 import os
 import re
 
+import paper_store
+
 BASE = "/home/sdu/obsidian/isscc_accelerator"
 DATA_DIR = os.path.join(BASE, "data")
-PAPERS_JSON = os.path.join(DATA_DIR, "papers.json")
 
 
 def extract_abstract(text_path):
@@ -70,9 +74,8 @@ def extract_abstract(text_path):
 
 
 def main():
-    # Load papers.json
-    with open(PAPERS_JSON, "r", encoding="utf-8") as f:
-        papers = json.load(f)
+    conn = paper_store.connect()
+    papers = paper_store.get_papers(conn)
 
     success = 0
     failed = 0
@@ -90,7 +93,7 @@ def main():
         abstract = extract_abstract(text_path)
 
         if abstract:
-            paper["abstract"] = abstract
+            paper_store.update_fields(conn, pid, {"abstract": abstract})
             # Show first 80 chars
             preview = abstract[:80] + "..." if len(abstract) > 80 else abstract
             print(f"  [{pid}] OK - {len(abstract)} chars: {preview}")
@@ -99,10 +102,6 @@ def main():
             print(f"  [{pid}] FAIL - could not extract abstract")
             failed += 1
 
-    # Write back papers.json
-    with open(PAPERS_JSON, "w", encoding="utf-8") as f:
-        json.dump(papers, f, indent=2, ensure_ascii=False)
-
     print(f"\n{'='*60}")
     print(f"Summary:")
     print(f"  Total papers: {len(papers)}")
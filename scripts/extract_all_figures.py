@@ -7,115 +7,31 @@ Dual-path extraction:
                             (for 10.3, 10.6, 10.10 which use PDF vector graphics)
 
 Output: images/{paper_id}/fig_{n}.png (unified PNG format)
+
+PDF parsing and the page -> paper index come from pdf_ingest.py. With
+--jobs N, papers are fanned out across N worker processes, each holding its
+own fitz document handles; figure_stats.json is identical to a serial run.
 """
 
+import argparse
 import fitz
 import json
 import os
-import re
+
+import pdf_ingest
+from pdf_ingest import PAGE_MID_X
 
 BASE = "/home/sdu/obsidian/isscc_accelerator"
 PDF_DIR = os.path.join(BASE, "pdfs")
 IMG_DIR = os.path.join(BASE, "images")
 
-MIN_WIDTH = 200
-MIN_HEIGHT = 200
 VECTOR_DPI = 300
 VECTOR_ZOOM = VECTOR_DPI / 72
-PAGE_MID_X = 306
-
-
-def find_paper_pages(doc):
-    """Map paper IDs to their page indices."""
-    paper_pages = {}
-    for i in range(doc.page_count):
-        text = doc[i].get_text()[:500]
-        m = re.search(r'SESSION\s+\d+\s*/[^/]+/\s*(\d+\.\d+)', text)
-        if m:
-            pid = m.group(1)
-            if pid not in paper_pages:
-                paper_pages[pid] = []
-            paper_pages[pid].append(i)
-        figs = re.findall(r'Figure\s+(\d+\.\d+)\.\d+', text)
-        for fig_id in figs:
-            if fig_id not in paper_pages:
-                paper_pages[fig_id] = []
-            if i not in paper_pages[fig_id]:
-                paper_pages[fig_id].append(i)
-    return paper_pages
-
-
-def count_expected_figures(doc, pages, paper_id):
-    """Count expected figures from captions."""
-    fig_nums = set()
-    for page_num in pages:
-        text = doc[page_num].get_text()
-        for m in re.finditer(rf'Figure\s+{re.escape(paper_id)}\.(\d+)', text):
-            fig_nums.add(int(m.group(1)))
-    return len(fig_nums)
-
-
-def extract_bitmap_figures(doc, fig_pages, out_dir):
-    """Path A: Extract bitmap figures sorted by position. Same logic as original extract_figures.py."""
-    all_figures = []
 
-    for page_num in fig_pages:
-        page = doc[page_num]
-        images = page.get_images(full=True)
 
-        for img_info in images:
-            xref = img_info[0]
-            try:
-                base_image = doc.extract_image(xref)
-            except Exception:
-                continue
-
-            w = base_image["width"]
-            h = base_image["height"]
-            if w < MIN_WIDTH or h < MIN_HEIGHT:
-                continue
-
-            rects = page.get_image_rects(xref)
-            if not rects:
-                continue
-
-            rect = rects[0]
-            all_figures.append({
-                "xref": xref,
-                "image_data": base_image["image"],
-                "ext": base_image["ext"],
-                "width": w,
-                "height": h,
-                "page": page_num,
-                "y": rect.y0,
-                "x": rect.x0,
-            })
-
-    # Sort by page, then row (y with threshold), then column (x)
-    ROW_THRESHOLD = 30
-    all_figures.sort(key=lambda f: (f["page"], f["y"], f["x"]))
-
-    if all_figures:
-        rows = []
-        current_row = [all_figures[0]]
-        current_page = all_figures[0]["page"]
-        current_y = all_figures[0]["y"]
-
-        for fig in all_figures[1:]:
-            if fig["page"] == current_page and abs(fig["y"] - current_y) < ROW_THRESHOLD:
-                current_row.append(fig)
-            else:
-                rows.append(current_row)
-                current_row = [fig]
-                current_page = fig["page"]
-                current_y = fig["y"]
-        rows.append(current_row)
-
-        sorted_figures = []
-        for row in rows:
-            row.sort(key=lambda f: f["x"])
-            sorted_figures.extend(row)
-        all_figures = sorted_figures
+def extract_bitmap_figures(paper, fig_pages, out_dir):
+    """Path A: Extract bitmap figures sorted by position. Same logic as original extract_figures.py."""
+    all_figures = paper.bitmap_figures(fig_pages)
 
     # Save as PNG
     os.makedirs(out_dir, exist_ok=True)
@@ -139,46 +55,9 @@ def extract_bitmap_figures(doc, fig_pages, out_dir):
     return saved
 
 
-def find_caption_positions(page, paper_id):
-    """Find Figure X.Y.Z caption positions on a page."""
-    captions = []
-    blocks = page.get_text("dict")["blocks"]
-    pattern = re.compile(rf'Figure\s+{re.escape(paper_id)}\.(\d+)')
-
-    for block in blocks:
-        if block["type"] != 0:
-            continue
-        for line in block["lines"]:
-            line_text = "".join(span["text"] for span in line["spans"])
-            m = pattern.search(line_text)
-            if m:
-                fig_num = int(m.group(1))
-                bbox = line["bbox"]
-                captions.append({
-                    "fig_num": fig_num,
-                    "x0": bbox[0],
-                    "y0": bbox[1],
-                    "x1": bbox[2],
-                    "y1": bbox[3],
-                    "text": line_text,
-                })
-    return captions
-
-
-def extract_vector_figures(doc, fig_pages, out_dir, paper_id):
+def extract_vector_figures(paper, fig_pages, out_dir):
     """Path B: Render pages and crop figures by caption positions."""
-    all_captions = []
-
-    for page_num in fig_pages:
-        page = doc[page_num]
-        caps = find_caption_positions(page, paper_id)
-        for cap in caps:
-            cap["page_num"] = page_num
-            cap["page_height"] = page.rect.height
-            cap["page_width"] = page.rect.width
-            cap_center_x = (cap["x0"] + cap["x1"]) / 2
-            cap["column"] = 0 if cap_center_x < PAGE_MID_X else 1
-        all_captions.extend(caps)
+    all_captions = paper.captions(fig_pages)
 
     if not all_captions:
         return 0
@@ -197,23 +76,22 @@ def extract_vector_figures(doc, fig_pages, out_dir, paper_id):
         page_col_caps[key].sort(key=lambda c: c["y0"])
 
     os.makedirs(out_dir, exist_ok=True)
-    mat = fitz.Matrix(VECTOR_ZOOM, VECTOR_ZOOM)
     saved = 0
     MARGIN = 18
     COL_GAP = 8
 
     for cap in all_captions:
         page_num = cap["page_num"]
-        page = doc[page_num]
+        page_width = cap["page_width"]
         col = cap["column"]
 
         # Column boundaries
         if cap["x1"] - cap["x0"] > PAGE_MID_X:
-            col_x0, col_x1 = MARGIN, page.rect.width - MARGIN
+            col_x0, col_x1 = MARGIN, page_width - MARGIN
         elif col == 0:
             col_x0, col_x1 = MARGIN, PAGE_MID_X - COL_GAP / 2
         else:
-            col_x0, col_x1 = PAGE_MID_X + COL_GAP / 2, page.rect.width - MARGIN
+            col_x0, col_x1 = PAGE_MID_X + COL_GAP / 2, page_width - MARGIN
 
         # Find top boundary
         key = (page_num, col)
@@ -234,7 +112,7 @@ def extract_vector_figures(doc, fig_pages, out_dir, paper_id):
             continue
 
         clip = fitz.Rect(col_x0, top_y, col_x1, bottom_y)
-        pix = page.get_pixmap(matrix=mat, clip=clip)
+        pix = paper.render_page(page_num, VECTOR_ZOOM, clip=clip)
 
         out_path = os.path.join(out_dir, f"fig_{cap['fig_num']}.png")
         pix.save(out_path)
@@ -252,50 +130,36 @@ def clean_figures(out_dir):
             os.remove(os.path.join(out_dir, fname))
 
 
-def main():
-    total_figures = 0
-    paper_stats = []
-
-    for pdf_name in sorted(os.listdir(PDF_DIR)):
-        if not pdf_name.endswith('.pdf'):
-            continue
-        pdf_path = os.path.join(PDF_DIR, pdf_name)
-        doc = fitz.open(pdf_path)
-        print(f"Processing {pdf_name} ({doc.page_count} pages)...")
-
-        paper_pages = find_paper_pages(doc)
+def extract_paper(paper):
+    """pdf_ingest consumer: extract one paper's figures and return its stats entry."""
+    pid = paper.id
 
-        for pid in sorted(paper_pages.keys(),
-                          key=lambda x: (int(x.split('.')[0]), int(x.split('.')[1]))):
-            pages = sorted(paper_pages[pid])
+    # Figure pages = pages with embedded images (original logic)
+    fig_pages = paper.figure_pages()
+    expected = paper.expected_figure_count()
 
-            # Figure pages = pages with embedded images (original logic)
-            fig_pages = [pn for pn in pages if len(doc[pn].get_images(full=True)) > 0]
-            expected = count_expected_figures(doc, pages, pid)
+    out_dir = os.path.join(IMG_DIR, pid)
+    clean_figures(out_dir)
 
-            out_dir = os.path.join(IMG_DIR, pid)
-            clean_figures(out_dir)
+    # Path A: bitmap extraction
+    count = extract_bitmap_figures(paper, fig_pages, out_dir)
 
-            # Path A: bitmap extraction
-            count = extract_bitmap_figures(doc, fig_pages, out_dir)
+    # Path B: vector fallback when bitmap gets less than half expected
+    if count <= expected // 2 and expected >= 5:
+        print(f"    Using vector fallback for {pid} (bitmap: {count}/{expected})")
+        clean_figures(out_dir)
+        # Use all pages with figure captions for vector extraction
+        count = extract_vector_figures(paper, paper.caption_pages(), out_dir)
 
-            # Path B: vector fallback when bitmap gets less than half expected
-            if count <= expected // 2 and expected >= 5:
-                print(f"    Using vector fallback for {pid} (bitmap: {count}/{expected})")
-                clean_figures(out_dir)
-                # Use all pages with figure captions for vector extraction
-                caption_pages = [pn for pn in pages
-                                 if re.search(rf'Figure\s+{re.escape(pid)}\.\d+', doc[pn].get_text())]
-                count = extract_vector_figures(doc, caption_pages, out_dir, pid)
+    status = "OK" if count >= expected - 1 else ("LOW" if count < expected - 2 else "OK")
+    print(f"  Paper {pid}: {count}/{expected} figures [{status}] -> {out_dir}")
+    return {"id": pid, "extracted": count, "expected": expected, "status": status}
 
-            total_figures += count
-            status = "OK" if count >= expected - 1 else ("LOW" if count < expected - 2 else "OK")
-            paper_stats.append({"id": pid, "extracted": count, "expected": expected, "status": status})
-            print(f"  Paper {pid}: {count}/{expected} figures [{status}] -> {out_dir}")
 
-        doc.close()
+def report(paper_stats):
+    """Print the summary and save data/figure_stats.json."""
+    total_figures = sum(s["extracted"] for s in paper_stats)
 
-    # Summary
     print(f"\n{'='*60}")
     print(f"Total: {total_figures} figures from {len(paper_stats)} papers")
     low = [s for s in paper_stats if s["status"] == "LOW"]
@@ -312,5 +176,20 @@ def main():
     print(f"Stats saved to {stats_path}")
 
 
+def main():
+    parser = argparse.ArgumentParser(
+        description="Extract individual figures from ISSCC session PDFs"
+    )
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Worker processes for per-paper extraction (default: 1)")
+    args = parser.parse_args()
+
+    if args.jobs > 1:
+        paper_stats = pdf_ingest.run_parallel(extract_paper, args.jobs, PDF_DIR)
+    else:
+        paper_stats, = pdf_ingest.run([extract_paper], PDF_DIR)
+    report(paper_stats)
+
+
 if __name__ == "__main__":
     main()
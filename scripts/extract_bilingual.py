@@ -1,21 +1,37 @@
 #!/usr/bin/env python3
 """Add English translations for challenges and ideas using an LLM.
 
-For each paper, reads the Chinese challenges/ideas from papers.json and
+For each paper, reads the Chinese challenges/ideas from the paper store and
 prompts the LLM to translate them to English using original paper terminology.
-Updates the text_en field on each challenge and idea.
+The paper text is packed into --token-budget tokens (see prompt_context.py).
+Updates the text_en field on each challenge and idea (translations table of
+paper_store.py), one paper at a time.
+
+LLM access goes through llm_backend.py (provider, retries, response cache).
+With --concurrency N (N > 1) all pending papers are sent as one asyncio
+batch with bounded concurrency and optional --rpm / --tpm limits.
+
+With --batch-size N (N > 1) N papers share one request and the response is
+split back out by paper ID; papers whose section is missing or incomplete
+are retried with single-paper requests. Grouped requests still honour
+--concurrency.
 """
 
 import argparse
 import json
 import os
-import re
 import sys
 import time
 
+import paper_store
+from llm_backend import add_backend_args, backend_from_args
+from prompt_context import build_context
+
 BASE = "/home/sdu/obsidian/isscc_accelerator"
 DATA_DIR = os.path.join(BASE, "data")
-PAPERS_JSON = os.path.join(DATA_DIR, "papers.json")
+
+# Paper text sent for terminology reference (about the old 3000-char preview)
+DEFAULT_TOKEN_BUDGET = 750
 
 TRANSLATION_PROMPT = """You are an expert chip design researcher fluent in both Chinese and English.
 
@@ -48,58 +64,55 @@ IMPORTANT:
 """
 
 
-def call_llm(messages, api_key, base_url, model, max_retries=3):
-    """Call the OpenAI-compatible API with retry logic."""
-    try:
-        import openai
-    except ImportError:
-        print("ERROR: openai package not installed. Run: pip install openai")
-        sys.exit(1)
+BATCH_TRANSLATION_PROMPT = """You are an expert chip design researcher fluent in both Chinese and English.
 
-    client = openai.OpenAI(api_key=api_key, base_url=base_url)
+Below are {count} papers from ISSCC. For each paper you get its title, paper text for terminology reference, and Chinese text items.
 
-    for attempt in range(max_retries):
-        try:
-            response = client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=0.1,
-                max_tokens=2048,
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            wait_time = 2 ** (attempt + 1)
-            print(f"    API error (attempt {attempt + 1}/{max_retries}): {e}")
-            if attempt < max_retries - 1:
-                print(f"    Retrying in {wait_time}s...")
-                time.sleep(wait_time)
-            else:
-                raise
-
-
-def parse_json_response(response_text):
-    """Parse JSON from LLM response, handling markdown code blocks."""
-    text = response_text.strip()
-    if text.startswith("```"):
-        text = re.sub(r'^```\w*\n?', '', text)
-        text = re.sub(r'\n?```$', '', text)
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError as e:
-        print(f"    JSON parse error: {e}")
-        print(f"    Response preview: {text[:200]}")
-        return None
+{papers_block}
 
+Please translate every paper's Chinese text items to English. Use each paper's own technical terminology where possible. Translate every item, keeping the order and count of each list.
 
-def process_paper(paper, api_key, base_url, model, delay=1.0):
-    """Process a single paper and return translated text."""
+Return ONLY a JSON object keyed by paper ID:
+{{
+    "<paper ID>": {{
+        "challenges": [
+            {{ "text_en": "<English translation of challenge>" }}
+        ],
+        "ideas": [
+            {{ "text_en": "<English translation of idea>" }}
+        ]
+    }}
+}}
+
+IMPORTANT:
+- Include every paper ID listed above: {paper_ids}
+- Use precise technical terminology from the paper
+- Keep translations concise but accurate
+- Return ONLY valid JSON, no markdown or explanations
+"""
+
+BATCH_PAPER_BLOCK = """### Paper {paper_id}: {title}
+
+Paper text for terminology reference:
+{paper_text_preview}
+
+Items to translate:
+{items_json}
+"""
+
+# Completion budget per paper in a batched request
+BATCH_TOKENS_PER_PAPER = 600
+
+
+def needs_translation(paper):
+    """True if the paper has challenges/ideas without an English translation."""
     pid = paper["id"]
     challenges = paper.get("challenges", [])
     ideas = paper.get("ideas", [])
 
     if not challenges and not ideas:
         print(f"  [{pid}] SKIP - no challenges or ideas")
-        return None
+        return False
 
     # Check if already translated
     all_translated = True
@@ -114,41 +127,163 @@ def process_paper(paper, api_key, base_url, model, delay=1.0):
                 break
     if all_translated:
         print(f"  [{pid}] SKIP - already translated")
-        return None
+        return False
+    return True
+
+
+def paper_request_fields(paper, token_budget=DEFAULT_TOKEN_BUDGET):
+    """Prompt fields shared by the single-paper and batched prompts."""
+    pid = paper["id"]
 
     # Read paper text for terminology reference
     text_path = os.path.join(DATA_DIR, pid, "text.md")
     paper_text_preview = ""
     if os.path.exists(text_path):
         with open(text_path, "r", encoding="utf-8") as f:
-            paper_text_preview = f.read()[:3000]  # First 3000 chars for context
+            paper_text_preview = build_context(f.read(), token_budget)
 
     # Build items to translate
     items = {
-        "challenges": [{"text_zh": c["text"]} for c in challenges],
-        "ideas": [{"text_zh": i["text"]} for i in ideas]
+        "challenges": [{"text_zh": c["text"]} for c in paper.get("challenges", [])],
+        "ideas": [{"text_zh": i["text"]} for i in paper.get("ideas", [])]
+    }
+
+    return {
+        "title": paper.get("title", ""),
+        "paper_id": pid,
+        "paper_text_preview": paper_text_preview,
+        "items_json": json.dumps(items, ensure_ascii=False, indent=2),
     }
 
-    prompt = TRANSLATION_PROMPT.format(
-        title=paper.get("title", ""),
-        paper_id=pid,
-        paper_text_preview=paper_text_preview,
-        items_json=json.dumps(items, ensure_ascii=False, indent=2)
-    )
 
-    messages = [{"role": "user", "content": prompt}]
+def prepare_paper(paper, token_budget=DEFAULT_TOKEN_BUDGET):
+    """Build the translation request for a paper, or None if nothing to translate."""
+    if not needs_translation(paper):
+        return None
+    prompt = TRANSLATION_PROMPT.format(**paper_request_fields(paper, token_budget))
+    return [{"role": "user", "content": prompt}]
+
 
-    print(f"  [{pid}] Calling LLM ({len(challenges)} challenges, {len(ideas)} ideas)...")
-    response_text = call_llm(messages, api_key, base_url, model)
-    result = parse_json_response(response_text)
+def prepare_group(papers, token_budget=DEFAULT_TOKEN_BUDGET):
+    """Build one translation request covering several papers (keyed by paper ID)."""
+    blocks = [BATCH_PAPER_BLOCK.format(**paper_request_fields(p, token_budget)) for p in papers]
+    prompt = BATCH_TRANSLATION_PROMPT.format(
+        count=len(papers),
+        papers_block="\n".join(blocks),
+        paper_ids=", ".join(p["id"] for p in papers),
+    )
+    return [{"role": "user", "content": prompt}]
 
-    if result:
-        print(f"  [{pid}] OK - translations received")
+
+def valid_translation(paper, translations):
+    """True if a translation object covers every challenge and idea of the paper."""
+    if not isinstance(translations, dict):
+        return False
+    for field in ("challenges", "ideas"):
+        expected = len(paper.get(field, []))
+        got = translations.get(field, [])
+        if not isinstance(got, list) or len(got) != expected:
+            return False
+        for item in got:
+            if not isinstance(item, dict) or not item.get("text_en"):
+                return False
+    return True
+
+
+def report_translation(pid, result):
+    """Print the outcome of one translation result and return its parsed JSON."""
+    translations = result["parsed"]
+    if translations:
+        status = "CACHED" if result["cached"] else "OK"
+        print(f"  [{pid}] {status} - translations received")
     else:
         print(f"  [{pid}] FAIL - could not parse response")
+    return translations
+
+
+def process_paper(paper, backend, delay=1.0, token_budget=DEFAULT_TOKEN_BUDGET):
+    """Process a single paper and return translated text."""
+    messages = prepare_paper(paper, token_budget)
+    if messages is None:
+        return None
 
-    time.sleep(delay)
-    return result
+    pid = paper["id"]
+    print(f"  [{pid}] Calling LLM ({len(paper.get('challenges', []))} challenges, "
+          f"{len(paper.get('ideas', []))} ideas)...")
+    result = backend.complete_json(messages, label=f"[{pid}]")
+    translations = report_translation(pid, result)
+
+    if not result["cached"]:
+        time.sleep(delay)
+    return translations
+
+
+def process_papers_batch(papers, backend, token_budget=DEFAULT_TOKEN_BUDGET):
+    """Translate papers concurrently; returns {paper_id: result or None or Exception}."""
+    results = {}
+    requests = []
+    for paper in papers:
+        messages = prepare_paper(paper, token_budget)
+        if messages is None:
+            results[paper["id"]] = None
+        else:
+            requests.append((paper["id"], messages))
+
+    responses = backend.complete_json_batch([(f"[{pid}]", messages) for pid, messages in requests])
+    for (pid, _), result in zip(requests, responses):
+        if isinstance(result, Exception):
+            results[pid] = result
+        else:
+            results[pid] = report_translation(pid, result)
+    return results
+
+
+def process_papers_grouped(papers, backend, batch_size, token_budget=DEFAULT_TOKEN_BUDGET):
+    """Translate `batch_size` papers per request; returns {paper_id: result or None or Exception}.
+
+    Each response is split back out by paper ID. A paper whose section is
+    missing or does not match its item counts is retried on its own.
+    """
+    results = {}
+    pending = []
+    for paper in papers:
+        if needs_translation(paper):
+            pending.append(paper)
+        else:
+            results[paper["id"]] = None
+
+    groups = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    requests = [(f"[{group[0]['id']}..{group[-1]['id']}]", prepare_group(group, token_budget))
+                for group in groups]
+    print(f"  Translating {len(pending)} papers in {len(groups)} requests...")
+    responses = backend.complete_json_batch(
+        requests, max_tokens=BATCH_TOKENS_PER_PAPER * batch_size)
+
+    retry = []
+    for group, result in zip(groups, responses):
+        if isinstance(result, Exception):
+            print(f"  [{group[0]['id']}..{group[-1]['id']}] ERROR: {result}")
+            retry.extend(group)
+            continue
+        parsed = result["parsed"] if isinstance(result["parsed"], dict) else {}
+        status = "CACHED" if result["cached"] else "OK"
+        for paper in group:
+            translations = parsed.get(paper["id"])
+            if valid_translation(paper, translations):
+                print(f"  [{paper['id']}] {status} - translations received (batched)")
+                results[paper["id"]] = translations
+            else:
+                retry.append(paper)
+
+    if retry:
+        print(f"  Retrying {len(retry)} papers individually...")
+        single = [(f"[{p['id']}]", prepare_paper(p, token_budget)) for p in retry]
+        for paper, result in zip(retry, backend.complete_json_batch(single)):
+            if isinstance(result, Exception):
+                results[paper["id"]] = result
+            else:
+                results[paper["id"]] = report_translation(paper["id"], result)
+    return results
 
 
 def apply_translations(paper, translations):
@@ -181,29 +316,28 @@ def main():
     parser = argparse.ArgumentParser(
         description="Add English translations for challenges and ideas using LLM"
     )
-    parser.add_argument("--api-key", required=True, help="API key for OpenAI-compatible service")
-    parser.add_argument("--base-url", default="https://api.openai.com/v1",
-                        help="Base URL for API (default: OpenAI)")
-    parser.add_argument("--model", default="gpt-4o",
-                        help="Model name (default: gpt-4o)")
+    add_backend_args(parser)
     parser.add_argument("--paper-id", help="Process only this paper ID (e.g., 31.3)")
     parser.add_argument("--dry-run", action="store_true",
-                        help="Print output without writing to papers.json")
+                        help="Print output without writing to the paper store")
     parser.add_argument("--delay", type=float, default=1.0,
                         help="Delay between API calls in seconds (default: 1.0)")
-    parser.add_argument("--max-retries", type=int, default=3,
-                        help="Max retries per API call (default: 3)")
+    parser.add_argument("--token-budget", type=int, default=DEFAULT_TOKEN_BUDGET,
+                        help="Max tokens of paper text per prompt, 0 = whole text "
+                             f"(default: {DEFAULT_TOKEN_BUDGET})")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="Papers per request; >1 packs several papers into one prompt "
+                             "(default: 1)")
     args = parser.parse_args()
 
-    # Load papers.json
-    with open(PAPERS_JSON, "r", encoding="utf-8") as f:
-        papers = json.load(f)
+    backend = backend_from_args(args, max_tokens=2048)
 
-    papers_by_id = {p["id"]: p for p in papers}
+    conn = paper_store.connect()
+    papers_by_id = {p["id"]: p for p in paper_store.get_papers(conn)}
 
     if args.paper_id:
         if args.paper_id not in papers_by_id:
-            print(f"ERROR: Paper ID '{args.paper_id}' not found in papers.json")
+            print(f"ERROR: Paper ID '{args.paper_id}' not found in the paper store")
             sys.exit(1)
         target_ids = [args.paper_id]
     else:
@@ -216,10 +350,23 @@ def main():
     failed = 0
     skipped = 0
 
+    batch_results = None
+    if args.batch_size > 1:
+        batch_results = process_papers_grouped([papers_by_id[pid] for pid in target_ids], backend,
+                                               args.batch_size, args.token_budget)
+    elif args.concurrency > 1:
+        batch_results = process_papers_batch([papers_by_id[pid] for pid in target_ids], backend,
+                                             args.token_budget)
+
     for pid in target_ids:
         paper = papers_by_id[pid]
         try:
-            translations = process_paper(paper, args.api_key, args.base_url, args.model, args.delay)
+            if batch_results is not None:
+                translations = batch_results.get(pid)
+                if isinstance(translations, Exception):
+                    raise translations
+            else:
+                translations = process_paper(paper, backend, args.delay, args.token_budget)
             if translations is None:
                 skipped += 1
                 continue
@@ -229,6 +376,7 @@ def main():
                 success += 1
             else:
                 if apply_translations(paper, translations):
+                    paper_store.save_translations(conn, paper)
                     success += 1
                 else:
                     failed += 1
@@ -236,18 +384,14 @@ def main():
             print(f"  [{pid}] ERROR: {e}")
             failed += 1
 
-    if not args.dry_run:
-        updated_papers = [papers_by_id[p["id"]] for p in papers]
-        with open(PAPERS_JSON, "w", encoding="utf-8") as f:
-            json.dump(updated_papers, f, indent=2, ensure_ascii=False)
-        print(f"\nWritten to {PAPERS_JSON}")
-
     print(f"\n{'='*60}")
     print(f"Summary:")
     print(f"  Processed: {success + failed + skipped}")
     print(f"  Translated: {success}")
     print(f"  Failed: {failed}")
     print(f"  Skipped: {skipped}")
+    backend.report()
+    backend.evict_cache()
 
 
 if __name__ == "__main__":
@@ -3,16 +3,16 @@
 
 For each paper, finds references to figures (e.g., "Figure 31.3.1", "Fig. 2.1.3")
 and extracts the paragraph containing each reference. Updates the figure_paragraphs
-array in papers.json.
+array of each paper in the paper store (paper_store.py).
 """
 
-import json
 import os
 import re
 
+import paper_store
+
 BASE = "/home/sdu/obsidian/isscc_accelerator"
 DATA_DIR = os.path.join(BASE, "data")
-PAPERS_JSON = os.path.join(DATA_DIR, "papers.json")
 
 # Pattern to match figure references like "Figure 31.3.1", "Fig. 2.1.3", "Figure 2.1.1"
 # The last number after the second dot is the figure number within the paper
@@ -76,9 +76,8 @@ def extract_figure_paragraphs(paper_id, text):
 
 
 def main():
-    # Load papers.json
-    with open(PAPERS_JSON, "r", encoding="utf-8") as f:
-        papers = json.load(f)
+    conn = paper_store.connect()
+    papers = paper_store.get_papers(conn)
 
     total_figures = 0
     papers_with_figs = 0
@@ -98,21 +97,16 @@ def main():
 
         fig_paras = extract_figure_paragraphs(pid, text)
 
+        paper_store.update_fields(conn, pid, {"figure_paragraphs": fig_paras})
         if fig_paras:
-            paper["figure_paragraphs"] = fig_paras
             fig_nums = [fp["figure_num"] for fp in fig_paras]
             total_figures += len(fig_paras)
             papers_with_figs += 1
             print(f"  [{pid}] OK - {len(fig_paras)} figures: {fig_nums}")
         else:
-            paper["figure_paragraphs"] = []
             papers_without += 1
             print(f"  [{pid}] No figure references found")
 
-    # Write back papers.json
-    with open(PAPERS_JSON, "w", encoding="utf-8") as f:
-        json.dump(papers, f, indent=2, ensure_ascii=False)
-
     print(f"\n{'='*60}")
     print(f"Summary:")
     print(f"  Total papers: {len(papers)}")
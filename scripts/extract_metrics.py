@@ -1,172 +1,89 @@
 #!/usr/bin/env python3
-"""Extract chip metrics from paper text and existing papers.json data.
+"""Extract chip metrics from paper text and the curated paper records.
 
 Reads from:
   - data/{paper_id}/text.md (paper body text)
-  - data/papers.json (existing metadata)
+  - the paper store (paper_store.py; curated metadata)
 
 Writes to:
-  - data/{paper_id}/metrics.json
+  - data/{paper_id}/metrics.json (one value per metric)
+  - data/{paper_id}/metrics_regex.json (every occurrence as
+    {value, unit, condition} records, in the metrics_detailed schema)
+
+Papers whose text.md, figures.json, curated paper fields and this
+script are unchanged since the last run are skipped (see build_cache.py).
+Use --force to re-extract everything.
+
+Text metrics come from metric_scanner.py, which scans each text.md once
+for all patterns. metrics_regex.json records carry a condition built from
+the cues (precision, voltage, frequency, model, phase) in the sentence
+around each match. --candidates also prints every value found per metric,
+not just the one written.
 """
 
+import argparse
 import json
 import os
-import re
+
+import paper_store
+from atomic_io import write_json
+from build_cache import BuildManifest, file_digest, input_digest, script_version, value_digest
+from metric_scanner import CATEGORIES, best_matches, detailed_metrics, scan
 
 BASE = "/home/sdu/obsidian/isscc_accelerator"
 DATA_DIR = os.path.join(BASE, "data")
 
+STAGE = "extract_metrics"
+
+# Paper record fields merge_with_existing() reads
+CURATED_FIELDS = ["process_node", "die_area_mm2", "power_mw", "energy_efficiency", "target_model"]
+
 
-def extract_from_text(text):
-    """Extract chip metrics from paper body text using regex patterns."""
+def extract_from_text(text, matches=None):
+    """Extract chip metrics from paper body text using regex patterns.
+
+    One value per category: the best of all candidates metric_scanner.scan()
+    finds (most specific pattern first, then earliest in the text). Pass
+    matches to reuse an existing scan of text.
+    """
+    if matches is None:
+        matches = scan(text)
     metrics = {}
+    for category, match in best_matches(matches).items():
+        if match["value"] is not None:
+            metrics[category] = match["value"]
+    # Keep the historical key order of metrics.json
+    return {category: metrics[category] for category in CATEGORIES if category in metrics}
+
 
-    # Technology / Process node
-    tech_patterns = [
-        r'(\d+\s*nm)\s+CMOS',
-        r'fabricated\s+in\s+(\d+\s*nm)',
-        r'(\d+\s*nm)\s+(?:UTBB-)?FDSOI',
-        r'(\d+\s*nm)\s+FinFET',
-        r'(\d+\s*nm)\s+process',
-        r'(\d+\s*nm)\s+technology',
-        r'TSMC\s+(\d+\s*nm)',
-    ]
-    for pat in tech_patterns:
-        m = re.search(pat, text, re.IGNORECASE)
-        if m:
-            metrics["technology"] = m.group(1).replace(' ', '') + " CMOS"
-            break
-
-    # Die area
-    area_patterns = [
-        r'die\s+area\s+(?:of\s+)?(\d+\.?\d*)\s*mm\s*[²2]',
-        r'(\d+\.?\d*)\s*mm\s*[²2]\s+die\s+area',
-        r'(\d+\.?\d*)\s*mm\s*[²2]\s+(?:core|chip|total)\s+area',
-        r'core\s+area\s+(?:of\s+)?(\d+\.?\d*)\s*mm\s*[²2]',
-        r'chip\s+area\s+(?:of\s+|is\s+)?(\d+\.?\d*)\s*mm\s*[²2]',
-        r'occupies\s+(\d+\.?\d*)\s*mm\s*[²2]',
-        r'(\d+\.?\d*)\s*[×x]\s*(\d+\.?\d*)\s*mm\s*[²2]?\s*(?:die|chip|core)',
-    ]
-    for pat in area_patterns:
-        m = re.search(pat, text, re.IGNORECASE)
-        if m:
-            if m.lastindex == 2:
-                # WxH format
-                metrics["die_area_mm2"] = str(round(float(m.group(1)) * float(m.group(2)), 2))
-            else:
-                metrics["die_area_mm2"] = m.group(1)
-            break
-
-    # Supply voltage
-    volt_patterns = [
-        r'(\d+\.?\d*)\s*V\s+supply',
-        r'supply\s+(?:voltage\s+)?(?:of\s+)?(\d+\.?\d*)\s*V',
-        r'VDD\s*=\s*(\d+\.?\d*)\s*V',
-        r'(\d+\.?\d*)\s*V\s+VDD',
-        r'operating\s+at\s+(\d+\.?\d*)\s*V',
-    ]
-    for pat in volt_patterns:
-        m = re.search(pat, text, re.IGNORECASE)
-        if m:
-            v = float(m.group(1))
-            if 0.3 <= v <= 5.0:  # Reasonable supply voltage range
-                metrics["supply_voltage"] = f"{v}V"
-            break
-
-    # SRAM size
-    sram_patterns = [
-        r'(\d+\.?\d*)\s*[KkMm]B\s+(?:of\s+)?(?:on-chip\s+)?SRAM',
-        r'SRAM\s+(?:of\s+)?(\d+\.?\d*)\s*[KkMm]B',
-        r'(\d+\.?\d*)\s*[KkMm]B\s+(?:on-chip\s+)?memory',
-    ]
-    for pat in sram_patterns:
-        m = re.search(pat, text, re.IGNORECASE)
-        if m:
-            metrics["sram_kb"] = m.group(0).strip()
-            break
-
-    # Frequency
-    freq_patterns = [
-        r'(\d+\.?\d*)\s*[GM]Hz\s+clock',
-        r'clock\s+(?:frequency\s+)?(?:of\s+)?(\d+\.?\d*)\s*[GM]Hz',
-        r'operates?\s+at\s+(?:up\s+to\s+)?(\d+\.?\d*)\s*[GM]Hz',
-        r'(\d+\.?\d*)\s*[GM]Hz\s+(?:operating|operation)',
-        r'running\s+at\s+(\d+\.?\d*)\s*[GM]Hz',
-        r'frequency\s+(?:of\s+)?(\d+\.?\d*)\s*[GM]Hz',
-    ]
-    for pat in freq_patterns:
-        m = re.search(pat, text, re.IGNORECASE)
-        if m:
-            freq_str = m.group(0).strip()
-            freq_m = re.search(r'(\d+\.?\d*)\s*([GM]Hz)', freq_str, re.IGNORECASE)
-            if freq_m:
-                val = float(freq_m.group(1))
-                unit = freq_m.group(2)
-                if unit.upper() == 'GHZ':
-                    metrics["frequency_mhz"] = str(int(val * 1000))
-                else:
-                    metrics["frequency_mhz"] = str(int(val))
-            break
-
-    # Power
-    power_patterns = [
-        r'(?:dissipating|consumes?|power\s+(?:consumption\s+)?(?:of\s+)?)\s*(\d+\.?\d*)\s*([mu]?W)',
-        r'(\d+\.?\d*)\s*([mu]?W)\s+(?:power|total)',
-        r'(?:total|peak|average)\s+power\s+(?:of\s+)?(\d+\.?\d*)\s*([mu]?W)',
-    ]
-    for pat in power_patterns:
-        m = re.search(pat, text, re.IGNORECASE)
-        if m:
-            val = float(m.group(1))
-            unit = m.group(2)
-            if unit == 'uW':
-                val_mw = val / 1000
-            elif unit == 'W':
-                val_mw = val * 1000
-            else:
-                val_mw = val
-            metrics["power_mw"] = str(round(val_mw, 2))
-            break
-
-    # Energy efficiency
-    eff_patterns = [
-        r'(\d+\.?\d*)\s*TOPS/W',
-        r'(\d+\.?\d*)\s*GOPS/W',
-        r'(\d+\.?\d*)\s*[pn]J/b(?:it)?',
-        r'energy\s+efﬁciency\s+(?:of\s+)?(\d+\.?\d*\s*\S+)',
-        r'(\d+\.?\d*)\s*TFLOPS/W',
-    ]
-    for pat in eff_patterns:
-        m = re.search(pat, text, re.IGNORECASE)
-        if m:
-            metrics["energy_efficiency"] = m.group(0).strip()
-            break
-
-    # Throughput
-    tp_patterns = [
-        r'(\d+\.?\d*)\s*TOPS(?:\s|,|\.)',
-        r'(\d+\.?\d*)\s*GOPS(?:\s|,|\.)',
-        r'throughput\s+(?:of\s+)?(\d+\.?\d*\s*\S+)',
-        r'(\d+\.?\d*)\s*TFLOPS(?:\s|,|\.)',
-        r'(\d+\.?\d*)\s*[GM]b/s',
-    ]
-    for pat in tp_patterns:
-        m = re.search(pat, text, re.IGNORECASE)
-        if m:
-            metrics["throughput"] = m.group(0).strip()
-            break
-
-    return metrics
+def count_records(detailed):
+    """Number of values in a metrics_detailed-style dict."""
+    return sum(len(v["values"]) if isinstance(v, dict) and "values" in v else 1
+               for v in detailed.values())
+
+
+def format_candidates(matches):
+    """One line per category listing every candidate value, best first."""
+    by_category = {}
+    for match in matches:
+        by_category.setdefault(match["category"], []).append(match)
+    lines = []
+    for category in CATEGORIES:
+        ranked = sorted(by_category.get(category, []), key=lambda m: (m["priority"], m["start"]))
+        values = [m["value"] or f"({m['text'].strip()})" for m in ranked]
+        if values:
+            lines.append(f"    {category:18s} {' | '.join(values)}")
+    return lines
 
 
 def merge_with_existing(paper, text_metrics):
-    """Merge text-extracted metrics with existing papers.json data."""
+    """Merge text-extracted metrics with the curated paper record."""
     merged = {}
 
     # Start with text-extracted metrics
     merged.update(text_metrics)
 
-    # Override/supplement with papers.json data (which was manually curated)
+    # Override/supplement with the paper record (which was manually curated)
     if paper.get("process_node"):
         merged["technology"] = paper["process_node"]
     if paper.get("die_area_mm2"):
@@ -190,34 +107,57 @@ def merge_with_existing(paper, text_metrics):
 
 
 def main():
-    # Load papers.json
-    papers_path = os.path.join(DATA_DIR, "papers.json")
-    with open(papers_path, "r", encoding="utf-8") as f:
-        papers = json.load(f)
+    parser = argparse.ArgumentParser(
+        description="Extract chip metrics from paper text into metrics.json"
+    )
+    parser.add_argument("--force", action="store_true",
+                        help="Re-extract every paper, ignoring the build manifest")
+    parser.add_argument("--candidates", action="store_true",
+                        help="Print every candidate value found in the text per metric")
+    args = parser.parse_args()
+
+    manifest = BuildManifest()
+    version = script_version(__file__)
+
+    papers = paper_store.get_papers(paper_store.connect())
 
     papers_by_id = {p["id"]: p for p in papers}
 
     total = 0
+    skipped = 0
     for pid in sorted(papers_by_id.keys(),
                       key=lambda x: (int(x.split('.')[0]), int(x.split('.')[1]))):
         paper = papers_by_id[pid]
         paper_dir = os.path.join(DATA_DIR, pid)
+        text_path = os.path.join(paper_dir, "text.md")
+        figures_path = os.path.join(paper_dir, "figures.json")
+        metrics_path = os.path.join(paper_dir, "metrics.json")
+        regex_path = os.path.join(paper_dir, "metrics_regex.json")
+
+        # Skip papers whose inputs are unchanged since the last build
+        key = input_digest(file_digest(text_path),
+                           file_digest(figures_path),
+                           value_digest({f: paper.get(f) for f in CURATED_FIELDS}),
+                           version)
+        total += 1
+        if not args.force and manifest.is_fresh(STAGE, pid, key, [metrics_path, regex_path]):
+            skipped += 1
+            continue
 
         # Read text.md
-        text_path = os.path.join(paper_dir, "text.md")
         text = ""
         if os.path.exists(text_path):
             with open(text_path, "r", encoding="utf-8") as f:
                 text = f.read()
 
         # Extract metrics from text
-        text_metrics = extract_from_text(text)
+        matches = scan(text)
+        text_metrics = extract_from_text(text, matches)
 
         # Merge with existing data
         metrics = merge_with_existing(paper, text_metrics)
 
         # Determine source figure (usually fig 7 or last figure)
-        figures_path = os.path.join(paper_dir, "figures.json")
         if os.path.exists(figures_path):
             with open(figures_path) as f:
                 figures = json.load(f)
@@ -226,17 +166,22 @@ def main():
                 metrics["source_figure"] = f"fig_{last_fig['figure_num']}"
 
         # Write metrics.json
-        os.makedirs(paper_dir, exist_ok=True)
-        metrics_path = os.path.join(paper_dir, "metrics.json")
-        with open(metrics_path, "w", encoding="utf-8") as f:
-            json.dump(metrics, f, indent=2, ensure_ascii=False)
+        write_json(metrics_path, metrics, indent=2)
+        detailed = detailed_metrics(text, matches)
+        write_json(regex_path, detailed, indent=2)
+        manifest.record(STAGE, pid, key)
 
         field_count = len([v for v in metrics.values() if v])
-        total += 1
-        print(f"  Paper {pid}: {field_count} metrics extracted")
+        print(f"  Paper {pid}: {field_count} metrics extracted, "
+              f"{count_records(detailed)} regex records")
+        if args.candidates:
+            for line in format_candidates(matches):
+                print(line)
+
+    manifest.save()
 
     print(f"\n{'='*60}")
-    print(f"Processed {total} papers")
+    print(f"Processed {total} papers ({skipped} unchanged, skipped)")
 
     # Summary of coverage
     all_fields = ["technology", "die_area_mm2", "supply_voltage", "sram_kb",
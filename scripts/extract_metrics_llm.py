@@ -1,24 +1,71 @@
 #!/usr/bin/env python3
 """Extract detailed metrics from paper text and figures using an LLM.
 
-Uses an OpenAI-compatible API to extract structured chip metrics from
-paper text and optionally figure images (multimodal).
-
-Writes metrics_detailed field into papers.json.
+Uses an LLM (OpenAI-compatible by default, see llm_backend.py) to extract
+structured chip metrics from paper text and optionally figure images
+(multimodal).
+
+Writes the metrics_detailed field of each paper to the paper store
+(paper_store.py) as soon as its result is in.
+
+The paper text is packed into --token-budget tokens, keeping the abstract,
+the Fig. 6/7 comparison paragraphs and metric-bearing text first (see
+prompt_context.py). Figure images are cropped, downscaled and re-encoded
+before upload (--image-max-edge / --image-format, see image_prep.py).
+
+Responses are cached on disk, keyed by the model and the exact request
+(prompt, paper text, image bytes); unchanged papers are served from the
+cache without an API call. --refresh bypasses cached entries.
+
+With --stream the response is checked while it arrives against the schema
+in EXTRACTION_PROMPT (json_stream.py): output that is not JSON, breaks the
+syntax or runs past MAX_RESPONSE_CHARS is cancelled at once and re-asked
+with a repair prompt (--repair-attempts).
+
+With --concurrency N (N > 1) uncached papers are sent as one asyncio batch
+with bounded concurrency and optional --rpm / --tpm limits.
+
+With --hybrid the regex extractor (metric_scanner.py) runs first and the
+LLM is only asked for the fields it leaves missing or low-confidence (see
+metric_gaps.py), in up to two targeted sub-prompts: chip-level numbers
+without images, and results/comparison fields with the Fig. 6/7 images.
+Each sub-prompt packs the paragraphs about its fields into a smaller
+budget (HYBRID_TOKEN_BUDGET). The stored metrics_detailed is the regex
+records with the LLM answers laid over them.
+
+Every result is appended to a JSONL journal (data/.journal/
+extract_metrics_llm.jsonl, see run_journal.py) the moment it completes, also
+in batch mode. After an interruption, --resume skips the papers the journal
+already has and merges their results into the store at the end. A full run
+without --resume starts a new journal.
 """
 
 import argparse
 import base64
 import json
 import os
-import re
 import sys
 import time
 
+import paper_store
+from image_prep import add_image_args, image_options, prepare_image
+from json_stream import schema_from_example
+from llm_backend import add_backend_args, backend_from_args
+from metric_gaps import focus_pattern, gap_fields, merge_detailed, plan_requests
+from metric_scanner import detailed_metrics
+from prompt_context import build_context
+from run_journal import RunJournal, journal_path
+
 BASE = "/home/sdu/obsidian/isscc_accelerator"
 DATA_DIR = os.path.join(BASE, "data")
 IMAGES_DIR = os.path.join(BASE, "images")
-PAPERS_JSON = os.path.join(DATA_DIR, "papers.json")
+
+STAGE = "extract_metrics_llm"
+
+# Paper text per prompt; the abstract and Fig. 6/7 paragraphs are kept first
+DEFAULT_TOKEN_BUDGET = 6000
+# Paper text per --hybrid sub-prompt, which asks about a few fields only
+HYBRID_TOKEN_BUDGET = 2500
 
 EXTRACTION_PROMPT = """You are an expert chip design researcher. Extract detailed metrics from this ISSCC paper.
 
@@ -73,29 +120,56 @@ IMPORTANT:
 """
 
 
-def encode_image(image_path):
-    """Encode an image file as base64 for multimodal API calls."""
-    with open(image_path, "rb") as f:
-        return base64.b64encode(f.read()).decode("utf-8")
+# The JSON example in EXTRACTION_PROMPT
+EXTRACTION_EXAMPLE = json.loads(EXTRACTION_PROMPT[EXTRACTION_PROMPT.index("\n{") + 1:
+                                                  EXTRACTION_PROMPT.index("\n}\n") + 2])
+# Top-level value kinds of that schema, checked while a --stream response arrives
+EXTRACTION_SCHEMA = schema_from_example(EXTRACTION_EXAMPLE)
+# Stored extractions mostly answer "comparison" with a sentence and sometimes
+# give "quantization" as an object; both are usable
+EXTRACTION_SCHEMA["comparison"].add("string")
+EXTRACTION_SCHEMA["quantization"].add("object")
+# Roughly twice the longest stored metrics_detailed; longer is a runaway
+MAX_RESPONSE_CHARS = 12000
+
+
+TARGETED_PROMPT = """You are an expert chip design researcher. Extract the following metrics from this ISSCC paper.
+
+Return a JSON object with only these fields (omit fields if not found in the paper):
+
+{schema}
+
+""" + EXTRACTION_PROMPT[EXTRACTION_PROMPT.index("IMPORTANT:"):]
+
+
+def targeted_prompt(fields):
+    """EXTRACTION_PROMPT cut down to the schema of the given fields."""
+    schema = json.dumps({field: EXTRACTION_EXAMPLE[field] for field in fields},
+                        indent=4, ensure_ascii=False)
+    return TARGETED_PROMPT.replace("{schema}", schema)
+
 
+def encode_image(image_path, image_opts=None):
+    """Downscale/re-encode an image (image_prep.py) and return (base64, media type)."""
+    data, media_type = prepare_image(image_path, **(image_opts or {}))
+    return base64.b64encode(data).decode("utf-8"), media_type
 
-def build_messages(paper_id, text, image_paths=None):
+
+def build_messages(paper_id, text, image_paths=None, image_opts=None, prompt=EXTRACTION_PROMPT):
     """Build the message list for the LLM API call."""
     content = []
 
     # Text content
     content.append({
         "type": "text",
-        "text": f"Paper ID: {paper_id}\n\n{EXTRACTION_PROMPT}\n\nPaper text:\n{text}"
+        "text": f"Paper ID: {paper_id}\n\n{prompt}\n\nPaper text:\n{text}"
     })
 
     # Add images if available
     if image_paths:
         for img_path in image_paths:
             if os.path.exists(img_path):
-                b64 = encode_image(img_path)
-                ext = os.path.splitext(img_path)[1].lower()
-                media_type = "image/png" if ext == ".png" else "image/jpeg"
+                b64, media_type = encode_image(img_path, image_opts)
                 content.append({
                     "type": "image_url",
                     "image_url": {
@@ -106,112 +180,226 @@ def build_messages(paper_id, text, image_paths=None):
     return [{"role": "user", "content": content}]
 
 
-def call_llm(messages, api_key, base_url, model, max_retries=3):
-    """Call the OpenAI-compatible API with retry logic."""
-    try:
-        import openai
-    except ImportError:
-        print("ERROR: openai package not installed. Run: pip install openai")
-        sys.exit(1)
-
-    client = openai.OpenAI(api_key=api_key, base_url=base_url)
-
-    for attempt in range(max_retries):
-        try:
-            response = client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=0.1,
-                max_tokens=4096,
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            wait_time = 2 ** (attempt + 1)
-            print(f"    API error (attempt {attempt + 1}/{max_retries}): {e}")
-            if attempt < max_retries - 1:
-                print(f"    Retrying in {wait_time}s...")
-                time.sleep(wait_time)
-            else:
-                raise
-
-
-def parse_json_response(response_text):
-    """Parse JSON from LLM response, handling markdown code blocks."""
-    # Strip markdown code blocks if present
-    text = response_text.strip()
-    if text.startswith("```"):
-        # Remove first line (```json or ```)
-        text = re.sub(r'^```\w*\n?', '', text)
-        text = re.sub(r'\n?```$', '', text)
-
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError as e:
-        print(f"    JSON parse error: {e}")
-        print(f"    Response preview: {text[:200]}")
-        return None
-
-
-def process_paper(paper_id, api_key, base_url, model, delay=1.0):
-    """Process a single paper and return extracted metrics."""
+def read_text(paper_id):
+    """The paper's text.md, or None (reported) if it has none."""
     text_path = os.path.join(DATA_DIR, paper_id, "text.md")
     if not os.path.exists(text_path):
         print(f"  [{paper_id}] SKIP - no text.md")
         return None
-
     with open(text_path, "r", encoding="utf-8") as f:
-        text = f.read()
+        return f.read()
+
 
-    # Check for figure images (fig_6.png and fig_7.png typically have comparison tables)
+def comparison_images(paper_id):
+    """fig_6.png / fig_7.png paths, which typically hold the comparison tables."""
     image_paths = []
     for fig_num in [6, 7]:
         fig_path = os.path.join(IMAGES_DIR, paper_id, f"fig_{fig_num}.png")
         if os.path.exists(fig_path):
             image_paths.append(fig_path)
+    return image_paths
+
+
+def prepare_paper(paper_id, token_budget=DEFAULT_TOKEN_BUDGET, image_opts=None):
+    """Build the request messages for a paper; returns (messages, n_images) or None."""
+    text = read_text(paper_id)
+    if text is None:
+        return None
+    text = build_context(text, token_budget)
+    image_paths = comparison_images(paper_id)
+    return build_messages(paper_id, text, image_paths, image_opts), len(image_paths)
 
-    messages = build_messages(paper_id, text, image_paths)
 
-    print(f"  [{paper_id}] Calling LLM ({len(image_paths)} images)...")
-    response_text = call_llm(messages, api_key, base_url, model)
-    metrics = parse_json_response(response_text)
+def plan_paper(paper_id, token_budget=HYBRID_TOKEN_BUDGET, image_opts=None):
+    """Regex-extract a paper and build the sub-prompts for its gaps.
 
+    Returns (regex metrics, [(group, fields, messages, n_images)]) or None.
+    """
+    text = read_text(paper_id)
+    if text is None:
+        return None
+    regex_metrics = detailed_metrics(text)
+    requests = []
+    for group, fields, with_figures in plan_requests(gap_fields(regex_metrics)):
+        context = build_context(text, token_budget, focus=focus_pattern(fields))
+        image_paths = comparison_images(paper_id) if with_figures else []
+        messages = build_messages(paper_id, context, image_paths, image_opts,
+                                  prompt=targeted_prompt(fields))
+        requests.append((group, fields, messages, len(image_paths)))
+    return regex_metrics, requests
+
+
+def report_metrics(paper_id, result):
+    """Print the outcome of one extraction result and return its metrics."""
+    metrics = result["parsed"]
     if metrics:
         field_count = len([v for v in metrics.values() if v])
-        print(f"  [{paper_id}] OK - {field_count} metric fields extracted")
+        status = "CACHED" if result["cached"] else "OK"
+        print(f"  [{paper_id}] {status} - {field_count} metric fields extracted")
     else:
         print(f"  [{paper_id}] FAIL - could not parse LLM response")
+    return metrics
+
 
-    time.sleep(delay)
+def report_hybrid(paper_id, regex_metrics, answers):
+    """Merge a --hybrid paper's regex metrics and [(fields, result)]; None if any failed.
+
+    {} is a valid answer (the prompt says to omit fields not found): the
+    regex values stay for everything it leaves out. A response that is not
+    a JSON object counts as unparseable.
+    """
+    if any(not isinstance(result["parsed"], dict) for _, result in answers):
+        print(f"  [{paper_id}] FAIL - could not parse LLM response")
+        return None
+    metrics = merge_detailed(regex_metrics, [(fields, result["parsed"]) for fields, result in answers])
+    from_llm = {field for fields, result in answers for field in fields
+                if result["parsed"].get(field)}
+    status = "CACHED" if answers and all(result["cached"] for _, result in answers) else "OK"
+    print(f"  [{paper_id}] {status} - {len(metrics) - len(from_llm)} metric fields from regex, "
+          f"{len(from_llm)} from {len(answers)} LLM prompts")
     return metrics
 
 
+def process_paper_hybrid(paper_id, backend, delay=1.0, token_budget=HYBRID_TOKEN_BUDGET,
+                         image_opts=None):
+    """Regex first, then the LLM for the gaps only; returns the merged metrics."""
+    planned = plan_paper(paper_id, token_budget, image_opts)
+    if planned is None:
+        return None
+    regex_metrics, requests = planned
+
+    answers = []
+    for group, fields, messages, n_images in requests:
+        print(f"  [{paper_id}] Calling LLM for {', '.join(fields)} ({n_images} images)...")
+        result = backend.complete_json(messages, label=f"[{paper_id} {group}]",
+                                       schema=EXTRACTION_SCHEMA, max_chars=MAX_RESPONSE_CHARS)
+        answers.append((fields, result))
+        if not result["cached"]:
+            time.sleep(delay)
+    return report_hybrid(paper_id, regex_metrics, answers)
+
+
+def process_paper(paper_id, backend, delay=1.0, token_budget=DEFAULT_TOKEN_BUDGET,
+                  image_opts=None):
+    """Process a single paper and return extracted metrics."""
+    prepared = prepare_paper(paper_id, token_budget, image_opts)
+    if prepared is None:
+        return None
+    messages, n_images = prepared
+
+    print(f"  [{paper_id}] Calling LLM ({n_images} images)...")
+    result = backend.complete_json(messages, label=f"[{paper_id}]", schema=EXTRACTION_SCHEMA,
+                                   max_chars=MAX_RESPONSE_CHARS)
+    metrics = report_metrics(paper_id, result)
+
+    if not result["cached"]:
+        time.sleep(delay)
+    return metrics
+
+
+def process_papers_batch(paper_ids, backend, token_budget=DEFAULT_TOKEN_BUDGET, image_opts=None,
+                         on_result=None, hybrid=False):
+    """Process papers concurrently; returns {paper_id: metrics or None or Exception}.
+
+    on_result(paper_id, metrics or None or Exception) is called as each
+    paper finishes. With hybrid, all sub-prompts of all papers form one
+    batch and a paper finishes with its last sub-prompt.
+    """
+    results = {}
+
+    def done(pid, value):
+        results[pid] = value
+        if on_result is not None:
+            on_result(pid, value)
+
+    requests = []   # (paper_id, label, fields, messages)
+    partial = {}    # paper_id -> [regex metrics, sub-prompts left, answers, error]
+    for pid in paper_ids:
+        if not hybrid:
+            prepared = prepare_paper(pid, token_budget, image_opts)
+            if prepared is None:
+                done(pid, None)
+            else:
+                requests.append((pid, f"[{pid}]", None, prepared[0]))
+            continue
+        planned = plan_paper(pid, token_budget, image_opts)
+        if planned is None:
+            done(pid, None)
+        elif not planned[1]:
+            done(pid, report_hybrid(pid, planned[0], []))
+        else:
+            partial[pid] = [planned[0], len(planned[1]), [], None]
+            for group, fields, messages, _ in planned[1]:
+                requests.append((pid, f"[{pid} {group}]", fields, messages))
+
+    def batch_done(i, result):
+        pid, _, fields, _ = requests[i]
+        if not hybrid:
+            done(pid, result if isinstance(result, Exception) else report_metrics(pid, result))
+            return
+        state = partial[pid]
+        state[1] -= 1
+        if isinstance(result, Exception):
+            state[3] = result
+        else:
+            state[2].append((fields, result))
+        if state[1] == 0:
+            done(pid, state[3] or report_hybrid(pid, state[0], state[2]))
+
+    backend.complete_json_batch([(label, messages) for _, label, _, messages in requests],
+                                on_result=batch_done, schema=EXTRACTION_SCHEMA,
+                                max_chars=MAX_RESPONSE_CHARS)
+    return results
+
+
+def merge_journal(conn, journal, paper_ids):
+    """Write journaled results missing from the store; returns the number written."""
+    completed = journal.completed()
+    merged = 0
+    for pid in paper_ids:
+        if pid not in completed:
+            continue
+        paper = paper_store.get_paper(conn, pid)
+        if paper is not None and paper.get("metrics_detailed") != completed[pid]:
+            paper_store.update_fields(conn, pid, {"metrics_detailed": completed[pid]})
+            merged += 1
+    return merged
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Extract detailed metrics from ISSCC papers using LLM"
     )
-    parser.add_argument("--api-key", required=True, help="API key for OpenAI-compatible service")
-    parser.add_argument("--base-url", default="https://api.openai.com/v1",
-                        help="Base URL for API (default: OpenAI)")
-    parser.add_argument("--model", default="gpt-4o",
-                        help="Model name (default: gpt-4o)")
+    add_backend_args(parser)
     parser.add_argument("--paper-id", help="Process only this paper ID (e.g., 31.3)")
     parser.add_argument("--dry-run", action="store_true",
-                        help="Print output without writing to papers.json")
+                        help="Print output without writing to the paper store")
     parser.add_argument("--delay", type=float, default=1.0,
                         help="Delay between API calls in seconds (default: 1.0)")
-    parser.add_argument("--max-retries", type=int, default=3,
-                        help="Max retries per API call (default: 3)")
+    parser.add_argument("--token-budget", type=int, default=None,
+                        help="Max tokens of paper text per prompt, 0 = whole text "
+                             f"(default: {DEFAULT_TOKEN_BUDGET}, {HYBRID_TOKEN_BUDGET} with --hybrid)")
+    parser.add_argument("--hybrid", action="store_true",
+                        help="Run the regex extractor first and ask the LLM only for missing "
+                             "or low-confidence fields")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip papers already in the run journal and merge their results")
+    parser.add_argument("--journal", default=journal_path(STAGE),
+                        help=f"Run journal path (default: {journal_path(STAGE)})")
+    add_image_args(parser)
     args = parser.parse_args()
 
-    # Load papers.json
-    with open(PAPERS_JSON, "r", encoding="utf-8") as f:
-        papers = json.load(f)
+    if args.token_budget is None:
+        args.token_budget = HYBRID_TOKEN_BUDGET if args.hybrid else DEFAULT_TOKEN_BUDGET
+    backend = backend_from_args(args, max_tokens=4096)
+    image_opts = image_options(args)
 
-    papers_by_id = {p["id"]: p for p in papers}
+    conn = paper_store.connect()
+    papers_by_id = {p["id"]: p for p in paper_store.get_papers(conn)}
 
     if args.paper_id:
         if args.paper_id not in papers_by_id:
-            print(f"ERROR: Paper ID '{args.paper_id}' not found in papers.json")
+            print(f"ERROR: Paper ID '{args.paper_id}' not found in the paper store")
             sys.exit(1)
         target_ids = [args.paper_id]
     else:
@@ -220,37 +408,67 @@ def main():
             key=lambda x: (int(x.split('.')[0]), int(x.split('.')[1]))
         )
 
-    success = 0
-    failed = 0
-
-    for pid in target_ids:
-        try:
-            metrics = process_paper(pid, args.api_key, args.base_url, args.model, args.delay)
-            if metrics:
-                if args.dry_run:
-                    print(f"  [{pid}] DRY RUN - would write:")
-                    print(json.dumps(metrics, indent=2, ensure_ascii=False)[:500])
-                else:
-                    papers_by_id[pid]["metrics_detailed"] = metrics
-                success += 1
-            else:
-                failed += 1
-        except Exception as e:
-            print(f"  [{pid}] ERROR: {e}")
-            failed += 1
+    journal = RunJournal(args.journal)
+    pending_ids = target_ids
+    if args.resume:
+        runs = journal.runs()
+        if runs and runs[-1].get("model") != backend.model:
+            print(f"WARNING: journal was written with model {runs[-1].get('model')}, "
+                  f"resuming with {backend.model}")
+        journaled = journal.completed()
+        pending_ids = [pid for pid in target_ids if pid not in journaled]
+        print(f"Resuming: {len(target_ids) - len(pending_ids)} papers already journaled, "
+              f"{len(pending_ids)} to go")
+    elif not args.paper_id and not args.dry_run:
+        journal.reset()
+    if not args.dry_run:
+        journal.start_run(stage=STAGE, provider=backend.provider, model=backend.model,
+                          papers=len(pending_ids), hybrid=args.hybrid)
+
+    counts = {"success": 0, "failed": 0}
+
+    def record(pid, metrics):
+        """Journal one paper's outcome, then write it to the store."""
+        if isinstance(metrics, Exception):
+            print(f"  [{pid}] ERROR: {metrics}")
+        if not metrics or isinstance(metrics, Exception):
+            counts["failed"] += 1
+            if not args.dry_run:
+                journal.append(pid, "failed", error=metrics or "no metrics extracted")
+            return
+        counts["success"] += 1
+        if args.dry_run:
+            print(f"  [{pid}] DRY RUN - would write:")
+            print(json.dumps(metrics, indent=2, ensure_ascii=False)[:500])
+            return
+        journal.append(pid, "ok", result=metrics)
+        paper_store.update_fields(conn, pid, {"metrics_detailed": metrics})
+
+    if args.concurrency > 1:
+        process_papers_batch(pending_ids, backend, args.token_budget, image_opts,
+                             on_result=record, hybrid=args.hybrid)
+    else:
+        process = process_paper_hybrid if args.hybrid else process_paper
+        for pid in pending_ids:
+            try:
+                metrics = process(pid, backend, args.delay, args.token_budget, image_opts)
+            except Exception as e:
+                metrics = e
+            record(pid, metrics)
 
     if not args.dry_run:
-        # Rebuild list preserving order
-        updated_papers = [papers_by_id[p["id"]] for p in papers]
-        with open(PAPERS_JSON, "w", encoding="utf-8") as f:
-            json.dump(updated_papers, f, indent=2, ensure_ascii=False)
-        print(f"\nWritten to {PAPERS_JSON}")
+        merged = merge_journal(conn, journal, target_ids)
+        if merged:
+            print(f"  Merged {merged} journaled results into the paper store")
 
     print(f"\n{'='*60}")
     print(f"Summary:")
-    print(f"  Processed: {success + failed}")
-    print(f"  Success: {success}")
-    print(f"  Failed: {failed}")
+    print(f"  Processed: {counts['success'] + counts['failed']}")
+    print(f"  Success: {counts['success']}")
+    print(f"  Failed: {counts['failed']}")
+    print(f"  Journal: {args.journal}")
+    backend.report()
+    backend.evict_cache()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""Downscale and re-encode figure images before multimodal LLM calls.
+
+The comparison figures (fig_6.png / fig_7.png) can be 300-DPI vector renders
+several megabytes in size. prepare_image() crops surrounding whitespace,
+resizes to a maximum edge length and re-encodes to JPEG or WebP. A long
+edge of 1568 px keeps table text legible while cutting the base64 payload
+by an order of magnitude.
+
+Results are cached by source hash + options:
+  data/.image_cache/{key[:2]}/{key}.{jpg,webp,png}
+
+Requires Pillow; without it images are sent unchanged.
+"""
+
+import io
+import os
+
+from atomic_io import atomic_write_bytes
+from build_cache import file_digest, input_digest
+
+BASE = "/home/sdu/obsidian/isscc_accelerator"
+CACHE_DIR = os.path.join(BASE, "data", ".image_cache")
+
+FORMATS = ("jpeg", "webp", "png", "original")
+MEDIA_TYPES = {"jpeg": "image/jpeg", "webp": "image/webp", "png": "image/png"}
+EXTENSIONS = {"jpeg": ".jpg", "webp": ".webp", "png": ".png"}
+
+DEFAULT_MAX_EDGE = 1568
+DEFAULT_FORMAT = "jpeg"
+DEFAULT_QUALITY = 85
+
+# Pixels darker than this (0-255) count as content when cropping
+CROP_THRESHOLD = 245
+CROP_MARGIN = 12
+
+_warned = False
+
+
+def _import_pil():
+    global _warned
+    try:
+        from PIL import Image
+    except ImportError:
+        if not _warned:
+            print("WARNING: Pillow not installed, sending images unchanged. Run: pip install Pillow")
+            _warned = True
+        return None
+    return Image
+
+
+def media_type_for(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".jpg", ".jpeg"):
+        return "image/jpeg"
+    if ext == ".webp":
+        return "image/webp"
+    return "image/png"
+
+
+def crop_whitespace(img):
+    """Trim near-white borders, keeping a small margin."""
+    gray = img.convert("L")
+    mask = gray.point(lambda v: 255 if v < CROP_THRESHOLD else 0)
+    bbox = mask.getbbox()
+    if bbox is None:
+        return img
+    x0, y0, x1, y1 = bbox
+    x0 = max(0, x0 - CROP_MARGIN)
+    y0 = max(0, y0 - CROP_MARGIN)
+    x1 = min(img.width, x1 + CROP_MARGIN)
+    y1 = min(img.height, y1 + CROP_MARGIN)
+    return img.crop((x0, y0, x1, y1))
+
+
+def _flatten(img):
+    """RGB on white (JPEG has no alpha; transparent areas would turn black)."""
+    Image = _import_pil()
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1])
+        return background
+    return img.convert("RGB")
+
+
+def transform_image(src_path, out_path, max_edge=DEFAULT_MAX_EDGE, fmt=DEFAULT_FORMAT,
+                    quality=DEFAULT_QUALITY, crop=True):
+    """Crop, resize and re-encode src_path into out_path."""
+    Image = _import_pil()
+    with Image.open(src_path) as img:
+        img = _flatten(img)
+        if crop:
+            img = crop_whitespace(img)
+        if max_edge and max(img.size) > max_edge:
+            img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+        buf = io.BytesIO()
+        if fmt == "png":
+            img.save(buf, "PNG", optimize=True)
+        elif fmt == "webp":
+            img.save(buf, "WEBP", quality=quality, method=4)
+        else:
+            img.save(buf, "JPEG", quality=quality, optimize=True)
+    # Concurrent runs preparing the same image each write their own temp file
+    atomic_write_bytes(out_path, buf.getvalue())
+
+
+def prepare_image(src_path, max_edge=DEFAULT_MAX_EDGE, fmt=DEFAULT_FORMAT,
+                  quality=DEFAULT_QUALITY, crop=True, cache_dir=CACHE_DIR):
+    """Return (image bytes, media type) ready for upload, using the cache."""
+    if fmt == "original" or _import_pil() is None:
+        with open(src_path, "rb") as f:
+            return f.read(), media_type_for(src_path)
+
+    key = input_digest(file_digest(src_path), max_edge, fmt, quality, crop)
+    out_path = os.path.join(cache_dir, key[:2], key + EXTENSIONS[fmt])
+    if not os.path.exists(out_path):
+        transform_image(src_path, out_path, max_edge, fmt, quality, crop)
+    with open(out_path, "rb") as f:
+        return f.read(), MEDIA_TYPES[fmt]
+
+
+def add_image_args(parser):
+    """Register the image preprocessing flags on an argparse parser."""
+    parser.add_argument("--image-max-edge", type=int, default=DEFAULT_MAX_EDGE,
+                        help=f"Resize figures to this long edge in px, 0 = keep size "
+                             f"(default: {DEFAULT_MAX_EDGE})")
+    parser.add_argument("--image-format", choices=FORMATS, default=DEFAULT_FORMAT,
+                        help=f"Re-encode figures as (default: {DEFAULT_FORMAT}); "
+                             "'original' sends the files unchanged")
+    parser.add_argument("--image-quality", type=int, default=DEFAULT_QUALITY,
+                        help=f"JPEG/WebP quality (default: {DEFAULT_QUALITY})")
+    parser.add_argument("--no-image-crop", action="store_true",
+                        help="Do not crop whitespace around figures")
+
+
+def image_options(args):
+    """prepare_image() keyword arguments from add_image_args() flags."""
+    return {
+        "max_edge": args.image_max_edge,
+        "fmt": args.image_format,
+        "quality": args.image_quality,
+        "crop": not args.no_image_crop,
+    }
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""Incremental JSON validation for streamed LLM responses.
+
+JSONStreamValidator is fed the response text delta by delta while it
+streams in. It raises JSONStreamError as soon as the output can no longer
+become the expected JSON, so the call can be cancelled instead of waiting
+for max_tokens of bad output:
+
+  - prose or anything but the expected root before the JSON starts
+    (a leading ```json fence line is allowed)
+  - a syntax error (bad token, unterminated literal, control character)
+  - a top-level key repeated, the usual sign of a generation loop
+  - more than max_chars of output without the root value closing
+
+feed() returns True once the root value is complete; the rest of the
+stream (a closing fence, trailing remarks) can be dropped.
+
+An optional schema {key: {"string", "object", ...}} checks the kind of
+each top-level value as it starts. Mismatches are only collected in
+.mismatches: stored extractions regularly use a string where the prompt
+asks for an object (e.g. "comparison"), and those are still usable.
+"""
+
+import re
+
+NUMBER = re.compile(r'-?(0|[1-9]\d*)(\.\d+)?([eE][+-]?\d+)?$')
+LITERALS = {"t": "true", "f": "false", "n": "null"}
+OPENING_KINDS = {"{": "object", "[": "array", '"': "string", "t": "boolean", "f": "boolean",
+                 "n": "null"}
+WHITESPACE = " \t\r\n"
+
+
+class JSONStreamError(ValueError):
+    """Streamed output can no longer become the expected JSON."""
+
+    def __init__(self, reason, text=""):
+        super().__init__(reason)
+        self.reason = reason
+        self.text = text
+
+
+def value_kind(value):
+    """JSON kind name of a parsed value ("object", "array", "string", ...)."""
+    if isinstance(value, dict):
+        return "object"
+    if isinstance(value, list):
+        return "array"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, bool):
+        return "boolean"
+    if value is None:
+        return "null"
+    return "number"
+
+
+def schema_from_example(example):
+    """{key: {kind}} for the top-level keys of an example object."""
+    return {key: {value_kind(value)} for key, value in example.items()}
+
+
+class JSONStreamValidator:
+    """Character-level JSON checker for one streamed response."""
+
+    def __init__(self, root="object", schema=None, max_chars=None):
+        self.root = root
+        self.schema = schema or {}
+        self.max_chars = max_chars
+        self.text = []
+        self.length = 0
+        self.done = False
+        self.mismatches = []   # (key, kind) of top-level values outside the schema
+        self.keys = []         # top-level keys in order of appearance
+        self._started = False
+        self._fence = False
+        self._stack = []       # [kind, state] per open object/array
+        self._scalar = None    # "string" | "key" | "number" | "literal"
+        self._buf = ""
+        self._escape = 0       # 1 after a backslash, 2..5 inside \\uXXXX
+
+    def _fail(self, reason):
+        raise JSONStreamError(reason, self.value())
+
+    def value(self):
+        """Text received so far (up to the end of the root value once done)."""
+        return "".join(self.text)
+
+    def feed(self, delta):
+        """Check the next chunk; True once the root value is complete."""
+        if self.done:
+            return True
+        self.text.append(delta)
+        for i, ch in enumerate(delta):
+            self._step(ch)
+            if self.done:
+                # Keep the JSON only, not what follows it
+                self.text[-1] = delta[:i + 1]
+                return True
+        self.length += len(delta)
+        if self.max_chars and self.length > self.max_chars:
+            self._fail(f"no complete JSON after {self.max_chars} characters")
+        return False
+
+    # --- state machine ------------------------------------------------------------
+
+    def _step(self, ch):
+        if self._scalar is not None:
+            if self._scalar in ("string", "key"):
+                self._string_char(ch)
+                return
+            if self._scalar == "number":
+                if ch in "0123456789+-.eE":
+                    self._buf += ch
+                    return
+                if not NUMBER.match(self._buf):
+                    self._fail(f"invalid number {self._buf!r}")
+                self._scalar = None
+                self._value_done()
+                if self.done:
+                    return
+                # The terminating character belongs to the container
+            else:
+                self._buf += ch
+                word = LITERALS[self._buf[0]]
+                if not word.startswith(self._buf):
+                    self._fail(f"invalid literal {self._buf!r}")
+                if self._buf == word:
+                    self._scalar = None
+                    self._value_done()
+                return
+
+        if not self._started:
+            self._before_root(ch)
+            return
+
+        kind, state = self._stack[-1]
+        if ch in WHITESPACE:
+            return
+        if kind == "object":
+            if state in ("key_or_end", "key"):
+                if ch == '"':
+                    self._scalar, self._buf = "key", ""
+                elif ch == "}" and state == "key_or_end":
+                    self._close()
+                else:
+                    self._fail(f"expected a key, got {ch!r}")
+            elif state == "colon":
+                if ch != ":":
+                    self._fail(f"expected ':', got {ch!r}")
+                self._stack[-1][1] = "value"
+            elif state == "value":
+                self._start_value(ch)
+            elif ch == ",":
+                self._stack[-1][1] = "key"
+            elif ch == "}":
+                self._close()
+            else:
+                self._fail(f"expected ',' or '}}', got {ch!r}")
+        else:
+            if state == "comma_or_end":
+                if ch == ",":
+                    self._stack[-1][1] = "value"
+                elif ch == "]":
+                    self._close()
+                else:
+                    self._fail(f"expected ',' or ']', got {ch!r}")
+            elif ch == "]" and state == "value_or_end":
+                self._close()
+            else:
+                self._start_value(ch)
+
+    def _before_root(self, ch):
+        if self._fence:
+            if ch == "\n":
+                self._fence = False
+            return
+        if ch in WHITESPACE:
+            return
+        if ch == "`":
+            self._fence = True
+            return
+        kind = OPENING_KINDS.get(ch)
+        if kind != self.root and not (self.root == "any" and (kind or ch in "-0123456789")):
+            self._fail(f"response does not start with a JSON {self.root} ({ch!r})")
+        self._started = True
+        self._start_value(ch)
+
+    def _start_value(self, ch):
+        if len(self._stack) == 1 and self._stack[0][0] == "object":
+            key = self.keys[-1]
+            kind = OPENING_KINDS.get(ch, "number")
+            if key in self.schema and kind not in self.schema[key]:
+                self.mismatches.append((key, kind))
+        if ch == "{":
+            self._stack.append(["object", "key_or_end"])
+        elif ch == "[":
+            self._stack.append(["array", "value_or_end"])
+        elif ch == '"':
+            self._scalar, self._buf = "string", ""
+        elif ch == "-" or ch.isdigit():
+            self._scalar, self._buf = "number", ch
+        elif ch in LITERALS:
+            self._scalar, self._buf = "literal", ch
+        else:
+            self._fail(f"expected a value, got {ch!r}")
+
+    def _string_char(self, ch):
+        if self._escape == 1:
+            if ch == "u":
+                self._escape = 2
+            elif ch in '"\\/bfnrt':
+                self._escape = 0
+            else:
+                self._fail(f"invalid escape \\{ch}")
+            self._buf += ch
+        elif self._escape > 1:
+            if ch not in "0123456789abcdefABCDEF":
+                self._fail("invalid \\u escape")
+            self._escape = 0 if self._escape == 5 else self._escape + 1
+            self._buf += ch
+        elif ch == "\\":
+            self._escape = 1
+            self._buf += ch
+        elif ch == '"':
+            scalar, self._scalar = self._scalar, None
+            if scalar == "key":
+                self._key_done(self._buf)
+            else:
+                self._value_done()
+        elif ord(ch) < 0x20:
+            self._fail("unescaped control character in string")
+        elif self._scalar == "key" and len(self._stack) == 1:
+            self._buf += ch
+
+    def _key_done(self, key):
+        if len(self._stack) == 1:
+            if key in self.keys:
+                self._fail(f"top-level key {key!r} repeated")
+            self.keys.append(key)
+        self._stack[-1][1] = "colon"
+
+    def _close(self):
+        self._stack.pop()
+        self._value_done()
+
+    def _value_done(self):
+        if not self._stack:
+            self.done = True
+        else:
+            self._stack[-1][1] = "comma_or_end"
@@ -0,0 +1,515 @@
+#!/usr/bin/env python3
+"""Shared LLM backend for the metrics, bilingual and translation scripts.
+
+One place for everything the scripts used to duplicate:
+  - pooled clients per endpoint (OpenAI-compatible via llm_client.get_client,
+    Anthropic created lazily on first use - never at import time)
+  - retry with exponential backoff
+  - the on-disk response cache (llm_cache.py)
+  - optional streaming responses; JSON calls are validated while they
+    stream and cancelled as soon as the output cannot become valid JSON
+    (json_stream.py), in the serial and the concurrent batch path alike
+  - fence-stripping JSON parsing, with a repair prompt when a JSON response
+    is invalid (--repair-attempts)
+  - per-call latency / token metrics, summarized with report()
+  - offline replay: with offline=True every request must be answered from
+    the cache, a miss raises OfflineMiss (bench_metrics.py)
+
+Every call returns a result dict:
+  {"label", "text", "parsed", "cached", "latency_s",
+   "prompt_tokens", "completion_tokens"}
+
+Scripts build a backend from their CLI flags:
+
+    parser = argparse.ArgumentParser(...)
+    add_backend_args(parser)
+    args = parser.parse_args()
+    backend = backend_from_args(args)
+    result = backend.complete_json(messages, label=f"[{pid}]")
+"""
+
+import os
+import re
+import json
+import time
+
+from json_stream import JSONStreamError, JSONStreamValidator
+from llm_cache import CACHE_DIR, ResponseCache, request_key
+from llm_client import AsyncLLMClient, get_client
+
+PROVIDERS = ("openai", "anthropic")
+DEFAULT_MODELS = {"openai": "gpt-4o", "anthropic": "claude-sonnet-4-20250514"}
+
+REPAIR_PROMPT = """Your previous response could not be used: {reason}.
+Reply again with ONLY the complete JSON requested above - no markdown fences, no explanations."""
+
+_anthropic_clients = {}
+
+
+class OfflineMiss(LookupError):
+    """No cached response for a request and the backend is offline."""
+
+
+def get_anthropic_client(api_key, base_url):
+    """Shared Anthropic client (one connection pool per endpoint)."""
+    key = (api_key, base_url)
+    if key not in _anthropic_clients:
+        try:
+            import anthropic
+        except ImportError:
+            raise SystemExit("ERROR: anthropic package not installed. Run: pip install anthropic")
+        _anthropic_clients[key] = anthropic.Anthropic(base_url=base_url, api_key=api_key)
+    return _anthropic_clients[key]
+
+
+def strip_code_fences(text):
+    """Remove a surrounding ```json ... ``` block if present."""
+    text = text.strip()
+    if text.startswith("```"):
+        # Remove first line (```json or ```)
+        text = re.sub(r'^```\w*\n?', '', text)
+        text = re.sub(r'\n?```\s*$', '', text)
+    return text.strip()
+
+
+def _decode_json(response_text):
+    """The JSON value a response starts with (after a code fence); trailing
+    remarks after it are ignored."""
+    text = strip_code_fences(response_text or "")
+    value, _ = json.JSONDecoder().raw_decode(text)
+    return value
+
+
+def parse_json_response(response_text):
+    """Parse JSON from LLM response, handling markdown code blocks."""
+    text = strip_code_fences(response_text or "")
+    try:
+        return _decode_json(text)
+    except json.JSONDecodeError as e:
+        print(f"    JSON parse error: {e}")
+        print(f"    Response preview: {text[:200]}")
+        return None
+
+
+def json_error(response_text):
+    """Why a response is not parseable JSON, or None if it is."""
+    try:
+        _decode_json(response_text)
+    except json.JSONDecodeError as e:
+        return f"invalid JSON ({e})"
+    return None
+
+
+def repair_messages(messages, response_text, reason):
+    """The original request plus the bad answer and a request to fix it."""
+    return list(messages) + [
+        {"role": "assistant", "content": response_text or "(empty response)"},
+        {"role": "user", "content": REPAIR_PROMPT.format(reason=reason)},
+    ]
+
+
+def json_validators(schema=None, max_chars=None):
+    """(validators, make_on_delta): make_on_delta() starts a JSONStreamValidator
+    for one streamed attempt and returns its feed; validators lists them all."""
+    validators = []
+
+    def make_on_delta():
+        validator = JSONStreamValidator(schema=schema, max_chars=max_chars)
+        validators.append(validator)
+        return validator.feed
+
+    return validators, make_on_delta
+
+
+def report_mismatches(label, validators):
+    if validators and validators[-1].mismatches:
+        print(f"    {label} schema: unexpected value kinds "
+              f"{', '.join(f'{k}={kind}' for k, kind in validators[-1].mismatches)}")
+
+
+def _to_anthropic(messages):
+    """Convert OpenAI-style messages to Anthropic content blocks."""
+    converted = []
+    for msg in messages:
+        content = msg["content"]
+        if isinstance(content, str):
+            converted.append({"role": msg["role"], "content": content})
+            continue
+        blocks = []
+        for part in content:
+            if part.get("type") == "text":
+                blocks.append({"type": "text", "text": part["text"]})
+            elif part.get("type") == "image_url":
+                url = part["image_url"]["url"]
+                m = re.match(r'data:([^;]+);base64,(.*)', url, re.DOTALL)
+                if m:
+                    blocks.append({"type": "image", "source": {
+                        "type": "base64", "media_type": m.group(1), "data": m.group(2)}})
+        converted.append({"role": msg["role"], "content": blocks})
+    return converted
+
+
+class LLMBackend:
+    """Provider-agnostic chat completion with caching, retries and metrics."""
+
+    def __init__(self, provider="openai", api_key=None, base_url=None, model=None,
+                 max_retries=3, temperature=0.1, max_tokens=4096, cache=None,
+                 refresh=False, stream=False, concurrency=1, rpm=None, tpm=None,
+                 repair_attempts=1, offline=False):
+        if provider not in PROVIDERS:
+            raise ValueError(f"Unknown provider '{provider}' (expected one of {PROVIDERS})")
+        self.provider = provider
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model or DEFAULT_MODELS[provider]
+        self.max_retries = max_retries
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.cache = cache
+        self.refresh = refresh
+        self.stream = stream
+        self.concurrency = concurrency
+        self.rpm = rpm
+        self.tpm = tpm
+        self.repair_attempts = repair_attempts
+        self.offline = offline
+        self.calls = []
+
+    # --- low-level provider calls -------------------------------------------------
+
+    def _call_openai(self, messages, max_tokens, on_delta=None):
+        client = get_client(self.api_key, self.base_url)
+        kwargs = dict(model=self.model, messages=messages,
+                      temperature=self.temperature, max_tokens=max_tokens)
+        if not self.stream:
+            response = client.chat.completions.create(**kwargs)
+            usage = response.usage
+            return (response.choices[0].message.content,
+                    getattr(usage, "prompt_tokens", None),
+                    getattr(usage, "completion_tokens", None))
+
+        parts = []
+        prompt_tokens = completion_tokens = None
+        stream = client.chat.completions.create(
+            stream=True, stream_options={"include_usage": True}, **kwargs)
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    delta = chunk.choices[0].delta.content
+                    parts.append(delta)
+                    # on_delta returns True once the answer is complete
+                    if on_delta is not None and on_delta(delta):
+                        break
+                if getattr(chunk, "usage", None):
+                    prompt_tokens = chunk.usage.prompt_tokens
+                    completion_tokens = chunk.usage.completion_tokens
+        finally:
+            # Closing the stream cancels the generation on the server
+            stream.close()
+        return "".join(parts), prompt_tokens, completion_tokens
+
+    def _call_anthropic(self, messages, max_tokens, on_delta=None):
+        client = get_anthropic_client(self.api_key, self.base_url)
+        kwargs = dict(model=self.model, max_tokens=max_tokens,
+                      temperature=self.temperature, messages=_to_anthropic(messages))
+        if not self.stream:
+            response = client.messages.create(**kwargs)
+            text = "".join(block.text for block in response.content
+                           if getattr(block, "type", "") == "text")
+            return text, response.usage.input_tokens, response.usage.output_tokens
+
+        parts = []
+        with client.messages.stream(**kwargs) as stream:
+            for delta in stream.text_stream:
+                parts.append(delta)
+                if on_delta is not None and on_delta(delta):
+                    # Leaving the block closes the stream; usage is not final yet
+                    return "".join(parts), None, None
+            response = stream.get_final_message()
+        return "".join(parts), response.usage.input_tokens, response.usage.output_tokens
+
+    def _call_with_retries(self, messages, max_tokens, label, make_on_delta=None):
+        """Provider call with backoff. make_on_delta() builds a fresh delta
+        hook per attempt; a JSONStreamError it raises is not retried here."""
+        call = self._call_openai if self.provider == "openai" else self._call_anthropic
+        for attempt in range(self.max_retries):
+            on_delta = make_on_delta() if make_on_delta and self.stream else None
+            try:
+                return call(messages, max_tokens, on_delta)
+            except JSONStreamError:
+                raise
+            except Exception as e:
+                wait_time = 2 ** (attempt + 1)
+                print(f"    {label} API error (attempt {attempt + 1}/{self.max_retries}): {e}")
+                if attempt < self.max_retries - 1:
+                    print(f"    Retrying in {wait_time}s...")
+                    time.sleep(wait_time)
+                else:
+                    raise
+
+    # --- public API ---------------------------------------------------------------
+
+    def cache_key(self, messages, max_tokens=None):
+        return request_key(self.model, messages, provider=self.provider,
+                           temperature=self.temperature,
+                           max_tokens=max_tokens or self.max_tokens)
+
+    def _cached(self, key, label, parse):
+        if self.cache is None or self.refresh:
+            return None
+        entry = self.cache.get(key)
+        if entry is None or (parse and entry["parsed"] is None):
+            return None
+        result = {"label": label, "text": entry["response"], "parsed": entry["parsed"],
+                  "cached": True, "latency_s": 0.0,
+                  "prompt_tokens": 0, "completion_tokens": 0}
+        self.calls.append(result)
+        return result
+
+    def _finish(self, key, label, text, latency, prompt_tokens, completion_tokens, parse):
+        parsed = parse_json_response(text) if parse else None
+        result = {"label": label, "text": text, "parsed": parsed, "cached": False,
+                  "latency_s": round(latency, 3),
+                  "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+        self.calls.append(result)
+        # Only successful responses are worth replaying
+        if self.cache is not None and (parsed is not None or not parse):
+            self.cache.put(key, self.model, text, parsed)
+        return result
+
+    def _call_json(self, messages, max_tokens, label, schema=None, max_chars=None):
+        """Provider call for a JSON answer, with up to repair_attempts repair rounds.
+
+        Streaming calls are checked by a JSONStreamValidator and cancelled
+        early, also once they pass max_chars without the JSON closing.
+        Returns (text, prompt_tokens, completion_tokens): the text of the last
+        attempt, the token counts summed over all attempts.
+        """
+        validators, make_on_delta = json_validators(schema, max_chars)
+        totals = [0, 0]
+        request = messages
+        for attempt in range(self.repair_attempts + 1):
+            try:
+                text, prompt_tokens, completion_tokens = self._call_with_retries(
+                    request, max_tokens, label, make_on_delta)
+                totals[0] += prompt_tokens or 0
+                totals[1] += completion_tokens or 0
+                if validators and validators[-1].done:
+                    text = validators[-1].value()
+                error = json_error(text)
+            except JSONStreamError as e:
+                text, error = e.text, e.reason
+                print(f"    {label} stream cancelled after {len(text)} chars: {error}")
+            if error is None:
+                break
+            if attempt < self.repair_attempts:
+                print(f"    {label} requesting a repaired response ({error})")
+                request = repair_messages(messages, text, error)
+        report_mismatches(label, validators)
+        return text, totals[0] or None, totals[1] or None
+
+    def complete(self, messages, max_tokens=None, label="", parse=False, schema=None,
+                 max_chars=None):
+        """One chat completion (cache -> provider with retries).
+
+        With parse=True the answer must be JSON: it is validated while
+        streaming and repaired when invalid (see _call_json). schema is the
+        optional {key: kinds} of a JSON object answer (json_stream.py) and
+        max_chars the length after which a streamed answer counts as runaway.
+        """
+        max_tokens = max_tokens or self.max_tokens
+        key = self.cache_key(messages, max_tokens)
+        cached = self._cached(key, label, parse)
+        if cached is not None:
+            return cached
+        if self.offline:
+            raise OfflineMiss(f"{label} no recorded response".strip())
+
+        started = time.monotonic()
+        if parse:
+            text, prompt_tokens, completion_tokens = self._call_json(
+                messages, max_tokens, label, schema, max_chars)
+        else:
+            text, prompt_tokens, completion_tokens = self._call_with_retries(
+                messages, max_tokens, label)
+        return self._finish(key, label, text, time.monotonic() - started,
+                            prompt_tokens, completion_tokens, parse)
+
+    def complete_json(self, messages, max_tokens=None, label="", schema=None, max_chars=None):
+        """complete() and parse the response as JSON into result["parsed"]."""
+        return self.complete(messages, max_tokens, label, parse=True, schema=schema,
+                             max_chars=max_chars)
+
+    def complete_json_batch(self, requests, max_tokens=None, on_result=None, schema=None,
+                            max_chars=None):
+        """Run [(label, messages), ...] concurrently; returns results (or Exceptions) in order.
+
+        Cache hits are answered immediately; the misses go through one
+        AsyncLLMClient batch, identical requests (same cache key) sent once and
+        the answer given to each of them. Anthropic falls back to serial calls.
+        on_result(index, result_or_exception) is called as each request
+        finishes (responses are cached at that point too), so callers can
+        persist progress before the whole batch is done. Answers are
+        validated (while streaming with --stream) and repaired inside each
+        concurrent request, as in complete_json().
+        """
+        max_tokens = max_tokens or self.max_tokens
+        results = [None] * len(requests)
+
+        def done(i, result):
+            results[i] = result
+            if on_result is not None:
+                on_result(i, result)
+
+        pending = []
+        duplicates = {}  # cache key -> [(index, label)] of later identical requests
+        for i, (label, messages) in enumerate(requests):
+            key = self.cache_key(messages, max_tokens)
+            cached = self._cached(key, label, True)
+            if cached is not None:
+                done(i, cached)
+            elif key in duplicates:
+                duplicates[key].append((i, label))
+            else:
+                duplicates[key] = []
+                pending.append((i, label, messages, key))
+
+        def finish(i, key, result):
+            done(i, result)
+            for j, label in duplicates[key]:
+                done(j, result if isinstance(result, Exception) else dict(result, label=label))
+
+        if not pending:
+            return results
+
+        if self.offline or self.provider != "openai" or self.concurrency <= 1:
+            for i, label, messages, key in pending:
+                try:
+                    result = self.complete_json(messages, max_tokens, label, schema, max_chars)
+                except Exception as e:
+                    result = e
+                finish(i, key, result)
+            return results
+
+        client = AsyncLLMClient(self.api_key, self.base_url, self.model,
+                                concurrency=self.concurrency, rpm=self.rpm, tpm=self.tpm,
+                                max_retries=self.max_retries, temperature=self.temperature,
+                                max_tokens=max_tokens)
+
+        def make_job(i, label, messages, key):
+            async def job(c):
+                # Same validate/cancel/repair rounds as _call_json, on the async client
+                started = time.monotonic()
+                validators, make_on_delta = json_validators(schema, max_chars)
+                totals = [0, 0]
+                request = messages
+                try:
+                    for attempt in range(self.repair_attempts + 1):
+                        try:
+                            text, usage = await c.complete(
+                                request, label=label,
+                                make_on_delta=make_on_delta if self.stream else None)
+                            totals[0] += getattr(usage, "prompt_tokens", None) or 0
+                            totals[1] += getattr(usage, "completion_tokens", None) or 0
+                            if validators and validators[-1].done:
+                                text = validators[-1].value()
+                            error = json_error(text)
+                        except JSONStreamError as e:
+                            text, error = e.text, e.reason
+                            print(f"    {label} stream cancelled after {len(text)} chars: {error}")
+                        if error is None:
+                            break
+                        if attempt < self.repair_attempts:
+                            print(f"    {label} requesting a repaired response ({error})")
+                            request = repair_messages(messages, text, error)
+                except Exception as e:
+                    finish(i, key, e)
+                    raise
+                report_mismatches(label, validators)
+                finish(i, key, self._finish(key, label, text, time.monotonic() - started,
+                                     totals[0] or None, totals[1] or None, parse=True))
+            return job
+
+        print(f"  Sending {len(pending)} requests (concurrency {self.concurrency})...")
+        started = time.monotonic()
+        client.run([make_job(*request) for request in pending])
+        print(f"  Batch finished in {time.monotonic() - started:.1f}s "
+              f"({client.rate_limited} rate-limit responses)")
+        return results
+
+    def report(self):
+        """Print per-run call metrics."""
+        live = [c for c in self.calls if not c["cached"]]
+        cached = len(self.calls) - len(live)
+        print(f"  LLM calls: {len(live)} live, {cached} cached ({self.provider}/{self.model})")
+        if live:
+            latencies = sorted(c["latency_s"] for c in live)
+            prompt = sum(c["prompt_tokens"] or 0 for c in live)
+            completion = sum(c["completion_tokens"] or 0 for c in live)
+            print(f"  Latency: mean {sum(latencies) / len(latencies):.2f}s, "
+                  f"max {latencies[-1]:.2f}s")
+            print(f"  Tokens: {prompt} prompt, {completion} completion")
+        if self.cache is not None:
+            print(f"  Cache: {self.cache.hits} hits, {self.cache.misses} misses")
+
+    def evict_cache(self):
+        """Apply the cache's age/size limits; call once at the end of a run."""
+        if self.cache is not None:
+            evicted = self.cache.evict()
+            print(f"  Cache: {evicted} entries evicted")
+
+
+def add_backend_args(parser, provider="openai", api_key_required=True):
+    """Register the shared LLM flags on an argparse parser."""
+    parser.add_argument("--provider", choices=PROVIDERS, default=provider,
+                        help=f"LLM provider (default: {provider})")
+    parser.add_argument("--api-key", required=api_key_required,
+                        help="API key for the LLM service")
+    parser.add_argument("--base-url", default=None,
+                        help="Base URL for API (default: provider default)")
+    parser.add_argument("--model", default=None,
+                        help=f"Model name (default: {DEFAULT_MODELS[provider]})")
+    parser.add_argument("--max-retries", type=int, default=3,
+                        help="Max retries per API call (default: 3)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream responses; JSON answers are validated as they arrive "
+                             "and cancelled early when invalid")
+    parser.add_argument("--repair-attempts", type=int, default=1,
+                        help="Re-ask with a repair prompt this many times when a JSON "
+                             "answer is invalid (default: 1)")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Concurrent requests; >1 enables the asyncio batch mode (default: 1)")
+    parser.add_argument("--rpm", type=float, default=None,
+                        help="Batch mode: max requests per minute")
+    parser.add_argument("--tpm", type=float, default=None,
+                        help="Batch mode: max (estimated) tokens per minute")
+    parser.add_argument("--cache-dir", default=CACHE_DIR,
+                        help=f"Response cache directory (default: {CACHE_DIR})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Disable the response cache entirely")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Ignore cached responses (fresh responses are still cached)")
+    parser.add_argument("--cache-max-age-days", type=float, default=None,
+                        help="Evict cached responses older than this many days")
+    parser.add_argument("--cache-max-mb", type=float, default=None,
+                        help="Evict least recently used responses above this cache size")
+
+
+def backend_from_args(args, max_tokens=4096):
+    """Build an LLMBackend from add_backend_args() flags."""
+    cache = None
+    if not args.no_cache:
+        max_bytes = int(args.cache_max_mb * 1024 * 1024) if args.cache_max_mb else None
+        cache = ResponseCache(args.cache_dir, args.cache_max_age_days, max_bytes)
+
+    base_url = args.base_url
+    if base_url is None and args.provider == "openai":
+        base_url = "https://api.openai.com/v1"
+    if base_url is None and args.provider == "anthropic":
+        base_url = os.environ.get("ANTHROPIC_BASE_URL")
+
+    return LLMBackend(provider=args.provider, api_key=args.api_key, base_url=base_url,
+                      model=args.model, max_retries=args.max_retries,
+                      max_tokens=max_tokens, cache=cache, refresh=args.refresh,
+                      stream=args.stream, concurrency=args.concurrency,
+                      rpm=args.rpm, tpm=args.tpm, repair_attempts=args.repair_attempts)
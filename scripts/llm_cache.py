@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""On-disk cache for LLM responses.
+
+Entries are keyed by a sha256 over the model, request parameters and the
+full message list - prompt, paper text and base64 image bytes included - so
+any change to what is sent produces a new key, and re-running the pipeline
+over unchanged papers costs no API calls.
+
+Layout: data/.llm_cache/{key[:2]}/{key}.json
+  {"key", "model", "created", "response", "parsed"}
+
+Eviction is by age (entries older than max_age_days) and by total size
+(least recently used first, once the cache exceeds max_bytes).
+"""
+
+import hashlib
+import json
+import os
+import time
+
+from atomic_io import write_json
+
+BASE = "/home/sdu/obsidian/isscc_accelerator"
+CACHE_DIR = os.path.join(BASE, "data", ".llm_cache")
+
+
+def request_key(model, messages, **params):
+    """Stable cache key for one chat request."""
+    payload = {"model": model, "messages": messages, "params": params}
+    data = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+class ResponseCache:
+    """Persistent raw-response + parsed-JSON cache with age/size eviction."""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_age_days=None, max_bytes=None):
+        self.cache_dir = cache_dir
+        self.max_age = max_age_days * 86400 if max_age_days else None
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key):
+        """Return the cached entry dict, or None on miss / expiry."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        if self.max_age and time.time() - entry.get("created", 0) > self.max_age:
+            os.remove(path)
+            self.misses += 1
+            return None
+
+        # Touch for LRU ordering during size eviction
+        os.utime(path)
+        self.hits += 1
+        return entry
+
+    def put(self, key, model, response, parsed):
+        """Store a raw response and its parsed JSON."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {
+            "key": key,
+            "model": model,
+            "created": time.time(),
+            "response": response,
+            "parsed": parsed,
+        }
+        # Parallel stages may store the same key; each uses its own temp file
+        write_json(path, entry)
+        return entry
+
+    def _entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    st = os.stat(path)
+                    yield path, st.st_size, st.st_mtime
+
+    def evict(self):
+        """Apply age and size limits. Returns the number of entries removed."""
+        removed = 0
+        now = time.time()
+        entries = []
+        for path, size, mtime in self._entries():
+            if self.max_age:
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        created = json.load(f).get("created", 0)
+                except (OSError, ValueError):
+                    created = 0
+                if now - created > self.max_age:
+                    os.remove(path)
+                    removed += 1
+                    continue
+            entries.append((mtime, size, path))
+
+        if self.max_bytes:
+            total = sum(size for _, size, _ in entries)
+            for mtime, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                os.remove(path)
+                total -= size
+                removed += 1
+        return removed
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""Pooled OpenAI-compatible clients and a rate-limited asyncio batch runner.
+
+get_client() returns one cached synchronous client per (api_key, base_url),
+so the serial scripts stop building a new client for every call.
+
+AsyncLLMClient runs many chat requests concurrently on a single pooled
+openai.AsyncOpenAI client:
+  - a semaphore bounds the number of in-flight requests (--concurrency)
+  - token buckets enforce requests/min and tokens/min budgets
+  - a 429 pauses every worker until Retry-After (or an exponential backoff)
+    and halves the request rate; successes restore it gradually
+  - optional streaming: complete(make_on_delta=...) feeds each delta to a
+    hook (e.g. a json_stream validator) that can end or cancel the answer
+
+A 45-paper batch then takes about max(latency) * ceil(N / concurrency)
+instead of the sum of all latencies. base_url can point at any
+OpenAI-compatible server, including a local mock (see tests/test_llm_client.py).
+"""
+
+import asyncio
+import sys
+import time
+
+# Rough token estimate for budget accounting; images are billed as a block
+CHARS_PER_TOKEN = 4
+IMAGE_TOKENS = 1000
+
+_clients = {}
+
+
+def _import_openai():
+    try:
+        import openai
+    except ImportError:
+        print("ERROR: openai package not installed. Run: pip install openai")
+        sys.exit(1)
+    return openai
+
+
+def get_client(api_key, base_url):
+    """Shared synchronous client (one connection pool per endpoint)."""
+    key = (api_key, base_url)
+    if key not in _clients:
+        openai = _import_openai()
+        _clients[key] = openai.OpenAI(api_key=api_key, base_url=base_url)
+    return _clients[key]
+
+
+def estimate_tokens(messages, max_tokens=0):
+    """Approximate prompt tokens of a message list, plus the completion budget."""
+    chars = 0
+    images = 0
+    for msg in messages:
+        content = msg.get("content", "")
+        if isinstance(content, str):
+            chars += len(content)
+            continue
+        for part in content:
+            if part.get("type") == "text":
+                chars += len(part.get("text", ""))
+            else:
+                images += 1
+    return chars // CHARS_PER_TOKEN + images * IMAGE_TOKENS + max_tokens
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at `per_minute` units/min."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        # A single request larger than the bucket waits for a full bucket
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def refund(self, amount):
+        """Return over-reserved units (e.g. estimate minus actual usage)."""
+        if amount > 0:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class AsyncLLMClient:
+    """Bounded-concurrency, rate-limited chat completions on one pooled client."""
+
+    def __init__(self, api_key, base_url, model, concurrency=8, rpm=None, tpm=None,
+                 max_retries=3, temperature=0.1, max_tokens=4096):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.concurrency = concurrency
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_retries = max_retries
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.rate_limited = 0
+        self._client = None
+        # Created inside the running loop (asyncio primitives bind to it)
+        self._semaphore = None
+        self._requests = None
+        self._tokens = None
+        self._pause_until = 0.0
+        self._backoff = 1.0
+
+    def _setup(self):
+        if self._client is None:
+            openai = _import_openai()
+            self._openai = openai
+            self._client = openai.AsyncOpenAI(api_key=self.api_key, base_url=self.base_url,
+                                              max_retries=0)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._requests = TokenBucket(self.rpm) if self.rpm else None
+        self._tokens = TokenBucket(self.tpm) if self.tpm else None
+
+    async def _wait_for_pause(self):
+        delay = self._pause_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _on_rate_limited(self, error):
+        """429: pause everyone, and slow the request bucket down (multiplicative decrease)."""
+        self.rate_limited += 1
+        retry_after = None
+        response = getattr(error, "response", None)
+        if response is not None:
+            try:
+                retry_after = float(response.headers.get("retry-after"))
+            except (TypeError, ValueError):
+                retry_after = None
+        wait = retry_after if retry_after is not None else self._backoff
+        self._backoff = min(self._backoff * 2, 60.0)
+        self._pause_until = max(self._pause_until, time.monotonic() + wait)
+        if self._requests is not None:
+            self._requests.rate = max(self._requests.rate / 2, 1 / 60.0)
+        return wait
+
+    def _on_success(self):
+        """Additive recovery towards the configured rate."""
+        self._backoff = 1.0
+        if self._requests is not None and self.rpm:
+            self._requests.rate = min(self.rpm / 60.0, self._requests.rate + 1 / 60.0)
+
+    async def _create(self, messages, max_tokens, on_delta):
+        """One request: (content, usage). Streams when on_delta is given;
+        on_delta(delta) returning True ends the answer early."""
+        kwargs = dict(model=self.model, messages=messages,
+                      temperature=self.temperature, max_tokens=max_tokens)
+        if on_delta is None:
+            response = await self._client.chat.completions.create(**kwargs)
+            return response.choices[0].message.content, getattr(response, "usage", None)
+
+        parts = []
+        usage = None
+        stream = await self._client.chat.completions.create(
+            stream=True, stream_options={"include_usage": True}, **kwargs)
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    delta = chunk.choices[0].delta.content
+                    parts.append(delta)
+                    if on_delta(delta):
+                        break
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+        finally:
+            # Closing the stream cancels the generation on the server
+            await stream.close()
+        return "".join(parts), usage
+
+    async def complete(self, messages, max_tokens=None, label="", make_on_delta=None):
+        """Run one chat completion; returns (message content, usage or None).
+
+        With make_on_delta the answer is streamed: make_on_delta() builds a
+        fresh delta hook per attempt. An exception raised by the hook cancels
+        the stream and is re-raised here without a retry.
+        """
+        if self._semaphore is None:
+            self._setup()
+        max_tokens = max_tokens or self.max_tokens
+        reserved = estimate_tokens(messages, max_tokens)
+
+        async with self._semaphore:
+            for attempt in range(self.max_retries):
+                await self._wait_for_pause()
+                if self._requests is not None:
+                    await self._requests.acquire(1)
+                if self._tokens is not None:
+                    await self._tokens.acquire(reserved)
+                on_delta = None
+                aborted = []
+                if make_on_delta is not None:
+                    hook = make_on_delta()
+
+                    def on_delta(delta, hook=hook, aborted=aborted):
+                        try:
+                            return hook(delta)
+                        except Exception as e:
+                            aborted.append(e)
+                            return True
+                try:
+                    text, usage = await self._create(messages, max_tokens, on_delta)
+                except self._openai.RateLimitError as e:
+                    wait = self._on_rate_limited(e)
+                    print(f"    {label} rate limited (attempt {attempt + 1}/{self.max_retries}), "
+                          f"pausing {wait:.1f}s")
+                    if attempt == self.max_retries - 1:
+                        raise
+                    continue
+                except Exception as e:
+                    wait_time = 2 ** (attempt + 1)
+                    print(f"    {label} API error (attempt {attempt + 1}/{self.max_retries}): {e}")
+                    if attempt == self.max_retries - 1:
+                        raise
+                    await asyncio.sleep(wait_time)
+                    continue
+
+                self._on_success()
+                if self._tokens is not None and usage is not None and usage.total_tokens:
+                    self._tokens.refund(reserved - usage.total_tokens)
+                if aborted:
+                    raise aborted[0]
+                return text, usage
+
+    async def _gather(self, jobs):
+        self._setup()
+        try:
+            return await asyncio.gather(*(job(self) for job in jobs), return_exceptions=True)
+        finally:
+            await self._client.close()
+            self._client = None
+
+    def run(self, jobs):
+        """Run async jobs (callables taking this client) and return results in order.
+
+        A job that raises yields its exception in the result list instead of
+        cancelling the batch.
+        """
+        return asyncio.run(self._gather(jobs))
+
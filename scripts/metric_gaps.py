@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Plan LLM metric extraction around what the regex scanner already found.
+
+extract_metrics_llm.py --hybrid runs metric_scanner.detailed_metrics() on
+a paper first. gap_fields() lists the EXTRACTION_PROMPT fields the regex
+records leave missing or low-confidence:
+
+  - comparison, quantization and model_benchmarks (never found by regex)
+  - fields without any regex value
+  - technology when the text names more than one node
+  - multi-value fields none of whose values has an operating condition
+
+plan_requests() splits the gaps into at most two targeted sub-prompts:
+chip-level numbers from the text, and results/comparison fields that also
+get the Fig. 6/7 images. focus_pattern() gives prompt_context.build_context
+the cues of the requested fields, so each sub-prompt carries the paragraphs
+about those fields rather than the whole paper.
+
+merge_detailed() lays the LLM answers over the regex records: a field the
+LLM was asked for and answered replaces the regex one, everything else
+keeps the regex value.
+"""
+
+import re
+
+# EXTRACTION_PROMPT fields, in prompt order
+FIELDS = ["technology", "die_area", "supply_voltage", "frequency", "sram", "power",
+          "energy_efficiency", "throughput", "comparison", "quantization", "model_benchmarks"]
+
+# Fields metric_scanner has no patterns for
+LLM_ONLY_FIELDS = {"comparison", "quantization", "model_benchmarks"}
+
+# (group, fields, attach the comparison figure images)
+FIELD_GROUPS = [
+    ("chip", ["technology", "die_area", "supply_voltage", "frequency", "sram", "power"], False),
+    ("results", ["energy_efficiency", "throughput", "comparison", "quantization",
+                 "model_benchmarks"], True),
+]
+
+# Paragraph cues per field, used to focus the prompt context
+FIELD_CUES = {
+    "technology": r'\d+\s*nm\b|CMOS|FinFET|FDSOI',
+    "die_area": r'mm\s*[²2]|\bdie\b|\barea\b',
+    "supply_voltage": r'\d\s*m?V\b|\bsupply\b',
+    "frequency": r'\d\s*[GMk]Hz\b|\bclock\b',
+    "sram": r'SRAM|\d\s*[KM]B\b|\bbuffer\b',
+    "power": r'\d\s*[µμum]?W\b|\bpower\b',
+    "energy_efficiency": r'OPS/W|J/(?:token|bit|b|op)\b|efficien',
+    "throughput": r'[TGM]OPS\b|tokens?/s|\bthroughput\b|\bfps\b',
+    "comparison": r'state[- ]of[- ]the[- ]art|prior (?:art|work)|compar|\d\s*[×x]\s',
+    "quantization": r'\b(?:U?INT|FP|BF|MXFP)\d|quantiz|\d-?bit\b',
+    "model_benchmarks": r'LLaMA|Llama|GPT|BERT|ViT|ResNet|accuracy|perplexity|benchmark',
+}
+
+
+def is_low_confidence(field, value):
+    """True if a regex-found field should still be asked of the LLM."""
+    if field == "technology":
+        return " / " in value
+    if isinstance(value, dict) and "values" in value:
+        return not any(record.get("condition") for record in value["values"])
+    return False
+
+
+def gap_fields(regex_metrics):
+    """EXTRACTION_PROMPT fields to ask the LLM for, in prompt order."""
+    return [field for field in FIELDS
+            if field in LLM_ONLY_FIELDS or field not in regex_metrics
+            or is_low_confidence(field, regex_metrics[field])]
+
+
+def plan_requests(gaps):
+    """[(group, fields, with_figures)] for the groups that have gaps."""
+    plan = []
+    for group, fields, with_figures in FIELD_GROUPS:
+        wanted = [field for field in fields if field in gaps]
+        if wanted:
+            plan.append((group, wanted, with_figures))
+    return plan
+
+
+def focus_pattern(fields):
+    """One case-insensitive regex matching the cues of any of the fields."""
+    return re.compile("|".join(f"(?:{FIELD_CUES[field]})" for field in fields), re.IGNORECASE)
+
+
+def merge_detailed(regex_metrics, answers):
+    """Regex records overlaid with [(fields, parsed LLM answer)], in prompt order."""
+    merged = dict(regex_metrics)
+    for fields, parsed in answers:
+        for field in fields:
+            if parsed.get(field):
+                merged[field] = parsed[field]
+    return {field: merged[field] for field in FIELDS if field in merged}
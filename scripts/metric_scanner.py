@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""Anchored regex scanner for chip metrics in paper text.
+
+The metric patterns are compiled once, at import, into one alternation per
+category. scan() makes one pass over a document with ANCHORS, a prefilter
+for a number followed by a unit ("28 nm", "4.5mm", "17.4 TOPS/W") or a
+keyword, and runs a category's alternation only around that category's
+anchors. It returns every match, in text order:
+
+  {"category": "energy_efficiency", "value": "17.4 TOPS/W",
+   "start": 1834, "end": 1845, "priority": 0, "text": "17.4 TOPS/W"}
+
+category is a metrics.json key (technology, die_area_mm2, supply_voltage,
+sram_kb, frequency_mhz, power_mw, energy_efficiency, throughput), value the
+normalized value as it would be written there, or None when the match is
+out of range (e.g. a 12V supply). priority is the pattern's rank within its
+category; lower ranks are more specific phrasings.
+
+best_matches() picks one match per category: the lowest priority, then the
+earliest position - the same choice as searching each pattern in turn.
+
+Matches of different patterns may overlap ("operating at 0.9 V supply"
+is both "operating at 0.9 V" and "0.9 V supply"). Where two patterns match
+from the same position, only the one listed first in PATTERNS is reported.
+
+detailed_metrics() turns every match into the metrics_detailed schema of
+extract_metrics_llm.py, each value with the operating point ("INT8, 0.6V,
+decode") read from cues in the surrounding sentence.
+"""
+
+import re
+
+_NUM = r'(\d+\.?\d*)'
+_AREA_UNIT = r'mm\s*[²2]'
+
+
+def _technology(m, g):
+    return g[0].replace(' ', '') + " CMOS"
+
+
+def _die_area(m, g):
+    if len(g) == 2:
+        # WxH format
+        return str(round(float(g[0]) * float(g[1]), 2))
+    return g[0]
+
+
+def _supply_voltage(m, g):
+    v = float(g[0])
+    # Reasonable supply voltage range
+    return f"{v}V" if 0.3 <= v <= 5.0 else None
+
+
+def _whole_match(m, g):
+    return m.strip()
+
+
+def _frequency(m, g):
+    freq_m = re.search(r'(\d+\.?\d*)\s*([GM]Hz)', m, re.IGNORECASE)
+    if not freq_m:
+        return None
+    val = float(freq_m.group(1))
+    if freq_m.group(2).upper() == 'GHZ':
+        return str(int(val * 1000))
+    return str(int(val))
+
+
+def _power(m, g):
+    val, unit = float(g[0]), g[1]
+    if unit == 'uW':
+        val_mw = val / 1000
+    elif unit == 'W':
+        val_mw = val * 1000
+    else:
+        val_mw = val
+    return str(round(val_mw, 2))
+
+
+# (category, value function, patterns in order of preference)
+PATTERNS = [
+    ("technology", _technology, [
+        r'(\d+\s*nm)\s+CMOS',
+        r'fabricated\s+in\s+(\d+\s*nm)',
+        r'(\d+\s*nm)\s+(?:UTBB-)?FDSOI',
+        r'(\d+\s*nm)\s+FinFET',
+        r'(\d+\s*nm)\s+process',
+        r'(\d+\s*nm)\s+technology',
+        r'TSMC\s+(\d+\s*nm)',
+    ]),
+    ("die_area_mm2", _die_area, [
+        rf'die\s+area\s+(?:of\s+)?{_NUM}\s*{_AREA_UNIT}',
+        rf'{_NUM}\s*{_AREA_UNIT}\s+die\s+area',
+        rf'{_NUM}\s*{_AREA_UNIT}\s+(?:core|chip|total)\s+area',
+        rf'core\s+area\s+(?:of\s+)?{_NUM}\s*{_AREA_UNIT}',
+        rf'chip\s+area\s+(?:of\s+|is\s+)?{_NUM}\s*{_AREA_UNIT}',
+        rf'occupies\s+{_NUM}\s*{_AREA_UNIT}',
+        rf'{_NUM}\s*[×x]\s*{_NUM}\s*mm\s*[²2]?\s*(?:die|chip|core)',
+    ]),
+    ("supply_voltage", _supply_voltage, [
+        rf'{_NUM}\s*V\s+supply',
+        rf'supply\s+(?:voltage\s+)?(?:of\s+)?{_NUM}\s*V',
+        rf'VDD\s*=\s*{_NUM}\s*V',
+        rf'{_NUM}\s*V\s+VDD',
+        rf'operating\s+at\s+{_NUM}\s*V',
+    ]),
+    ("sram_kb", _whole_match, [
+        rf'{_NUM}\s*[KkMm]B\s+(?:of\s+)?(?:on-chip\s+)?SRAM',
+        rf'SRAM\s+(?:of\s+)?{_NUM}\s*[KkMm]B',
+        rf'{_NUM}\s*[KkMm]B\s+(?:on-chip\s+)?memory',
+    ]),
+    ("frequency_mhz", _frequency, [
+        rf'{_NUM}\s*[GM]Hz\s+clock',
+        rf'clock\s+(?:frequency\s+)?(?:of\s+)?{_NUM}\s*[GM]Hz',
+        rf'operates?\s+at\s+(?:up\s+to\s+)?{_NUM}\s*[GM]Hz',
+        rf'{_NUM}\s*[GM]Hz\s+(?:operating|operation)',
+        rf'running\s+at\s+{_NUM}\s*[GM]Hz',
+        rf'frequency\s+(?:of\s+)?{_NUM}\s*[GM]Hz',
+    ]),
+    ("power_mw", _power, [
+        rf'(?:dissipating|consumes?|power\s+(?:consumption\s+)?(?:of\s+)?)\s*{_NUM}\s*([mu]?W)',
+        rf'{_NUM}\s*([mu]?W)\s+(?:power|total)',
+        rf'(?:total|peak|average)\s+power\s+(?:of\s+)?{_NUM}\s*([mu]?W)',
+    ]),
+    ("energy_efficiency", _whole_match, [
+        rf'{_NUM}\s*TOPS/W',
+        rf'{_NUM}\s*GOPS/W',
+        rf'{_NUM}\s*[pn]J/b(?:it)?',
+        r'energy\s+efﬁciency\s+(?:of\s+)?(\d+\.?\d*\s*\S+)',
+        rf'{_NUM}\s*TFLOPS/W',
+    ]),
+    ("throughput", _whole_match, [
+        rf'{_NUM}\s*TOPS(?:\s|,|\.)',
+        rf'{_NUM}\s*GOPS(?:\s|,|\.)',
+        r'throughput\s+(?:of\s+)?(\d+\.?\d*\s*\S+)',
+        rf'{_NUM}\s*TFLOPS(?:\s|,|\.)',
+        rf'{_NUM}\s*[GM]b/s',
+    ]),
+]
+
+CATEGORIES = [category for category, _, _ in PATTERNS]
+
+
+# Prefilter: every pattern contains a number followed by its category's unit,
+# or a keyword. One pass with this regex finds the places worth scanning;
+# longer units come first so "TOPS/W" is not taken for "TOPS".
+ANCHORS = re.compile(
+    r'\d\s*(?:(?P<energy_efficiency>[tg]ops/w|tflops/w|[pn]j/b)'
+    r'|(?P<throughput>[tg]ops|tflops|[gm]b/s)'
+    r'|(?P<frequency_mhz>[gm]hz)'
+    r'|(?P<sram_kb>[km]b)'
+    r'|(?P<technology>nm)'
+    r'|(?P<die_area_mm2>mm|[×x])'
+    r'|(?P<power_mw>[mu]?w)'
+    r'|(?P<supply_voltage>v))'
+    r'|(?P<energy_efficiency_kw>efﬁciency)|(?P<throughput_kw>throughput)',
+    re.IGNORECASE)
+# Characters of context scanned on either side of an anchor
+CONTEXT = 80
+
+
+def _compile(patterns):
+    """{category: (alternation regex, [(name, priority, value_fn, first_group,
+    n_groups)])}, alternatives in priority order."""
+    compiled = {}
+    for category, value_fn, category_patterns in patterns:
+        parts, specs = [], []
+        group = 1
+        for priority, pattern in enumerate(category_patterns):
+            name = f"p{priority}"
+            n_groups = re.compile(pattern).groups
+            parts.append(f"(?P<{name}>{pattern})")
+            specs.append((name, priority, value_fn, group + 1, n_groups))
+            group += 1 + n_groups
+        compiled[category] = (re.compile("|".join(parts), re.IGNORECASE),
+                              {spec[0]: spec for spec in specs})
+    return compiled
+
+
+_SCANNERS = _compile(PATTERNS)
+
+
+def _windows(text):
+    """{category: merged [start, end] spans around its anchors}, widened to
+    whitespace so no number is cut in half."""
+    windows = {}
+    for m in ANCHORS.finditer(text):
+        category = m.lastgroup.replace("_kw", "")
+        start = max(0, m.start() - CONTEXT)
+        while start > 0 and not text[start - 1].isspace():
+            start -= 1
+        end = min(len(text), m.end() + CONTEXT)
+        while end < len(text) and not text[end].isspace():
+            end += 1
+        spans = windows.setdefault(category, [])
+        if spans and start <= spans[-1][1]:
+            spans[-1][1] = max(spans[-1][1], end)
+        else:
+            spans.append([start, end])
+    return windows
+
+
+def scan(text):
+    """Every metric match in text, in order (see the module docstring)."""
+    text = text or ""
+    matches = []
+    for category, spans in _windows(text).items():
+        scanner, specs = _SCANNERS[category]
+        seen_ends = set()
+        for start, end in spans:
+            pos = start
+            while True:
+                m = scanner.search(text, pos, end)
+                if m is None:
+                    break
+                # Restart just after the match start, not its end, so a
+                # pattern overlapping an earlier match is still found
+                pos = m.start() + 1
+                name = m.lastgroup
+                # A suffix of an earlier match of the same pattern ("2.5 TOPS/W"
+                # inside "12.5 TOPS/W") is not a candidate of its own
+                if (name, m.end()) in seen_ends:
+                    continue
+                seen_ends.add((name, m.end()))
+                _, priority, value_fn, first, n_groups = specs[name]
+                matched = m.group(name)
+                groups = m.groups()[first - 1:first - 1 + n_groups]
+                matches.append({"category": category, "value": value_fn(matched, groups),
+                                "start": m.start(), "end": m.end(), "priority": priority,
+                                "text": matched})
+    matches.sort(key=lambda match: (match["start"], CATEGORIES.index(match["category"])))
+    return matches
+
+
+def best_matches(matches):
+    """{category: match} with the lowest (priority, start) per category."""
+    best = {}
+    for match in matches:
+        current = best.get(match["category"])
+        if current is None or (match["priority"], match["start"]) < \
+                (current["priority"], current["start"]):
+            best[match["category"]] = match
+    return best
+
+
+# ---------------------------------------------------------------------------
+# metrics_detailed-style records
+# ---------------------------------------------------------------------------
+
+# metrics_detailed key per category; "single" keys hold one {value, unit, note}
+DETAILED_KEYS = {
+    "technology": "technology", "die_area_mm2": "die_area", "supply_voltage": "supply_voltage",
+    "sram_kb": "sram", "frequency_mhz": "frequency", "power_mw": "power",
+    "energy_efficiency": "energy_efficiency", "throughput": "throughput",
+}
+SINGLE_VALUE_KEYS = {"die_area", "sram"}
+
+QUANTITY = re.compile(r'(\d+\.?\d*)\s*((?:mm\s*[²2]|[a-zμ]+(?:/[a-z]+)?))', re.IGNORECASE)
+AREA_KIND = re.compile(r'\b(die|core|chip|total)\b', re.IGNORECASE)
+AREA_PRODUCT = re.compile(r'(\d+\.?\d*)\s*[×x]\s*(\d+\.?\d*)', re.IGNORECASE)
+
+# Conventional spelling of the units the patterns match
+UNIT_SPELLING = {
+    "nm": "nm", "mm2": "mm²", "mm²": "mm²", "v": "V", "kb": "KB", "mb": "MB",
+    "mhz": "MHz", "ghz": "GHz", "mw": "mW", "uw": "μW", "w": "W",
+    "tops/w": "TOPS/W", "gops/w": "GOPS/W", "tflops/w": "TFLOPS/W", "pj/b": "pJ/b",
+    "nj/b": "nJ/b", "pj/bit": "pJ/b", "nj/bit": "nJ/b", "tops": "TOPS", "gops": "GOPS",
+    "tflops": "TFLOPS", "gb/s": "Gb/s", "mb/s": "Mb/s",
+}
+
+# Characters either side of a match searched for its operating point; the
+# window also stops at the sentence boundary and at a clause that starts
+# another statement ("..., while ...", "... and a peak throughput of ...")
+CONDITION_CHARS = 120
+SENTENCE_END = re.compile(r'(?<=[.;])\s+(?=[A-Z(])|\n\s*\n')
+CLAUSE_BREAK = re.compile(r'\s(?:while|whereas|but)\s|\sand\s+(?:a|an|the)\s', re.IGNORECASE)
+CONDITION_CUES = [
+    # precision: INT8, FP16, BF16, MXFP4, W4A8, 8b / 8-bit
+    ("precision", re.compile(r'(?i:\b(?:U?INT|FP|BF|MXINT|MXFP)\d{1,2}\b|\bW\d{1,2}A\d{1,2}\b)'
+                             r'|(?<![\w.-])\d{1,2}-?b(?:it)?\b(?!/)')),
+    ("voltage", re.compile(r'\b\d+\.?\d*\s*V\b')),
+    ("frequency", re.compile(r'\b\d+\.?\d*\s*[GM]Hz\b', re.IGNORECASE)),
+    # workload: model family and phase
+    ("model", re.compile(
+        r'\b(?:LLaMA|Llama|GPT|OPT|BERT|ViT|DeiT|Swin|ResNet|MobileNet|VGG|YOLO|'
+        r'Stable\s+Diffusion|Transformer|LSTM|CNN|Mistral|Qwen|DeepSeek)[\w.-]*')),
+    ("phase", re.compile(r'\b(?:prefill|decode|decoding|training|inference)\b')),
+    ("mode", re.compile(r'\b(?:peak|average|idle|sparse|dense|standby|sleep)\b', re.IGNORECASE)),
+]
+# The cue describing a match's own quantity is not part of its condition
+OWN_CUE = {"supply_voltage": "voltage", "frequency_mhz": "frequency"}
+
+
+def _sentence_window(text, start, end):
+    """Bounds of the clause around [start, end), at most CONDITION_CHARS out."""
+    lo = max(0, start - CONDITION_CHARS)
+    hi = min(len(text), end + CONDITION_CHARS)
+    for boundary in (SENTENCE_END, CLAUSE_BREAK):
+        for m in boundary.finditer(text, lo, start):
+            lo = m.end()
+        m = boundary.search(text, end, hi)
+        if m:
+            hi = m.start()
+    return lo, hi
+
+
+def condition_for(text, match):
+    """Operating point of a match from its clause: the nearest cue of each
+    CONDITION_CUES kind (precision, voltage, model, ...), in text order."""
+    lo, hi = _sentence_window(text, match["start"], match["end"])
+    found = []
+    for cue, pattern in CONDITION_CUES:
+        if OWN_CUE.get(match["category"]) == cue:
+            continue
+        nearest = None
+        for m in pattern.finditer(text, lo, hi):
+            # Skip the match's own number/unit
+            if match["start"] <= m.start() < match["end"]:
+                continue
+            distance = match["start"] - m.end() if m.end() <= match["start"] \
+                else m.start() - match["end"]
+            if nearest is None or distance < nearest[0]:
+                # "0.6 V" and "0.6V" read the same
+                joiner = "" if cue in ("voltage", "frequency") else " "
+                nearest = (distance, m.start(), joiner.join(m.group(0).split()))
+        if nearest:
+            found.append(nearest[1:])
+    return ", ".join(cue_text for _, cue_text in sorted(found))
+
+
+def quantity(match):
+    """(value, unit) strings of a match, e.g. ("17.4", "TOPS/W")."""
+    if match["category"] == "die_area_mm2":
+        product = AREA_PRODUCT.search(match["text"])
+        if product:
+            return match["value"], "mm²"
+    found = QUANTITY.search(match["text"])
+    if not found:
+        return match["value"], ""
+    unit = found.group(2).rstrip(".,")
+    unit = UNIT_SPELLING.get(re.sub(r'\s+', '', unit).lower(), unit)
+    return found.group(1), unit
+
+
+def detailed_metrics(text, matches=None):
+    """Every match as metrics_detailed records (the extract_metrics_llm.py schema):
+
+      {"technology": "28nm",
+       "die_area": {"value": "4.5", "unit": "mm²", "note": "..."},
+       "power": {"values": [{"value": "356", "unit": "mW", "condition": "INT8, 0.6V"}]},
+       ...}
+
+    Overlapping matches count once and repeated (value, unit, condition)
+    records are kept once, best pattern first; out-of-range matches are
+    dropped. die_area/sram keep the best match only; its note names the
+    area kind and any other values found.
+    """
+    if matches is None:
+        matches = scan(text)
+    by_key = {}
+    for match in sorted(matches, key=lambda m: (m["priority"], m["start"])):
+        if match["value"] is None:
+            continue
+        by_key.setdefault(DETAILED_KEYS[match["category"]], []).append(match)
+
+    detailed = {}
+    for category in CATEGORIES:
+        key = DETAILED_KEYS[category]
+        if key not in by_key:
+            continue
+        if key == "technology":
+            detailed[key] = " / ".join(dict.fromkeys(
+                "".join(quantity(m)) for m in by_key[key]))
+            continue
+        records, spans = [], []
+        for match in by_key[key]:
+            # Overlapping matches ("4.1 TOPS" in "throughput of 4.1 TOPS")
+            # are one occurrence; the better pattern was seen first
+            if any(match["start"] < end and start < match["end"] for start, end in spans):
+                continue
+            spans.append((match["start"], match["end"]))
+            value, unit = quantity(match)
+            record = {"value": value, "unit": unit, "condition": condition_for(text, match)}
+            if record not in records:
+                records.append(record)
+        if key in SINGLE_VALUE_KEYS:
+            best = records[0]
+            kind = AREA_KIND.search(by_key[key][0]["text"]) if key == "die_area" else None
+            notes = [f"{kind.group(1).lower()} area"] if kind else []
+            notes += [f"also {o}" for o in dict.fromkeys(
+                f"{r['value']} {r['unit']}" for r in records[1:] if r["value"] != best["value"])]
+            detailed[key] = {"value": best["value"], "unit": best["unit"],
+                             "note": "; ".join(notes)}
+        else:
+            detailed[key] = {"values": records}
+    return detailed
+
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""Canonical numeric metrics for sorting, range filters and charts.
+
+metrics / metrics_detailed hold free-form strings ("3nm FinFET (N3P) ...",
+"CoWoS-S module", "17.4TOPS/W", {"value": "1.2", "unit": "GHz"}). This
+module turns them into one number per quantity, in fixed units:
+
+  process_nm                 nm       ("Intel 18A" -> 1.8)
+  die_area_mm2               mm²
+  power_mw                   mW
+  frequency_mhz              MHz
+  energy_efficiency_tops_w   TOPS/W   (TFLOPS/W counted as TOPS/W)
+  throughput_tops            TOPS     (TFLOPS counted as TOPS)
+
+normalize_metrics(paper) returns {field: {"value", "confidence", "source"}}
+with only the fields that could be parsed. confidence is "high" for a
+single number with an explicit (or field-implied) unit, and "low" when the
+value was picked from a range, a list, a bound ("<5mW"), a vendor node name
+or a FLOPS figure. source names the metrics key it came from.
+
+build_site_data.py stores the result as paper["normalized"] in index.json
+and the per-paper shards. Run this script directly for a coverage report.
+"""
+
+import re
+
+import paper_store
+
+NUMBER = r'(\d+(?:,\d{3})*(?:\.\d+)?)'
+RANGE = rf'{NUMBER}(?:\s*(?:-|–|~|to)\s*{NUMBER})?'
+
+# unit spelling (lowercased, spaces removed) -> factor to the canonical unit
+UNITS = {
+    "process_nm": {"nm": 1},
+    "die_area_mm2": {"mm²": 1, "mm2": 1, "mm^2": 1, "μm²": 1e-6, "um²": 1e-6, "um2": 1e-6},
+    "power_mw": {"mw": 1, "w": 1e3, "kw": 1e6, "μw": 1e-3, "uw": 1e-3},
+    "frequency_mhz": {"mhz": 1, "ghz": 1e3, "khz": 1e-3, "hz": 1e-6},
+    "energy_efficiency_tops_w": {"tops/w": 1, "gops/w": 1e-3, "tflops/w": 1, "gflops/w": 1e-3},
+    "throughput_tops": {"tops": 1, "gops": 1e-3, "pops": 1e3, "tflops": 1, "gflops": 1e-3,
+                        "pflops": 1e3},
+}
+# Canonical unit of each field, for display and exports
+FIELD_UNITS = {
+    "process_nm": "nm", "die_area_mm2": "mm²", "power_mw": "mW", "frequency_mhz": "MHz",
+    "energy_efficiency_tops_w": "TOPS/W", "throughput_tops": "TOPS",
+}
+# Units whose quantity is only comparable, not identical
+APPROXIMATE_UNITS = {"tflops/w", "gflops/w", "tflops", "gflops", "pflops"}
+
+# Where each field is read from, in order of preference:
+# (source name, implied unit for a bare number or None)
+SOURCES = {
+    "process_nm": [("metrics.technology", "nm"), ("process_node", "nm"),
+                   ("metrics_detailed.technology", None)],
+    "die_area_mm2": [("metrics.die_area_mm2", "mm²"), ("metrics_detailed.die_area", None),
+                     ("die_area_mm2", "mm²")],
+    "power_mw": [("metrics.power_mw", "mw"), ("metrics_detailed.power", None),
+                 ("power_mw", "mw")],
+    "frequency_mhz": [("metrics.frequency_mhz", "mhz"), ("metrics_detailed.frequency", None),
+                      ("frequency_mhz", "mhz")],
+    "energy_efficiency_tops_w": [("metrics.energy_efficiency", None),
+                                 ("metrics_detailed.peak_energy_efficiency", None),
+                                 ("metrics_detailed.energy_efficiency", None),
+                                 ("energy_efficiency", None)],
+    "throughput_tops": [("metrics.throughput", None), ("metrics_detailed.peak_performance", None),
+                        ("metrics_detailed.throughput", None)],
+}
+
+# Fields where several candidates mean "peak": the largest one wins
+PEAK_FIELDS = {"frequency_mhz", "energy_efficiency_tops_w", "throughput_tops"}
+
+VENDOR_NODE = re.compile(r'\bIntel\s+(\d+A?(?:/\d+A?)*)\b', re.IGNORECASE)
+ANGSTROM_NODE = re.compile(r'\b(\d+A)\b')
+
+
+def _number(text):
+    return float(text.replace(",", ""))
+
+
+def _unit_pattern(units):
+    # Longest spellings first so "tops/w" wins over "tops"
+    names = sorted(units, key=len, reverse=True)
+    return "|".join(re.escape(n) for n in names)
+
+
+def parse_quantity(text, field, implied_unit=None):
+    """Numbers with a unit of this field in a string -> [(value, approximate)].
+
+    approximate is True when the number was a range (the upper end is
+    taken), a bound, or in a FLOPS-style unit. A bare number is only
+    accepted when implied_unit is given and the string is just that number.
+    """
+    if text is None:
+        return []
+    text = str(text).strip()
+    units = UNITS[field]
+    if implied_unit and re.fullmatch(NUMBER, text):
+        return [(_number(text) * units[implied_unit], False)]
+
+    pattern = re.compile(rf'([<>≤≥~]|up to\s*)?{RANGE}\s*({_unit_pattern(units)})(?![a-z]|/[a-z])',
+                         re.IGNORECASE)
+    found = []
+    squashed = text.replace(" /", "/").replace("/ ", "/")
+    for m in pattern.finditer(squashed):
+        bound, low, high, unit = m.groups()
+        unit = unit.lower()
+        value = _number(high or low) * units[unit]
+        found.append((value, bool(bound or high or unit in APPROXIMATE_UNITS)))
+    return found
+
+
+def parse_process_node(text):
+    """Process node string -> [(nm, approximate)]; vendor names map to their nominal nm."""
+    text = str(text or "")
+    found = parse_quantity(text, "process_nm")
+    # "Intel 3" ~ 3nm class, "Intel 18A" = 18 angstrom, "Intel 3/18A" both
+    m = VENDOR_NODE.search(text) or ANGSTROM_NODE.search(text)
+    if m:
+        for number, angstrom in re.findall(r'(\d+)(A?)', m.group(1)):
+            found.append((int(number) / 10 if angstrom else float(number), True))
+    return found
+
+
+def source_texts(paper, source):
+    """Candidate strings for a source name like "metrics_detailed.power"."""
+    if "." in source:
+        group, key = source.split(".", 1)
+        value = (paper.get(group) or {}).get(key)
+    else:
+        value = paper.get(source)
+    if value is None:
+        return []
+    if isinstance(value, dict):
+        # {"value", "unit"} or {"values": [{"value", "unit", "condition"}, ...]}
+        items = value.get("values") if "values" in value else [value]
+        return [f'{item.get("value", "")} {item.get("unit", "")}'.strip()
+                for item in items or [] if isinstance(item, dict)]
+    return [str(value)]
+
+
+def normalize_field(paper, field):
+    """{"value", "confidence", "source"} for one field, or None."""
+    for source, implied_unit in SOURCES[field]:
+        candidates = []
+        for text in source_texts(paper, source):
+            if field == "process_nm":
+                candidates.extend(parse_process_node(text))
+            else:
+                candidates.extend(parse_quantity(text, field, implied_unit))
+        if not candidates:
+            continue
+        values = {round(v, 9) for v, _ in candidates}
+        if field in PEAK_FIELDS:
+            value, approximate = max(candidates, key=lambda c: c[0])
+        elif field == "process_nm":
+            # "3nm/6nm": the most advanced node of the design
+            value, approximate = min(candidates, key=lambda c: c[0])
+        else:
+            value, approximate = candidates[0]
+        confidence = "high" if len(values) == 1 and not approximate else "low"
+        return {"value": round(value, 6), "confidence": confidence, "source": source}
+    return None
+
+
+def normalize_metrics(paper):
+    """All parseable canonical fields of a paper (see module docstring)."""
+    result = {}
+    for field in SOURCES:
+        entry = normalize_field(paper, field)
+        if entry:
+            result[field] = entry
+    return result
+
+
+def main():
+    papers = paper_store.get_papers(paper_store.connect())
+
+    counts = {field: {"high": 0, "low": 0} for field in SOURCES}
+    for paper in papers:
+        for field, entry in normalize_metrics(paper).items():
+            counts[field][entry["confidence"]] += 1
+
+    print(f"Normalized metrics over {len(papers)} papers:")
+    for field, c in counts.items():
+        print(f"  {field:26s} {c['high'] + c['low']:3d} parsed ({c['low']} low confidence)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""SQLite store for the survey dataset; papers.json is exported from it.
+
+Pipeline stages read and write data/papers.db instead of rewriting the whole
+papers.json. Each update touches only the rows and fields it changes, inside
+one transaction per paper:
+
+  papers        one row per paper: common scalar fields as columns, other
+                top-level fields as JSON in `extra`, key order in `field_order`
+  figures       paper_id, position, num, caption, path
+  metrics       paper_id, metrics (JSON), metrics_detailed (JSON)
+  items         challenges/ideas: paper_id, field, position, text, type
+  translations  paper_id, field, position, lang, text (text_en of items)
+
+Usage from a stage script:
+
+    conn = paper_store.connect()
+    papers = paper_store.get_papers(conn)
+    paper_store.update_fields(conn, pid, {"metrics_detailed": metrics})
+    paper_store.save_translations(conn, paper)   # text_en of challenges/ideas
+
+papers.json stays the exported artifact the site and git see. It is written
+by build_site_data.py or `paper_store.py export`, and reproduces the stored
+records exactly (same keys, order and formatting). The first connect()
+imports papers.json into a new store. If papers.json is changed outside the
+store (e.g. by a git pull), export refuses to overwrite it until
+`paper_store.py import` (take the file) or `export --force` (keep the store).
+
+Stages may run in parallel (e.g. extract_metrics_llm.py and
+extract_bilingual.py): the store is in WAL mode, so readers never block the
+writer, and a writer waits up to BUSY_TIMEOUT_S for another's transaction
+instead of failing. Since every write is a field-level upsert of one paper,
+neither stage overwrites the other's results. export_json() holds a file
+lock and replaces papers.json atomically (atomic_io.py).
+
+CLI:
+  paper_store.py import               replace the store with papers.json
+  paper_store.py export [--force]     write papers.json from the store
+  paper_store.py show 31.3            print one assembled record
+  paper_store.py query "SELECT id, title FROM papers WHERE session = 31"
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from contextlib import contextmanager
+
+from atomic_io import atomic_write_text, file_lock
+from build_cache import file_digest
+
+BASE = "/home/sdu/obsidian/isscc_accelerator"
+DATA_DIR = os.path.join(BASE, "data")
+PAPERS_JSON = os.path.join(DATA_DIR, "papers.json")
+STORE_PATH = os.path.join(DATA_DIR, "papers.db")
+
+# How long a write waits for another process's transaction to finish
+BUSY_TIMEOUT_S = 60
+
+# Top-level fields stored as columns of the papers table
+SCALAR_FIELDS = [
+    "session", "title", "title_zh", "affiliation", "authors", "process_node",
+    "die_area_mm2", "power_mw", "energy_efficiency", "target_model", "application",
+    "abstract",
+]
+ITEM_FIELDS = ("challenges", "ideas")
+METRIC_FIELDS = ("metrics", "metrics_detailed")
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS papers (
+    id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    {", ".join(SCALAR_FIELDS)},
+    extra TEXT NOT NULL DEFAULT '{{}}',
+    field_order TEXT NOT NULL DEFAULT '[]'
+);
+CREATE TABLE IF NOT EXISTS figures (
+    paper_id TEXT NOT NULL REFERENCES papers(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    num INTEGER,
+    caption TEXT,
+    path TEXT,
+    extra TEXT NOT NULL DEFAULT '{{}}',
+    PRIMARY KEY (paper_id, position)
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    paper_id TEXT PRIMARY KEY REFERENCES papers(id) ON DELETE CASCADE,
+    metrics TEXT,
+    metrics_detailed TEXT
+);
+CREATE TABLE IF NOT EXISTS items (
+    paper_id TEXT NOT NULL REFERENCES papers(id) ON DELETE CASCADE,
+    field TEXT NOT NULL CHECK (field IN ('challenges', 'ideas')),
+    position INTEGER NOT NULL,
+    text TEXT,
+    type TEXT,
+    extra TEXT NOT NULL DEFAULT '{{}}',
+    PRIMARY KEY (paper_id, field, position)
+);
+CREATE TABLE IF NOT EXISTS translations (
+    paper_id TEXT NOT NULL REFERENCES papers(id) ON DELETE CASCADE,
+    field TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    lang TEXT NOT NULL,
+    text TEXT,
+    PRIMARY KEY (paper_id, field, position, lang)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False)
+
+
+@contextmanager
+def transaction(conn):
+    """BEGIN IMMEDIATE ... COMMIT: the write lock is taken up front, so two
+    stages never both read a row and then race to write it."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _get_meta(conn, key):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def _set_meta(conn, key, value):
+    conn.execute("INSERT INTO meta (key, value) VALUES (?, ?) "
+                 "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, value))
+
+
+def _is_empty(conn):
+    return conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0] == 0
+
+
+def connect(path=None, papers_json=None):
+    """Open (and create) the store; a new store is filled from papers.json."""
+    path = path or STORE_PATH
+    papers_json = papers_json or PAPERS_JSON
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_S, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(SCHEMA)
+
+    if _is_empty(conn) and os.path.exists(papers_json):
+        # Stages started together must not both import
+        with file_lock(papers_json):
+            if _is_empty(conn):
+                count = import_json(conn, papers_json)
+                print(f"  Imported {count} papers from {papers_json} into {path}")
+    elif os.path.exists(papers_json) and \
+            file_digest(papers_json) != _get_meta(conn, "papers_json_digest"):
+        print(f"WARNING: {papers_json} changed outside the paper store; run "
+              f"'paper_store.py import' to load it, or 'export --force' to overwrite it")
+    return conn
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+def _write_items(conn, pid, field, items):
+    conn.execute("DELETE FROM items WHERE paper_id = ? AND field = ?", (pid, field))
+    conn.execute("DELETE FROM translations WHERE paper_id = ? AND field = ?", (pid, field))
+    for pos, item in enumerate(items or []):
+        item_type = item.get("type")
+        extra = {k: v for k, v in item.items()
+                 if k not in ("text", "text_en") and not (k == "type" and item_type is not None)}
+        conn.execute("INSERT INTO items (paper_id, field, position, text, type, extra) "
+                     "VALUES (?, ?, ?, ?, ?, ?)",
+                     (pid, field, pos, item.get("text"), item_type, _dumps(extra)))
+        if "text_en" in item:
+            conn.execute("INSERT INTO translations (paper_id, field, position, lang, text) "
+                         "VALUES (?, ?, ?, 'en', ?)", (pid, field, pos, item["text_en"]))
+
+
+def _write_figures(conn, pid, figures):
+    conn.execute("DELETE FROM figures WHERE paper_id = ?", (pid,))
+    for pos, fig in enumerate(figures or []):
+        extra = {k: v for k, v in fig.items() if k not in ("num", "caption", "path")}
+        conn.execute("INSERT INTO figures (paper_id, position, num, caption, path, extra) "
+                     "VALUES (?, ?, ?, ?, ?, ?)",
+                     (pid, pos, fig.get("num"), fig.get("caption"), fig.get("path"),
+                      _dumps(extra)))
+
+
+def _update_fields(conn, pid, fields):
+    row = conn.execute("SELECT extra, field_order FROM papers WHERE id = ?", (pid,)).fetchone()
+    if row is None:
+        raise KeyError(f"paper {pid} not in store")
+    extra = json.loads(row["extra"])
+    order = json.loads(row["field_order"])
+
+    for key, value in fields.items():
+        if key not in order:
+            order.append(key)
+        if key == "id":
+            continue
+        if key in ITEM_FIELDS:
+            _write_items(conn, pid, key, value)
+        elif key == "figures":
+            _write_figures(conn, pid, value)
+        elif key in METRIC_FIELDS:
+            conn.execute(f"INSERT INTO metrics (paper_id, {key}) VALUES (?, ?) "
+                         f"ON CONFLICT(paper_id) DO UPDATE SET {key} = excluded.{key}",
+                         (pid, _dumps(value)))
+        elif key in SCALAR_FIELDS and not isinstance(value, (dict, list)):
+            conn.execute(f"UPDATE papers SET {key} = ? WHERE id = ?", (value, pid))
+            extra.pop(key, None)
+        else:
+            extra[key] = value
+
+    conn.execute("UPDATE papers SET extra = ?, field_order = ? WHERE id = ?",
+                 (_dumps(extra), _dumps(order), pid))
+
+
+def update_fields(conn, pid, fields):
+    """Set top-level fields of one paper ({field: value}), in one transaction.
+
+    Only the given fields are touched, so stages writing different fields
+    of the same paper do not overwrite each other.
+    """
+    with transaction(conn):
+        _update_fields(conn, pid, fields)
+
+
+def _put_paper(conn, paper, position):
+    conn.execute("INSERT INTO papers (id, position) VALUES (?, ?) "
+                 "ON CONFLICT(id) DO UPDATE SET position = excluded.position",
+                 (paper["id"], position))
+    _update_fields(conn, paper["id"], paper)
+
+
+def save_translations(conn, paper, lang="en", overwrite=True):
+    """Upsert the text_en of every challenge/idea of an in-memory record.
+
+    overwrite=False only adds missing rows (e.g. empty stubs).
+    """
+    verb = "INSERT OR REPLACE" if overwrite else "INSERT OR IGNORE"
+    with transaction(conn):
+        for field in ITEM_FIELDS:
+            for pos, item in enumerate(paper.get(field) or []):
+                if "text_en" in item:
+                    conn.execute(f"{verb} INTO translations (paper_id, field, position, lang, text) "
+                                 "VALUES (?, ?, ?, ?, ?)",
+                                 (paper["id"], field, pos, lang, item["text_en"]))
+
+
+def import_json(conn, path=None):
+    """Replace the store's contents with papers.json. Returns the paper count."""
+    path = path or PAPERS_JSON
+    with open(path, "r", encoding="utf-8") as f:
+        papers = json.load(f)
+    with transaction(conn):
+        for table in ("translations", "items", "metrics", "figures", "papers"):
+            conn.execute(f"DELETE FROM {table}")
+        for pos, paper in enumerate(papers):
+            _put_paper(conn, paper, pos)
+        _set_meta(conn, "papers_json_digest", file_digest(path))
+    return len(papers)
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+def _assemble(row, figures, metrics, items, translations):
+    pid = row["id"]
+    extra = json.loads(row["extra"])
+    paper = {}
+    for key in json.loads(row["field_order"]):
+        if key == "id":
+            paper["id"] = pid
+        elif key in ITEM_FIELDS:
+            paper[key] = []
+            for item_row in items.get((pid, key), []):
+                item = {"text": item_row["text"]}
+                if item_row["type"] is not None:
+                    item["type"] = item_row["type"]
+                item.update(json.loads(item_row["extra"]))
+                text_en = translations.get((pid, key, item_row["position"]))
+                if text_en is not None:
+                    item["text_en"] = text_en
+                paper[key].append(item)
+        elif key == "figures":
+            paper[key] = [dict({"num": f["num"], "caption": f["caption"], "path": f["path"]},
+                               **json.loads(f["extra"]))
+                          for f in figures.get(pid, [])]
+        elif key in METRIC_FIELDS:
+            value = metrics.get(pid, {}).get(key)
+            paper[key] = json.loads(value) if value is not None else None
+        elif key in extra:
+            paper[key] = extra[key]
+        else:
+            paper[key] = row[key]
+    return paper
+
+
+def get_papers(conn, ids=None):
+    """Assembled paper records in papers.json order (optionally only `ids`)."""
+    def grouped(sql, key):
+        groups = {}
+        for r in conn.execute(sql):
+            groups.setdefault(key(r), []).append(r)
+        return groups
+
+    figures = grouped("SELECT * FROM figures ORDER BY paper_id, position", lambda r: r["paper_id"])
+    items = grouped("SELECT * FROM items ORDER BY paper_id, field, position",
+                    lambda r: (r["paper_id"], r["field"]))
+    metrics = {r["paper_id"]: dict(r) for r in conn.execute("SELECT * FROM metrics")}
+    translations = {(r["paper_id"], r["field"], r["position"]): r["text"]
+                    for r in conn.execute("SELECT * FROM translations WHERE lang = 'en'")}
+
+    wanted = set(ids) if ids is not None else None
+    return [_assemble(row, figures, metrics, items, translations)
+            for row in conn.execute("SELECT * FROM papers ORDER BY position")
+            if wanted is None or row["id"] in wanted]
+
+
+def get_paper(conn, pid):
+    papers = get_papers(conn, [pid])
+    return papers[0] if papers else None
+
+
+def export_json(conn, path=None, force=False, papers=None):
+    """Write papers.json from the store. Returns True if the file changed.
+
+    Raises RuntimeError if papers.json was modified outside the store since
+    the last import/export, unless force is set.
+    """
+    path = path or PAPERS_JSON
+    with file_lock(path):
+        recorded = _get_meta(conn, "papers_json_digest")
+        current = file_digest(path)
+        if not force and current is not None and recorded is not None and current != recorded:
+            raise RuntimeError(f"{path} changed outside the paper store; run "
+                               f"'paper_store.py import' to load it, or "
+                               f"'paper_store.py export --force' to overwrite it")
+
+        if papers is None:
+            papers = get_papers(conn)
+        text = json.dumps(papers, ensure_ascii=False, indent=2)
+        changed = True
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                changed = f.read() != text
+        if changed:
+            atomic_write_text(path, text)
+        with transaction(conn):
+            _set_meta(conn, "papers_json_digest", file_digest(path))
+    return changed
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def run_query(conn, sql, as_json=False):
+    cursor = conn.execute(sql)
+    if cursor.description is None:
+        print(f"OK ({conn.total_changes} rows changed)")
+        return
+    columns = [d[0] for d in cursor.description]
+    rows = cursor.fetchall()
+    if as_json:
+        print(json.dumps([dict(zip(columns, r)) for r in rows], ensure_ascii=False, indent=2))
+        return
+    print("\t".join(columns))
+    for r in rows:
+        print("\t".join("" if v is None else str(v) for v in r))
+    print(f"({len(rows)} rows)", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite store behind papers.json")
+    parser.add_argument("--db", default=STORE_PATH, help=f"Store path (default: {STORE_PATH})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("import", help="Replace the store with papers.json")
+    p_export = sub.add_parser("export", help="Write papers.json from the store")
+    p_export.add_argument("--force", action="store_true",
+                          help="Overwrite papers.json even if it was changed outside the store")
+    p_show = sub.add_parser("show", help="Print one paper record as JSON")
+    p_show.add_argument("paper_id")
+    p_query = sub.add_parser("query", help="Run SQL against the store (read-only by default)")
+    p_query.add_argument("sql")
+    p_query.add_argument("--json", action="store_true", help="Print rows as JSON")
+    p_query.add_argument("--write", action="store_true", help="Allow statements that modify data")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    if args.command == "import":
+        print(f"Imported {import_json(conn)} papers into {args.db}")
+    elif args.command == "export":
+        try:
+            changed = export_json(conn, force=args.force)
+        except RuntimeError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        print(f"{PAPERS_JSON}: {'written' if changed else 'unchanged'}")
+    elif args.command == "show":
+        paper = get_paper(conn, args.paper_id)
+        if paper is None:
+            print(f"ERROR: Paper ID '{args.paper_id}' not found")
+            sys.exit(1)
+        print(json.dumps(paper, ensure_ascii=False, indent=2))
+    elif args.command == "query":
+        if not args.write:
+            conn.execute("PRAGMA query_only = ON")
+        try:
+            run_query(conn, args.sql, args.json)
+        except sqlite3.Error as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""Single-pass ingestion of ISSCC 2026 session PDFs.
+
+Each session PDF is opened once and every page's text is read once. From that
+pass we build the page -> paper index and hand each paper to a list of
+consumers, which emit the per-paper outputs:
+
+  text      - data/markdown/{paper_id}.md        (export_markdown.py; --layout
+              rebuilds columns and paragraphs, see pdf_layout.py)
+  figures   - images/{paper_id}/fig_{n}.png       (extract_all_figures.py)
+  pages     - images/{paper_id}/page_{n}.png      (extract_images.py)
+
+The individual scripts remain runnable on their own; running this module
+produces any combination of their outputs while parsing each PDF only once:
+
+  python3 scripts/pdf_ingest.py --text --figures --pages
+"""
+
+import argparse
+import functools
+import multiprocessing.util
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz
+
+BASE = "/home/sdu/obsidian/isscc_accelerator"
+PDF_DIR = os.path.join(BASE, "pdfs")
+
+# Page header: "SESSION X / Session Title / X.Y"
+HEADER_PATTERN = re.compile(r'SESSION\s+\d+\s*/[^/]+/\s*(\d+\.\d+)')
+# Figure pages are also detected via "Figure X.Y.Z" captions
+FIGURE_ID_PATTERN = re.compile(r'Figure\s+(\d+\.\d+)\.\d+')
+
+# Only the top of a page is searched for the header / figure ids
+INDEX_TEXT_CHARS = 500
+
+# Minimum image dimensions to filter out tiny decorative images
+MIN_WIDTH = 200
+MIN_HEIGHT = 200
+ROW_THRESHOLD = 30
+PAGE_MID_X = 306
+
+
+def paper_sort_key(paper_id):
+    """Sort key for paper IDs like '2.10' -> (2, 10)."""
+    session, num = paper_id.split('.')
+    return int(session), int(num)
+
+
+def build_paper_index(page_texts):
+    """Map paper IDs to their page indices from already-extracted page texts."""
+    paper_pages = {}
+    for i, full_text in enumerate(page_texts):
+        text = full_text[:INDEX_TEXT_CHARS]
+        m = HEADER_PATTERN.search(text)
+        if m:
+            pid = m.group(1)
+            if pid not in paper_pages:
+                paper_pages[pid] = []
+            paper_pages[pid].append(i)
+        for fig_id in FIGURE_ID_PATTERN.findall(text):
+            if fig_id not in paper_pages:
+                paper_pages[fig_id] = []
+            if i not in paper_pages[fig_id]:
+                paper_pages[fig_id].append(i)
+    return paper_pages
+
+
+class SessionPDF:
+    """An open session PDF with per-page text, images and layout cached.
+
+    Without paper_pages this runs the single text pass and builds the page
+    -> paper index from it. A pool worker gets the parent's index instead,
+    so it only opens the file and reads the pages its papers need.
+    """
+
+    def __init__(self, pdf_path, paper_pages=None):
+        self.path = pdf_path
+        self.name = os.path.basename(pdf_path)
+        self.doc = fitz.open(pdf_path)
+        self._texts = {}
+        if paper_pages is None:
+            # The single text pass: every later lookup reads from the cache
+            page_texts = [page.get_text() for page in self.doc]
+            self._texts = dict(enumerate(page_texts))
+            paper_pages = build_paper_index(page_texts)
+        self.paper_pages = paper_pages
+        self._images = {}
+        self._dicts = {}
+
+    @property
+    def page_count(self):
+        return self.doc.page_count
+
+    def page_text(self, page_num):
+        """Cached page.get_text()."""
+        if page_num not in self._texts:
+            self._texts[page_num] = self.doc[page_num].get_text()
+        return self._texts[page_num]
+
+    def page_images(self, page_num):
+        """Cached page.get_images(full=True)."""
+        if page_num not in self._images:
+            self._images[page_num] = self.doc[page_num].get_images(full=True)
+        return self._images[page_num]
+
+    def page_dict(self, page_num):
+        """Cached page.get_text("dict") layout blocks."""
+        if page_num not in self._dicts:
+            self._dicts[page_num] = self.doc[page_num].get_text("dict")
+        return self._dicts[page_num]
+
+    def paper_ids(self):
+        return sorted(self.paper_pages.keys(), key=paper_sort_key)
+
+    def paper(self, paper_id):
+        """Paper view for a single paper ID."""
+        return Paper(self, paper_id, sorted(self.paper_pages[paper_id]))
+
+    def papers(self):
+        """Yield a Paper view for every paper found in this PDF, in ID order."""
+        for pid in self.paper_ids():
+            yield self.paper(pid)
+
+    def close(self):
+        self.doc.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Paper:
+    """One paper's pages inside a SessionPDF."""
+
+    def __init__(self, session, paper_id, pages):
+        self.session = session
+        self.id = paper_id
+        self.pages = pages
+        self._caption_re = re.compile(rf'Figure\s+{re.escape(paper_id)}\.(\d+)')
+
+    @property
+    def doc(self):
+        return self.session.doc
+
+    def markdown(self):
+        """Paper text in the data/markdown/{id}.md layout (one block per page)."""
+        md_lines = [f"# Paper {self.id}\n\n"]
+        for page_num in self.pages:
+            md_lines.append(self.session.page_text(page_num))
+            md_lines.append("\n\n---\n\n")
+        return "".join(md_lines)
+
+    def layout_markdown(self):
+        """Like markdown(), but each page is rebuilt from its layout blocks:
+        one paragraph per line-joined block of text in reading order, blank
+        lines between them, the page's captions last (see pdf_layout.py)."""
+        import pdf_layout  # Only --layout text needs it
+        md_lines = [f"# Paper {self.id}\n\n"]
+        for page_num in self.pages:
+            body, captions = pdf_layout.page_paragraphs(self.session.page_dict(page_num))
+            md_lines.append("\n\n".join(body + captions))
+            md_lines.append("\n\n---\n\n")
+        return "".join(md_lines)
+
+    def figure_pages(self):
+        """Pages with embedded images (typically pages 2,3 of each paper)."""
+        return [pn for pn in self.pages if len(self.session.page_images(pn)) > 0]
+
+    def caption_pages(self):
+        """Pages carrying at least one 'Figure {id}.N' caption."""
+        return [pn for pn in self.pages
+                if self._caption_re.search(self.session.page_text(pn))]
+
+    def expected_figure_count(self):
+        """Count expected figures from captions."""
+        fig_nums = set()
+        for page_num in self.pages:
+            for m in self._caption_re.finditer(self.session.page_text(page_num)):
+                fig_nums.add(int(m.group(1)))
+        return len(fig_nums)
+
+    def bitmap_figures(self, pages=None):
+        """Collect embedded bitmap figures, sorted top-to-bottom, left-to-right.
+
+        Returns a list of {xref, image_data, ext, width, height, page, x, y}.
+        """
+        if pages is None:
+            pages = self.figure_pages()
+        all_figures = []
+
+        for page_num in pages:
+            page = self.doc[page_num]
+            for img_info in self.session.page_images(page_num):
+                xref = img_info[0]
+                try:
+                    base_image = self.doc.extract_image(xref)
+                except Exception:
+                    continue
+
+                w = base_image["width"]
+                h = base_image["height"]
+                if w < MIN_WIDTH or h < MIN_HEIGHT:
+                    continue
+
+                rects = page.get_image_rects(xref)
+                if not rects:
+                    continue
+
+                rect = rects[0]
+                all_figures.append({
+                    "xref": xref,
+                    "image_data": base_image["image"],
+                    "ext": base_image["ext"],
+                    "width": w,
+                    "height": h,
+                    "page": page_num,
+                    "y": rect.y0,
+                    "x": rect.x0,
+                })
+
+        return sort_by_reading_order(all_figures)
+
+    def captions(self, pages=None):
+        """Find 'Figure X.Y.Z' caption lines with their page positions."""
+        if pages is None:
+            pages = self.caption_pages()
+        captions = []
+        for page_num in pages:
+            page_rect = self.doc[page_num].rect
+            for block in self.session.page_dict(page_num)["blocks"]:
+                if block["type"] != 0:
+                    continue
+                for line in block["lines"]:
+                    line_text = "".join(span["text"] for span in line["spans"])
+                    m = self._caption_re.search(line_text)
+                    if not m:
+                        continue
+                    x0, y0, x1, y1 = line["bbox"]
+                    captions.append({
+                        "fig_num": int(m.group(1)),
+                        "x0": x0,
+                        "y0": y0,
+                        "x1": x1,
+                        "y1": y1,
+                        "text": line_text,
+                        "page_num": page_num,
+                        "page_width": page_rect.width,
+                        "page_height": page_rect.height,
+                        "column": 0 if (x0 + x1) / 2 < PAGE_MID_X else 1,
+                    })
+        return captions
+
+    def render_page(self, page_num, zoom, clip=None):
+        """Render a page (or a clip of it) to a pixmap."""
+        mat = fitz.Matrix(zoom, zoom)
+        if clip is None:
+            return self.doc[page_num].get_pixmap(matrix=mat)
+        return self.doc[page_num].get_pixmap(matrix=mat, clip=clip)
+
+
+def sort_by_reading_order(figures):
+    """Sort by page, then row (y within ROW_THRESHOLD), then column (x)."""
+    figures = sorted(figures, key=lambda f: (f["page"], f["y"], f["x"]))
+    if not figures:
+        return figures
+
+    rows = []
+    current_row = [figures[0]]
+    current_page = figures[0]["page"]
+    current_y = figures[0]["y"]
+
+    for fig in figures[1:]:
+        if fig["page"] == current_page and abs(fig["y"] - current_y) < ROW_THRESHOLD:
+            current_row.append(fig)
+        else:
+            rows.append(current_row)
+            current_row = [fig]
+            current_page = fig["page"]
+            current_y = fig["y"]
+    rows.append(current_row)
+
+    sorted_figures = []
+    for row in rows:
+        row.sort(key=lambda f: f["x"])
+        sorted_figures.extend(row)
+    return sorted_figures
+
+
+def list_session_pdfs(pdf_dir=PDF_DIR):
+    """Sorted list of session PDF paths."""
+    return [os.path.join(pdf_dir, name) for name in sorted(os.listdir(pdf_dir))
+            if name.endswith('.pdf')]
+
+
+def iter_sessions(pdf_dir=PDF_DIR):
+    """Open each session PDF once, yielding a SessionPDF and closing it afterwards."""
+    for pdf_path in list_session_pdfs(pdf_dir):
+        with SessionPDF(pdf_path) as session:
+            yield session
+
+
+def run(consumers, pdf_dir=PDF_DIR):
+    """Drive the single pass: every consumer sees every paper of every PDF.
+
+    A consumer is a callable taking a Paper. Its return values are collected
+    per consumer in paper order and returned as a list of lists.
+    """
+    results = [[] for _ in consumers]
+    for session in iter_sessions(pdf_dir):
+        print(f"Processing {session.name} ({session.page_count} pages)...")
+        for paper in session.papers():
+            for i, consumer in enumerate(consumers):
+                results[i].append(consumer(paper))
+    return results
+
+
+# Per-process state: each pool worker keeps the PDF it is working on open
+_worker_sessions = {}
+
+
+def _close_worker_sessions():
+    for session in _worker_sessions.values():
+        session.close()
+    _worker_sessions.clear()
+
+
+def _init_worker():
+    # Run at worker exit; atexit hooks are skipped in forked pool workers
+    multiprocessing.util.Finalize(None, _close_worker_sessions, exitpriority=0)
+
+
+def _worker_session(pdf_path, paper_pages):
+    session = _worker_sessions.get(pdf_path)
+    if session is None:
+        # Tasks arrive in PDF order: the previous PDF is done with
+        _close_worker_sessions()
+        session = _worker_sessions[pdf_path] = SessionPDF(pdf_path, paper_pages)
+    return session
+
+
+def _run_task(consumer, pdf_path, paper_pages, paper_id):
+    return consumer(_worker_session(pdf_path, paper_pages).paper(paper_id))
+
+
+def run_parallel(consumer, jobs, pdf_dir=PDF_DIR):
+    """Fan a consumer out over (PDF, paper) pairs on a process pool.
+
+    The page -> paper index is built once here; workers only open the PDF
+    and read the pages of their papers. The consumer must be a module-level
+    function (it is pickled to the workers). Results come back in the same
+    order as run() would produce them, regardless of which worker finishes
+    first.
+    """
+    tasks = []
+    for session in iter_sessions(pdf_dir):
+        print(f"Indexed {session.name} ({session.page_count} pages)")
+        tasks.extend((session.path, session.paper_pages, pid) for pid in session.paper_ids())
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as pool:
+        futures = [pool.submit(_run_task, consumer, pdf_path, paper_pages, pid)
+                   for pdf_path, paper_pages, pid in tasks]
+        return [f.result() for f in futures]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Ingest ISSCC session PDFs once and emit text, figures and page renders"
+    )
+    parser.add_argument("--text", action="store_true",
+                        help="Write data/markdown/{id}.md")
+    parser.add_argument("--figures", action="store_true",
+                        help="Extract individual figures to images/{id}/fig_{n}.png")
+    parser.add_argument("--pages", action="store_true",
+                        help="Render full pages to images/{id}/page_{n}.png")
+    parser.add_argument("--layout", action="store_true",
+                        help="--text: rebuild columns and paragraphs from block coordinates")
+    args = parser.parse_args()
+
+    if not (args.text or args.figures or args.pages):
+        args.text = args.figures = args.pages = True
+
+    # Imported here: the consumer scripts themselves import this module
+    consumers = []
+    if args.text:
+        import export_markdown
+        os.makedirs(export_markdown.MD_DIR, exist_ok=True)
+        consumers.append(functools.partial(export_markdown.export_paper, layout=args.layout))
+    if args.figures:
+        import extract_all_figures
+        consumers.append(extract_all_figures.extract_paper)
+    if args.pages:
+        import extract_images
+        consumers.append(extract_images.render_paper_pages)
+
+    results = run(consumers)
+
+    if args.figures:
+        idx = consumers.index(extract_all_figures.extract_paper)
+        extract_all_figures.report(results[idx])
+
+    print(f"\nDone! Ingested {len(results[0])} papers in a single pass.")
+
+
+if __name__ == "__main__":
+    main()
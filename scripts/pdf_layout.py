@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Layout-aware page text from PyMuPDF get_text("dict") blocks.
+
+page.get_text() returns blocks in content-stream order, which interleaves
+the two columns with page headers, footers, sidebars and the text inside
+figures. page_paragraphs() rebuilds a page from block coordinates instead:
+
+  - running headers/footers are dropped by position (blocks entirely in
+    the top HEADER_BAND / bottom FOOTER_BAND of the page), as are rotated
+    lines (the vertical sidebar) and text lying on an embedded image
+  - blocks are assigned to the left or right column, or to "spanning" when
+    they cross the page middle (titles, wide figures)
+  - reading order: top to bottom in bands separated by spanning blocks,
+    the left column before the right within a band
+  - lines are joined into paragraphs (undoing end-of-line hyphenation); an
+    indented line starts a new paragraph, and a paragraph cut by a column
+    break is joined back together
+  - "Figure X.Y.Z:" captions are returned separately, in reading order
+
+Each paragraph is one line of text, so downstream parsing (build_text_json,
+restructure_data's caption extraction) needs no line re-joining.
+"""
+
+from pdf_text import CAPTION_START, SENTENCE_END, join_lines
+
+HEADER_BAND = 0.06
+FOOTER_BAND = 0.06
+# Blocks within this fraction of the page width of the middle still count
+# as one column (ragged column edges)
+COLUMN_TOLERANCE = 0.02
+# A line starting this many points right of its block starts a paragraph
+PARAGRAPH_INDENT = 5
+
+
+def _inside(bbox, outer):
+    """True if the centre of bbox lies in outer."""
+    x, y = (bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2
+    return outer[0] <= x <= outer[2] and outer[1] <= y <= outer[3]
+
+
+def text_blocks(page_dict):
+    """Body text blocks of a page: [{"bbox", "lines": [(x0, text)]}].
+
+    Drops header/footer bands, rotated lines and text on images.
+    """
+    width, height = page_dict["width"], page_dict["height"]
+    images = [b["bbox"] for b in page_dict["blocks"] if b["type"] == 1]
+    top, bottom = height * HEADER_BAND, height * (1 - FOOTER_BAND)
+
+    blocks = []
+    for block in page_dict["blocks"]:
+        if block["type"] != 0:
+            continue
+        x0, y0, x1, y1 = block["bbox"]
+        if y1 <= top or y0 >= bottom:
+            continue
+        if any(_inside(block["bbox"], image) for image in images):
+            continue
+        lines = []
+        for line in block["lines"]:
+            if abs(line["dir"][1]) > 0.01:
+                continue  # Vertical sidebar text
+            text = "".join(span["text"] for span in line["spans"]).strip()
+            if text:
+                lines.append((line["bbox"][0], text))
+        if lines:
+            blocks.append({"bbox": (x0, y0, x1, y1), "lines": lines})
+    return blocks
+
+
+def column_of(bbox, page_width):
+    """0 (left), 1 (right) or None (spans the page middle)."""
+    mid = page_width / 2
+    tolerance = page_width * COLUMN_TOLERANCE
+    if bbox[2] <= mid + tolerance:
+        return 0
+    if bbox[0] >= mid - tolerance:
+        return 1
+    return None
+
+
+def reading_order(blocks, page_width):
+    """Blocks sorted for reading: bands split by spanning blocks, left column first."""
+    ordered = []
+    band = []
+
+    def flush():
+        band.sort(key=lambda b: (column_of(b["bbox"], page_width), b["bbox"][1], b["bbox"][0]))
+        ordered.extend(band)
+        band.clear()
+
+    for block in sorted(blocks, key=lambda b: (b["bbox"][1], b["bbox"][0])):
+        if column_of(block["bbox"], page_width) is None:
+            flush()
+            ordered.append(block)
+        else:
+            band.append(block)
+    flush()
+    return ordered
+
+
+def block_paragraphs(block):
+    """Lines of a block grouped into paragraphs at indented first lines."""
+    left = min(x0 for x0, _ in block["lines"])
+    paragraphs = []
+    current = []
+    for x0, text in block["lines"]:
+        if current and x0 - left >= PARAGRAPH_INDENT:
+            paragraphs.append(current)
+            current = []
+        current.append(text)
+    paragraphs.append(current)
+    return [join_lines(lines) for lines in paragraphs]
+
+
+def page_paragraphs(page_dict):
+    """(body paragraphs, caption paragraphs) of one page, each in reading order."""
+    blocks = reading_order(text_blocks(page_dict), page_dict["width"])
+    body, captions = [], []
+    for block in blocks:
+        for para in block_paragraphs(block):
+            if not para:
+                continue
+            if CAPTION_START.match(para):
+                captions.append(para)
+            elif body and not SENTENCE_END.search(body[-1]) and para[:1].islower():
+                # Continues across a column or block break
+                body[-1] = join_lines([body[-1], para])
+            else:
+                body.append(para)
+    return body, captions
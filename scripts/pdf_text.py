@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""Paragraph rules shared by the PDF text parsers.
+
+build_text_json.py (text.md lines) and pdf_layout.py (get_text("dict")
+blocks) join PDF lines into paragraphs the same way and recognise the same
+caption and sentence ends. Kept free of other script imports so pdf_layout
+stays cheap to load.
+"""
+
+import re
+
+CAPTION_START = re.compile(r'^Figure\s+\d+\.\d+\.\d+\s*:')
+SENTENCE_END = re.compile(r'[.:?!)\]]["”]?$')
+
+
+def join_lines(lines):
+    """Join PDF lines into one paragraph, undoing end-of-line hyphenation."""
+    text = ""
+    for line in lines:
+        line = line.strip()
+        if not text:
+            text = line
+        elif re.search(r'[a-z]-$', text) and line[:1].islower():
+            text = text[:-1] + line
+        else:
+            text += " " + line
+    return re.sub(r'\s+', ' ', text).strip()
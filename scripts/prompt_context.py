@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Token-budgeted paper context for LLM prompts.
+
+Instead of slicing text.md at a fixed character count, the paper is split
+into paragraphs, each paragraph is scored for relevance, and the best ones
+are packed into a token budget. Raw page text (page.get_text()) has no
+blank lines between paragraphs, so lines are re-joined into paragraphs
+with build_text_json's rules (short line ending a sentence, labels and
+captions on their own) before scoring. The packed paragraphs are emitted in their
+original order, with "[...]" marking skipped text.
+
+Relevance (highest first):
+  - the abstract (the paragraph before the "Abstract" label)
+  - paragraphs referencing the comparison figures (Figure x.y.6 / x.y.7 by
+    default), found with extract_figure_paragraphs' reference pattern
+  - paragraphs with numbers + metric units (TOPS/W, mW, mm², MHz, nm, ...)
+  - paragraphs referencing any other figure
+  - the opening paragraphs (title, problem statement)
+
+An optional focus pattern weighs paragraphs by its cue hits on top of
+this, for prompts that ask about only some fields (see metric_gaps.py).
+
+Tokens are counted with tiktoken when it is installed, otherwise estimated
+at 4 characters per token.
+"""
+
+import re
+
+from build_text_json import page_paragraphs, split_pages
+from extract_figure_paragraphs import FIGURE_REF_PATTERN, extract_figure_number
+from llm_client import CHARS_PER_TOKEN
+from pdf_text import join_lines
+
+COMPARISON_FIGURES = (6, 7)
+ELISION = "[...]"
+
+ABSTRACT_LABEL = re.compile(r'^\s*Abstract\s*$')
+METRIC_PATTERN = re.compile(
+    r'\d[\d.,]*\s*(?:[TGM]?OPS/W|[TGM]?OPS|[µμum]?W\b|mm2|mm²|[GMk]Hz|nm\b|[µμnp]J|mV\b|V\b|KB\b|MB\b|%)',
+    re.IGNORECASE
+)
+
+_encoders = {}
+
+
+def _encoder(model):
+    if model not in _encoders:
+        try:
+            import tiktoken
+        except ImportError:
+            _encoders[model] = None
+            return None
+        try:
+            _encoders[model] = tiktoken.encoding_for_model(model) if model else None
+        except KeyError:
+            _encoders[model] = None
+        if _encoders[model] is None:
+            _encoders[model] = tiktoken.get_encoding("cl100k_base")
+    return _encoders[model]
+
+
+def count_tokens(text, model=None):
+    """Token count of text (tiktoken if available, else a chars/4 estimate)."""
+    encoder = _encoder(model)
+    if encoder is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text, budget, model=None):
+    """Cut text to at most `budget` tokens, preferring a sentence boundary."""
+    if count_tokens(text, model) <= budget:
+        return text
+    encoder = _encoder(model)
+    if encoder is None:
+        cut = text[:budget * CHARS_PER_TOKEN]
+    else:
+        cut = encoder.decode(encoder.encode(text, disallowed_special=())[:budget])
+    sentence_end = cut.rfind(". ")
+    if sentence_end > len(cut) // 2:
+        cut = cut[:sentence_end + 1]
+    return cut
+
+
+def split_paragraphs(text):
+    """text.md (raw or --layout) -> paragraphs, each with its lines joined."""
+    paragraphs = []
+    for page in split_pages(text):
+        paragraphs.extend(join_lines(lines) for lines in page_paragraphs(page))
+    return [p for p in paragraphs if p]
+
+
+def score_paragraphs(paragraphs, figures=COMPARISON_FIGURES, focus=None):
+    """Relevance score per paragraph (higher is more useful for prompts)."""
+    scores = [0.0] * len(paragraphs)
+    for i, para in enumerate(paragraphs):
+        if focus is not None:
+            scores[i] += 40 * min(len(focus.findall(para)), 4)
+
+        if ABSTRACT_LABEL.match(para) and i > 0:
+            scores[i - 1] += 100
+
+        fig_nums = {extract_figure_number(None, ref) for ref in FIGURE_REF_PATTERN.findall(para)}
+        if fig_nums & set(figures):
+            scores[i] += 50
+        elif fig_nums:
+            scores[i] += 10
+
+        # Metric-bearing text: a few hits per paragraph is enough to rank it
+        scores[i] += 5 * min(len(METRIC_PATTERN.findall(para)), 6)
+
+        if i < 3:
+            scores[i] += 8 - 2 * i
+    return scores
+
+
+def build_context(text, token_budget, model=None, figures=COMPARISON_FIGURES, focus=None):
+    """Pack the most relevant paragraphs of `text` into `token_budget` tokens.
+
+    Returns the text unchanged if it already fits or if token_budget is
+    falsy (no limit). focus is an optional compiled regex of cues that
+    should win the budget (see score_paragraphs()).
+    """
+    if not token_budget or count_tokens(text, model) <= token_budget:
+        return text
+
+    paragraphs = split_paragraphs(text)
+    scores = score_paragraphs(paragraphs, figures, focus)
+    order = sorted(range(len(paragraphs)), key=lambda i: (-scores[i], i))
+
+    elision_cost = count_tokens("\n\n" + ELISION, model)
+    chosen = {}
+    remaining = token_budget
+    for i in order:
+        if remaining <= elision_cost:
+            break
+        cost = count_tokens(paragraphs[i], model) + elision_cost
+        if cost <= remaining:
+            chosen[i] = paragraphs[i]
+            remaining -= cost
+        elif not chosen:
+            # The single best paragraph is larger than the budget: keep its head
+            chosen[i] = truncate_to_tokens(paragraphs[i], remaining - elision_cost, model)
+            remaining = 0
+
+    parts = []
+    prev = -1
+    for i in sorted(chosen):
+        if i != prev + 1:
+            parts.append(ELISION)
+        parts.append(chosen[i])
+        prev = i
+    if prev != len(paragraphs) - 1:
+        parts.append(ELISION)
+    return "\n\n".join(parts)
@@ -7,19 +7,29 @@ Creates per-paper directories:
     figures.json  - figure captions with image paths
 
 Also cleans captions of ISSCC headers/footers.
+
+Papers whose inputs (markdown text, extracted figure files, this script)
+are unchanged since the last run are skipped; see build_cache.py. Use
+--force to rebuild everything.
 """
 
+import argparse
 import json
 import os
 import re
 import shutil
 import glob
 
+import paper_store
+from build_cache import BuildManifest, file_digest, input_digest, script_version, value_digest
+
 BASE = "/home/sdu/obsidian/isscc_accelerator"
 DATA_DIR = os.path.join(BASE, "data")
 MD_DIR = os.path.join(DATA_DIR, "markdown")
 IMG_DIR = os.path.join(BASE, "images")
 
+STAGE = "restructure_data"
+
 
 def clean_caption(text):
     """Remove ISSCC headers, footers, copyright, and page artifacts from caption text."""
@@ -102,16 +112,36 @@ def find_figure_image(paper_id, fig_num):
     return None
 
 
-def restructure_paper(paper_id):
+def figure_files(paper_id):
+    """Sorted fig_* file names for a paper (find_figure_image depends on these)."""
+    fig_dir = os.path.join(IMG_DIR, paper_id)
+    if not os.path.isdir(fig_dir):
+        return []
+    return sorted(f for f in os.listdir(fig_dir) if f.startswith("fig_"))
+
+
+def restructure_paper(paper_id, manifest=None, force=False):
     """Create data/{paper_id}/ directory with text.md and figures.json."""
     paper_dir = os.path.join(DATA_DIR, paper_id)
     os.makedirs(paper_dir, exist_ok=True)
 
-    # Migrate markdown
     src_md = os.path.join(MD_DIR, f"{paper_id}.md")
     dst_md = os.path.join(paper_dir, "text.md")
+    figures_path = os.path.join(paper_dir, "figures.json")
 
-    if os.path.exists(src_md):
+    # Skip papers whose inputs are unchanged since the last build
+    src_digest = file_digest(src_md)
+    dst_digest = file_digest(dst_md)
+    key = input_digest(src_digest or dst_digest,
+                       value_digest(figure_files(paper_id)),
+                       script_version(__file__))
+    if manifest is not None and not force and \
+            manifest.is_fresh(STAGE, paper_id, key, [figures_path]):
+        with open(figures_path, "r", encoding="utf-8") as f:
+            return len(json.load(f))
+
+    # Migrate markdown (only when its content actually changed)
+    if src_digest is not None and src_digest != dst_digest:
         shutil.copy2(src_md, dst_md)
 
     # Read text for caption extraction
@@ -135,28 +165,37 @@ def restructure_paper(paper_id):
         })
 
     # Write figures.json
-    figures_path = os.path.join(paper_dir, "figures.json")
     with open(figures_path, "w", encoding="utf-8") as f:
         json.dump(figures, f, indent=2, ensure_ascii=False)
 
+    if manifest is not None:
+        manifest.record(STAGE, paper_id, key)
     return len(figures)
 
 
 def main():
-    # Load papers.json to get all paper IDs
-    papers_path = os.path.join(DATA_DIR, "papers.json")
-    with open(papers_path, "r", encoding="utf-8") as f:
-        papers = json.load(f)
+    parser = argparse.ArgumentParser(
+        description="Create per-paper data directories and figures.json"
+    )
+    parser.add_argument("--force", action="store_true",
+                        help="Rebuild every paper, ignoring the build manifest")
+    args = parser.parse_args()
+
+    manifest = BuildManifest()
+
+    papers = paper_store.get_papers(paper_store.connect())
 
     total_captions = 0
     paper_ids = [p["id"] for p in papers]
 
     for pid in sorted(paper_ids,
                       key=lambda x: (int(x.split('.')[0]), int(x.split('.')[1]))):
-        count = restructure_paper(pid)
+        count = restructure_paper(pid, manifest, args.force)
         total_captions += count
         print(f"  Paper {pid}: {count} figure captions")
 
+    manifest.save()
+
     print(f"\n{'='*60}")
     print(f"Total: {total_captions} captions from {len(paper_ids)} papers")
     print(f"Data directories created in {DATA_DIR}/")
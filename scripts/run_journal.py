@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Append-only JSONL journal of per-paper results for long LLM runs.
+
+Each completed paper is appended as one line and fsynced before the run
+moves on, so an interrupted run (crash, Ctrl-C, lost connection) keeps
+every result it already paid for:
+
+  {"run": {"started": 1760000000.0, "model": "gpt-4o", ...}}      one per run
+  {"paper_id": "31.3", "status": "ok", "result": {...}, "time": ...}
+  {"paper_id": "31.4", "status": "failed", "error": "...", "time": ...}
+
+Usage from a stage script:
+
+    journal = RunJournal(journal_path(STAGE))
+    done = journal.completed() if args.resume else {}
+    if not args.resume:
+        journal.reset()
+    journal.start_run(model=backend.model)
+    ...
+    journal.append(pid, "ok", result=metrics)
+
+A partially written last line (the process died mid-write) is ignored.
+Later lines win, so a paper retried after a failure ends up "ok".
+"""
+
+import json
+import os
+import time
+
+from atomic_io import file_lock
+
+BASE = "/home/sdu/obsidian/isscc_accelerator"
+JOURNAL_DIR = os.path.join(BASE, "data", ".journal")
+
+
+def journal_path(stage):
+    return os.path.join(JOURNAL_DIR, f"{stage}.jsonl")
+
+
+class RunJournal:
+    """Per-paper result log; see the module docstring."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def _append_line(self, record):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with file_lock(self.path):
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def records(self):
+        """All intact records, in order."""
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue  # Truncated by a crash mid-write
+        return records
+
+    def runs(self):
+        """Header of every run recorded in the journal."""
+        return [r["run"] for r in self.records() if "run" in r]
+
+    def latest(self):
+        """{paper_id: last record} for every journaled paper."""
+        latest = {}
+        for record in self.records():
+            if "paper_id" in record:
+                latest[record["paper_id"]] = record
+        return latest
+
+    def completed(self):
+        """{paper_id: result} for papers whose last record is "ok"."""
+        return {pid: r.get("result") for pid, r in self.latest().items()
+                if r.get("status") == "ok"}
+
+    def reset(self):
+        """Start a fresh journal (the previous one is kept as <path>.prev)."""
+        with file_lock(self.path):
+            if os.path.exists(self.path):
+                os.replace(self.path, self.path + ".prev")
+
+    def start_run(self, **info):
+        self._append_line({"run": dict(info, started=time.time())})
+
+    def append(self, paper_id, status, result=None, error=None):
+        record = {"paper_id": paper_id, "status": status, "time": time.time()}
+        if result is not None:
+            record["result"] = result
+        if error is not None:
+            record["error"] = str(error)
+        self._append_line(record)
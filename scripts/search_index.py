@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Inverted search index for the overview keyword filter.
+
+build_search_index() turns the paper list into a compact index that
+site/js/overview.js queries instead of substring-scanning every paper:
+
+  {"version": 1,
+   "docs": ["2.1", "2.2", ...],
+   "terms": ["28nm", "3d", "hbm", "堆叠", ...],    sorted, for prefix lookup
+   "postings": [[doc, score, doc, score, ...], ...]}  parallel to "terms"
+
+Tokenization (mirrored by tokenize() in overview.js):
+  - text is lowercased
+  - runs of ASCII letters/digits are one token each ("28nm", "tops", "w")
+  - runs of CJK characters become overlapping bigrams plus the run's last
+    character ("3D堆叠结构" -> "3d", "堆叠", "叠结", "结构", "构")
+
+Scores are per-field weights (FIELD_WEIGHTS) summed over the fields a term
+occurs in, so a title hit outranks a hit in an idea's text.
+"""
+
+import re
+
+INDEX_VERSION = 1
+
+# CJK Extension A, Unified Ideographs, Compatibility Ideographs
+CJK = "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+TOKEN_PATTERN = re.compile(rf"[{CJK}]+|[a-z0-9]+")
+CJK_RUN = re.compile(rf"^[{CJK}]+$")
+
+# Field weights: identifying fields first, long-form text last
+FIELD_WEIGHTS = {
+    "title": 8,
+    "title_zh": 8,
+    "tags": 5,
+    "analytical_tags": 4,
+    "affiliation": 4,
+    "target_model": 3,
+    "challenges": 2,
+    "ideas": 2,
+    "abstract": 1,
+}
+
+
+def tokenize(text):
+    """Lowercased ASCII words and CJK bigrams, in order (duplicates kept)."""
+    tokens = []
+    for run in TOKEN_PATTERN.findall((text or "").lower()):
+        if CJK_RUN.match(run):
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+            # The last character starts no bigram; keep it so a one-character
+            # query prefix-matches every position
+            tokens.append(run[-1])
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def field_texts(paper):
+    """(field, text) pairs indexed for one paper."""
+    pairs = []
+    for field in ("title", "title_zh", "affiliation", "target_model", "abstract"):
+        value = paper.get(field)
+        if isinstance(value, str):
+            pairs.append((field, value))
+    for field in ("tags", "analytical_tags"):
+        pairs.extend((field, tag) for tag in paper.get(field) or [] if isinstance(tag, str))
+    # Chinese summaries and their English translations (text_en)
+    for field in ("challenges", "ideas"):
+        for item in paper.get(field) or []:
+            pairs.append((field, item.get("text", "")))
+            pairs.append((field, item.get("text_en", "")))
+    return pairs
+
+
+def build_search_index(papers):
+    """Compact inverted index over the papers (see module docstring)."""
+    docs = [p["id"] for p in papers]
+    scores = {}  # term -> {doc: score}
+    for doc, paper in enumerate(papers):
+        # A term counts once per field, however often it repeats there (also
+        # across the items of a list field: tags, challenges, ideas)
+        field_terms = {}
+        for field, text in field_texts(paper):
+            field_terms.setdefault(field, set()).update(tokenize(text))
+        for field, field_set in field_terms.items():
+            weight = FIELD_WEIGHTS[field]
+            for term in field_set:
+                by_doc = scores.setdefault(term, {})
+                by_doc[doc] = by_doc.get(doc, 0) + weight
+
+    terms = sorted(scores)
+    postings = []
+    for term in terms:
+        flat = []
+        for doc, score in sorted(scores[term].items()):
+            flat.extend((doc, score))
+        postings.append(flat)
+    return {"version": INDEX_VERSION, "docs": docs, "terms": terms, "postings": postings}
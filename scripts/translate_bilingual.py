@@ -1,19 +1,24 @@
 #!/usr/bin/env python3
-"""Batch translate challenges/ideas to English using original paper text as context."""
+"""Batch translate challenges/ideas to English using original paper text as context.
 
-import json
+Translations are saved to the paper store (paper_store.py) after each paper.
+"""
+
+import argparse
 import os
 import sys
 import time
-import anthropic
+
+import paper_store
+from llm_backend import add_backend_args, backend_from_args
+from prompt_context import build_context
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
 PAPERS_JSON = os.path.join(DATA_DIR, 'papers.json')
+STORE_PATH = os.path.join(DATA_DIR, 'papers.db')
 
-client = anthropic.Anthropic(
-    base_url=os.environ.get('ANTHROPIC_BASE_URL'),
-    api_key=os.environ.get('ANTHROPIC_AUTH_TOKEN')
-)
+# Paper text per prompt (about the old 8000-char slice)
+DEFAULT_TOKEN_BUDGET = 2000
 
 def read_text_md(paper_id):
     path = os.path.join(DATA_DIR, paper_id, 'text.md')
@@ -22,7 +27,7 @@ def read_text_md(paper_id):
             return f.read()
     return ''
 
-def translate_paper(paper, text_md):
+def translate_paper(paper, text_md, backend, token_budget=DEFAULT_TOKEN_BUDGET):
     """Translate challenges and ideas for one paper."""
     challenges = paper.get('challenges', [])
     ideas = paper.get('ideas', [])
@@ -45,7 +50,7 @@ Below is the original English paper text, followed by Chinese challenge/idea sum
 Translate each Chinese summary into concise English (1 sentence each), using the EXACT technical terms and data from the original paper. Do NOT paraphrase — match the paper's terminology precisely.
 
 ## Original Paper Text
-{text_md[:8000]}
+{build_context(text_md, token_budget)}
 
 ## Chinese Summaries to Translate
 
@@ -60,28 +65,32 @@ Return ONLY a JSON object with this exact format (no markdown fences):
 {{"challenges": ["english for C1", "english for C2", ...], "ideas": ["english for I1", "english for I2", ...]}}"""
 
     try:
-        resp = client.messages.create(
-            model='claude-sonnet-4-20250514',
-            max_tokens=2000,
-            messages=[{'role': 'user', 'content': prompt}]
-        )
-        text = resp.content[0].text.strip()
-        # Strip markdown fences if present
-        if text.startswith('```'):
-            text = text.split('\n', 1)[1]
-            if text.endswith('```'):
-                text = text[:-3]
-            elif '```' in text:
-                text = text[:text.rfind('```')]
-        result = json.loads(text.strip())
-        return result.get('challenges', []), result.get('ideas', [])
+        result = backend.complete_json([{'role': 'user', 'content': prompt}],
+                                       label=f"[{paper['id']}]")
     except Exception as e:
         print(f"  ERROR: {e}", file=sys.stderr)
         return None, None
+    parsed = result['parsed']
+    if not isinstance(parsed, dict):
+        print(f"  ERROR: could not parse response", file=sys.stderr)
+        return None, None
+    return parsed.get('challenges', []), parsed.get('ideas', [])
 
 def main():
-    with open(PAPERS_JSON) as f:
-        papers = json.load(f)
+    parser = argparse.ArgumentParser(
+        description="Batch translate challenges/ideas to English (Anthropic by default)"
+    )
+    add_backend_args(parser, provider="anthropic", api_key_required=False)
+    parser.add_argument("--token-budget", type=int, default=DEFAULT_TOKEN_BUDGET,
+                        help="Max tokens of paper text per prompt, 0 = whole text "
+                             f"(default: {DEFAULT_TOKEN_BUDGET})")
+    args = parser.parse_args()
+    if args.api_key is None:
+        args.api_key = os.environ.get('ANTHROPIC_AUTH_TOKEN')
+    backend = backend_from_args(args, max_tokens=2000)
+
+    conn = paper_store.connect(STORE_PATH, PAPERS_JSON)
+    papers = paper_store.get_papers(conn)
 
     total = len(papers)
     for idx, paper in enumerate(papers):
@@ -102,7 +111,7 @@ def main():
         print(f"[{idx+1}/{total}] {pid}: translating {len(challenges)}C + {len(ideas)}I ...")
 
         text_md = read_text_md(pid)
-        en_challenges, en_ideas = translate_paper(paper, text_md)
+        en_challenges, en_ideas = translate_paper(paper, text_md, backend, args.token_budget)
 
         if en_challenges is not None:
             for i, c in enumerate(challenges):
@@ -111,16 +120,14 @@ def main():
             for i, idea in enumerate(ideas):
                 if i < len(en_ideas):
                     idea['text_en'] = en_ideas[i]
+            paper_store.save_translations(conn, paper)
             print(f"  OK: {len(en_challenges)}C + {len(en_ideas)}I translated")
         else:
             print(f"  FAILED")
 
-        # Rate limit
-        time.sleep(0.5)
-
-    # Save
-    with open(PAPERS_JSON, 'w') as f:
-        json.dump(papers, f, ensure_ascii=False, indent=2)
+        # Rate limit (cache hits need none)
+        if backend.calls and not backend.calls[-1]['cached']:
+            time.sleep(0.5)
 
     # Summary
     filled = 0
@@ -133,6 +140,8 @@ def main():
             if i.get('text_en'): filled += 1
             else: empty += 1
     print(f"\nDone: {filled} translated, {empty} remaining empty")
+    backend.report()
+    backend.evict_cache()
 
 if __name__ == '__main__':
     main()
@@ -1,34 +1,67 @@
 #!/usr/bin/env python3
-"""Merge all extracted data into papers.json.
+"""Merge all extracted data into the paper store (paper_store.py).
 
 Reads from:
   - data/{paper_id}/figures.json
   - data/{paper_id}/metrics.json
 
-Updates papers.json with:
+Updates each paper record with:
   - page_images: renamed from images (full page screenshots)
   - figures: array of {num, caption, path}
   - metrics: structured chip metrics object
   - data_path: path to paper data directory
   - markdown_path: updated to new location
+
+A paper is skipped when its figures.json / metrics.json, this script, and
+its own papers.json record are unchanged since the last run (see
+build_cache.py). Only changed papers are written to the store; papers.json
+is exported from it by build_site_data.py. Use --force to update every paper.
 """
 
+import argparse
 import json
 import os
 
+import paper_store
+from build_cache import BuildManifest, file_digest, input_digest, script_version, value_digest
+
 BASE = "/home/sdu/obsidian/isscc_accelerator"
 DATA_DIR = os.path.join(BASE, "data")
-PAPERS_PATH = os.path.join(DATA_DIR, "papers.json")
+
+STAGE = "update_papers_json"
+
+# Fields this stage writes
+MERGED_FIELDS = ["page_images", "figures", "metrics", "process_node", "supply_voltage",
+                 "frequency_mhz", "data_path", "markdown_path"]
 
 
 def main():
-    with open(PAPERS_PATH, "r", encoding="utf-8") as f:
-        papers = json.load(f)
+    parser = argparse.ArgumentParser(
+        description="Merge figures.json and metrics.json into the paper store"
+    )
+    parser.add_argument("--force", action="store_true",
+                        help="Update every paper, ignoring the build manifest")
+    args = parser.parse_args()
+
+    manifest = BuildManifest()
+    version = script_version(__file__)
+
+    conn = paper_store.connect()
+    papers = paper_store.get_papers(conn)
 
     updated = 0
     for paper in papers:
         pid = paper["id"]
         paper_dir = os.path.join(DATA_DIR, pid)
+        inputs = input_digest(file_digest(os.path.join(paper_dir, "figures.json")),
+                              file_digest(os.path.join(paper_dir, "metrics.json")),
+                              version)
+
+        # The record itself is part of the key, so a paper that another stage
+        # rewrote (or that was reset) is merged again
+        if not args.force and manifest.is_fresh(
+                STAGE, pid, input_digest(inputs, value_digest(paper))):
+            continue
 
         # Rename images -> page_images (preserve original page screenshots)
         if "images" in paper and "page_images" not in paper:
@@ -70,13 +103,15 @@ def main():
         paper["data_path"] = f"data/{pid}/"
         paper["markdown_path"] = f"data/{pid}/text.md"
 
+        # Only this stage's fields, so concurrent stages keep theirs
+        paper_store.update_fields(conn, pid, {key: paper[key] for key in MERGED_FIELDS
+                                              if key in paper})
+        manifest.record(STAGE, pid, input_digest(inputs, value_digest(paper)))
         updated += 1
 
-    # Write updated papers.json
-    with open(PAPERS_PATH, "w", encoding="utf-8") as f:
-        json.dump(papers, f, indent=2, ensure_ascii=False)
+    manifest.save()
 
-    print(f"Updated {updated} papers in {PAPERS_PATH}")
+    print(f"Updated {updated}/{len(papers)} papers in {paper_store.STORE_PATH}")
 
     # Stats
     with_figures = sum(1 for p in papers if p.get("figures") and len(p["figures"]) > 0)
@@ -42,44 +42,168 @@
     return dir + '../';
   })();
 
-  // Image directory: use images_web/ for compressed (GitHub Pages), images/ for full-res (local)
-  // Auto-detect: if images_web/ exists, use it; otherwise fall back to images/
-  var imageDir = 'images_web';
-  (function detectImageDir() {
-    var testUrl = basePath + 'images_web/2.1/fig_1.png';
-    var xhr = new XMLHttpRequest();
-    xhr.open('HEAD', testUrl, true);
-    xhr.onload = function () {
-      if (xhr.status >= 400) {
-        window.APP.imageDir = 'images';
-      }
-    };
-    xhr.onerror = function () {
-      window.APP.imageDir = 'images';
-    };
-    xhr.send();
-  })();
-
   window.APP.basePath = basePath;
-  window.APP.imageDir = imageDir;
 
-  // Fetch papers.json
+  // Asset manifest from index.json (scripts/build_site_data.py): which image
+  // sets and reader text files exist per paper. null = unknown (papers.json fallback).
+  window.APP.assets = null;
+
+  // Per-paper detail records, keyed by id (filled from data/{id}/paper.json)
+  window.APP.paperDetails = {};
+  window.APP.shardedData = false;
+
+  function fetchJson(url) {
+    return fetch(url).then(function (res) {
+      if (!res.ok) throw new Error('Failed to load ' + url + ': ' + res.status);
+      return res.json();
+    });
+  }
+
+  function setPapers(data) {
+    window.APP.papers = data;
+    window.APP.filteredPapers = data.slice();
+    return data;
+  }
+
+  // images_web/manifest.json (scripts/build_images_web.py): variant sizes per image.
+  // Only private mode shows images, so public mode never requests it.
+  window.APP.imageManifest = null;
+
+  function loadImageManifest() {
+    var assets = window.APP.assets;
+    if (!window.APP.privateMode || !assets || assets.image_sets.indexOf('images_web') === -1) {
+      return Promise.resolve(null);
+    }
+    return fetchJson(basePath + 'images_web/manifest.json')
+      .then(function (manifest) {
+        window.APP.imageManifest = manifest;
+        return manifest;
+      })
+      .catch(function () { return null; });
+  }
+
+  // Fetch the compact index (overview fields only); fall back to the full papers.json
   function loadPapers() {
     var app = document.getElementById('app');
     app.innerHTML = '<div class="loading"><div class="loading-spinner"></div><div>Loading papers...</div></div>';
 
-    return fetch(basePath + 'data/papers.json')
-      .then(function (res) {
-        if (!res.ok) throw new Error('Failed to load papers.json: ' + res.status);
-        return res.json();
+    return fetchJson(basePath + 'data/index.json')
+      .then(function (index) {
+        window.APP.shardedData = true;
+        window.APP.assets = index.assets || null;
+        return setPapers(index.papers);
+      })
+      .catch(function () {
+        return fetchJson(basePath + 'data/papers.json').then(function (data) {
+          data.forEach(function (p) { window.APP.paperDetails[p.id] = p; });
+          return setPapers(data);
+        });
       })
-      .then(function (data) {
-        window.APP.papers = data;
-        window.APP.filteredPapers = data.slice();
-        return data;
+      .then(function (papers) {
+        return loadImageManifest().then(function () { return papers; });
       });
   }
 
+  // Preferred image directory for a paper: images_web/ when built, else full-res images/
+  window.paperImageDir = function (paperId) {
+    var assets = window.APP.assets;
+    var entry = assets && assets.papers[paperId];
+    return (entry && entry.images && entry.images[0]) || 'images';
+  };
+
+  // Whether data/{id}/{name} exists. Papers the build saw no local files for
+  // (e.g. the public index) are unknown, so callers still try the fetch.
+  window.hasPaperText = function (paperId, name) {
+    var assets = window.APP.assets;
+    var entry = assets && assets.papers[paperId];
+    if (!entry) return true;
+    return !!(entry.text && entry.text.indexOf(name) !== -1);
+  };
+
+  // Manifest entry for an image URL under images_web/, or null
+  window.imageEntry = function (url) {
+    var manifest = window.APP.imageManifest;
+    var prefix = basePath + 'images_web/';
+    if (!manifest || !url || url.indexOf(prefix) !== 0) return null;
+    return manifest.images[url.substring(prefix.length)] || null;
+  };
+
+  function variantSrcset(entry, format) {
+    var prefix = basePath + 'images_web/';
+    return entry.variants.filter(function (v) { return v[format]; }).map(function (v) {
+      return prefix + v[format] + ' ' + v.width + 'w';
+    }).join(', ');
+  }
+
+  // <picture> with AVIF/WebP srcsets and intrinsic size; plain <img> for images
+  // missing from the manifest. attrs is a raw attribute string for the <img>.
+  window.pictureHtml = function (url, alt, sizes, attrs) {
+    var entry = window.imageEntry(url);
+    var img = '<img src="' + escapeHtml(url) + '" alt="' + escapeHtml(alt) + '"' + (attrs ? ' ' + attrs : '');
+    if (!entry) return img + '>';
+
+    img += ' width="' + entry.width + '" height="' + entry.height + '" sizes="' + sizes + '">';
+    var html = '<picture>';
+    ['avif', 'webp'].forEach(function (format) {
+      var srcset = variantSrcset(entry, format);
+      if (srcset) {
+        html += '<source type="image/' + format + '" srcset="' + escapeHtml(srcset) + '" sizes="' + sizes + '">';
+      }
+    });
+    return html + img + '</picture>';
+  };
+
+  // Lightbox <img>: WebP srcset (all current browsers) with the PNG as src
+  function setLightboxSource(img, url) {
+    var entry = window.imageEntry(url);
+    var srcset = entry ? variantSrcset(entry, 'webp') : '';
+    img.removeAttribute('width');
+    img.removeAttribute('height');
+    if (srcset) {
+      img.srcset = srcset;
+      img.sizes = '90vw';
+      img.width = entry.width;
+      img.height = entry.height;
+    } else {
+      img.removeAttribute('srcset');
+      img.removeAttribute('sizes');
+    }
+    img.src = url;
+  }
+
+  // Full record for one paper: resolves to null for unknown ids
+  window.loadPaperDetail = function (id) {
+    var details = window.APP.paperDetails;
+    if (details[id]) return Promise.resolve(details[id]);
+
+    var summary = window.findPaper(id);
+    if (!summary) return Promise.resolve(null);
+    if (!window.APP.shardedData) return Promise.resolve(summary);
+
+    return fetchJson(basePath + 'data/' + encodeURIComponent(id) + '/paper.json')
+      .then(function (paper) {
+        details[id] = paper;
+        return paper;
+      });
+  };
+
+  // data/search.json (scripts/search_index.py): inverted index for the overview
+  // search. Loaded once; resolves to null when missing (substring search fallback).
+  window.APP.searchIndex = null;
+  var searchIndexPromise = null;
+
+  window.loadSearchIndex = function () {
+    if (!searchIndexPromise) {
+      searchIndexPromise = fetchJson(basePath + 'data/search.json')
+        .then(function (index) {
+          window.APP.searchIndex = index;
+          return index;
+        })
+        .catch(function () { return null; });
+    }
+    return searchIndexPromise;
+  };
+
   // Route handler
   function handleRoute() {
     var hash = window.location.hash || '#overview';
@@ -143,7 +267,7 @@
   function showLightboxImage(idx) {
     window.APP.lightboxIndex = idx;
     var img = document.getElementById('lightbox-img');
-    img.src = window.APP.lightboxImages[idx];
+    setLightboxSource(img, window.APP.lightboxImages[idx]);
 
     // Update caption
     var captionEl = document.getElementById('lightbox-caption');
@@ -168,7 +292,7 @@
     window.APP.lightboxIndex = idx;
     var overlay = document.getElementById('lightbox');
     var img = document.getElementById('lightbox-img');
-    img.src = images[idx];
+    setLightboxSource(img, images[idx]);
     overlay.classList.add('active');
 
     // Update caption and counter
@@ -233,6 +357,8 @@
     loadPapers()
       .then(function () {
         handleRoute();
+        // Off the critical path: the first keystroke should not wait for it
+        window.loadSearchIndex();
       })
       .catch(function (err) {
         document.getElementById('app').innerHTML =
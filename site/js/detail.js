@@ -377,9 +377,11 @@
   }
 
   function resolveImagePath(path) {
-    // Replace "images/" prefix with APP.imageDir for compressed/original switching
-    if (path && window.APP.imageDir !== 'images' && path.indexOf('images/') === 0) {
-      return path.replace('images/', window.APP.imageDir + '/');
+    // Swap the "images/" prefix for the paper's preferred image set (asset manifest)
+    var m = path && /^images\/([^\/]+)\//.exec(path);
+    if (m) {
+      var dir = window.paperImageDir(m[1]);
+      if (dir !== 'images') return dir + path.substring('images'.length);
     }
     return path;
   }
@@ -433,7 +435,9 @@
 
     // Fetch text.json for structured content
     var textJsonUrl = basePath + 'data/' + paper.id + '/text.json';
-    fetch(textJsonUrl)
+    var textJson = window.hasPaperText(paper.id, 'text.json') ?
+      fetch(textJsonUrl) : Promise.reject(new Error('No text.json'));
+    textJson
       .then(function (res) {
         if (!res.ok) throw new Error('No text.json');
         return res.json();
@@ -518,7 +522,7 @@
       var html = '<div class="reader-slide">';
       html += '<div class="reader-figure">';
       if (s.imgSrc) {
-        html += '<img src="' + escapeHtml(s.imgSrc) + '" alt="' + escapeHtml(s.label) + '" data-reader-img="true">';
+        html += window.pictureHtml(s.imgSrc, s.label, '(max-width: 900px) 100vw, 50vw', 'data-reader-img="true"');
       }
       html += '</div>';
       html += '<div class="reader-text">';
@@ -584,7 +588,7 @@
       }
 
       // Fallback: load raw text.md (private mode only)
-      if (paper.id) {
+      if (paper.id && window.hasPaperText(paper.id, 'text.md')) {
         ftEl.innerHTML = '<div class="loading"><div class="loading-spinner"></div><div>加载全文...</div></div>';
         contentEl.innerHTML = '';
         contentEl.appendChild(ftEl);
@@ -617,7 +621,7 @@
       figures.forEach(function (fig, idx) {
         var src = basePath + resolveImagePath(fig.path);
         html += '<div class="figure-card" data-reader-gallery-idx="' + idx + '">';
-        html += '<img src="' + escapeHtml(src) + '" alt="Fig. ' + fig.num + '" loading="lazy">';
+        html += window.pictureHtml(src, 'Fig. ' + fig.num, '(max-width: 600px) 100vw, 320px', 'loading="lazy"');
         html += '<div class="figure-label">Fig. ' + fig.num + '</div>';
         if (fig.caption) {
           html += '<div class="figure-caption">' + escapeHtml(fig.caption) + '</div>';
@@ -790,16 +794,35 @@
     }
   }
 
-  window.renderDetail = function (container, id) {
-    var paper = window.findPaper(id);
+  function renderMessage(container, message) {
+    container.innerHTML = '<div class="detail-layout"><div class="detail-page">' +
+      '<div class="detail-nav"><a class="back-link" href="#overview">\u2190 返回总览</a></div>' +
+      '<div class="empty-state"><p>' + escapeHtml(message) + '</p></div></div></div>';
+  }
 
-    if (!paper) {
-      container.innerHTML = '<div class="detail-layout"><div class="detail-page">' +
-        '<div class="detail-nav"><a class="back-link" href="#overview">\u2190 返回总览</a></div>' +
-        '<div class="empty-state"><p>未找到论文: ' + escapeHtml(id) + '</p></div></div></div>';
+  window.renderDetail = function (container, id) {
+    if (!window.findPaper(id)) {
+      renderMessage(container, '未找到论文: ' + id);
       return;
     }
 
+    if (!window.APP.paperDetails[id]) {
+      container.innerHTML = '<div class="loading"><div class="loading-spinner"></div><div>Loading paper...</div></div>';
+    }
+
+    window.loadPaperDetail(id)
+      .then(function (paper) {
+        // Ignore a late response after the user navigated elsewhere
+        if (window.location.hash !== '#paper/' + id) return;
+        renderDetailPage(container, id, paper);
+      })
+      .catch(function (err) {
+        if (window.location.hash !== '#paper/' + id) return;
+        renderMessage(container, '加载失败: ' + err.message);
+      });
+  };
+
+  function renderDetailPage(container, id, paper) {
     var isPrivate = window.APP.privateMode === true;
     var html = '<div class="detail-layout">';
     html += buildSidebar(id);
@@ -863,6 +886,6 @@
 
     // Bind events (for non-private gallery)
     bindDetailEvents(paper);
-  };
+  }
 
 })();
@@ -21,7 +21,7 @@
     { key: 'process_node', label: '工艺', sortable: true },
     { key: 'die_area_mm2', label: '面积', sortable: true },
     { key: 'power_mw', label: '功耗', sortable: true },
-    { key: 'energy_efficiency', label: '能效', sortable: false },
+    { key: 'energy_efficiency', label: '能效', sortable: true },
     { key: 'target_model', label: '目标模型', sortable: true },
     { key: 'analytical_tags', label: '标签', sortable: false }
   ];
@@ -45,9 +45,16 @@
     return paper[key];
   }
 
-  function formatPowerShort(val) {
+  // Canonical number from paper.normalized (scripts/normalize_metrics.py), or
+  // null. papers.json fallback records have no normalized block.
+  function normalizedValue(paper, field) {
+    var entry = paper.normalized && paper.normalized[field];
+    return entry ? entry.value : null;
+  }
+
+  function formatPowerShort(val, mw) {
     if (!val) return '-';
-    var num = parseFloat(val);
+    var num = mw != null ? mw : parseFloat(val);
     if (isNaN(num)) return String(val);
     if (num >= 1000000) return (num / 1000000).toFixed(1) + ' W';
     if (num >= 1000) return (num / 1000).toFixed(1) + ' W';
@@ -59,10 +66,82 @@
     return String.fromCodePoint.apply(null, code.toUpperCase().split('').map(function (c) { return c.charCodeAt(0) + 127397; }));
   }
 
+  // Tokenizer mirrored from scripts/search_index.py: ASCII words, CJK bigrams
+  // plus each CJK run's last character
+  var CJK_RUN = /^[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+$/;
+  var TOKEN_PATTERN = /[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+|[a-z0-9]+/g;
+
+  function tokenize(text) {
+    var tokens = [];
+    var runs = (text || '').toLowerCase().match(TOKEN_PATTERN) || [];
+    runs.forEach(function (run) {
+      if (CJK_RUN.test(run)) {
+        for (var i = 0; i < run.length - 1; i++) tokens.push(run.substr(i, 2));
+        tokens.push(run.charAt(run.length - 1));
+      } else {
+        tokens.push(run);
+      }
+    });
+    return tokens;
+  }
+
+  // First index in sorted terms whose term is >= prefix
+  function lowerBound(terms, prefix) {
+    var lo = 0, hi = terms.length;
+    while (lo < hi) {
+      var mid = (lo + hi) >> 1;
+      if (terms[mid] < prefix) lo = mid + 1; else hi = mid;
+    }
+    return lo;
+  }
+
+  // {paperId: score} for a query: every token must prefix-match some term of
+  // the paper; a token scores its best matching term. null = no usable index.
+  var lastSearch = { query: null, scores: null };
+
+  function searchScores(query) {
+    var index = window.APP.searchIndex;
+    if (!index) return null;
+    if (lastSearch.query === query) return lastSearch.scores;
+
+    var tokens = tokenize(query).filter(function (t, i, all) { return all.indexOf(t) === i; });
+    if (!tokens.length) return null;
+
+    var scores = null;
+    tokens.forEach(function (token) {
+      var best = {};
+      for (var i = lowerBound(index.terms, token); i < index.terms.length; i++) {
+        if (index.terms[i].lastIndexOf(token, 0) !== 0) break;
+        var postings = index.postings[i];
+        for (var j = 0; j < postings.length; j += 2) {
+          var doc = postings[j];
+          if (!best[doc] || postings[j + 1] > best[doc]) best[doc] = postings[j + 1];
+        }
+      }
+      if (scores === null) {
+        scores = best;
+        return;
+      }
+      var merged = {};
+      Object.keys(scores).forEach(function (doc) {
+        if (best[doc]) merged[doc] = scores[doc] + best[doc];
+      });
+      scores = merged;
+    });
+
+    var byId = {};
+    Object.keys(scores).forEach(function (doc) {
+      byId[index.docs[doc]] = scores[doc];
+    });
+    lastSearch = { query: query, scores: byId };
+    return byId;
+  }
+
   function applyFilters() {
     var papers = window.APP.papers;
     var s = window.APP.currentSession;
     var f = window.APP.filters;
+    var scores = f.search ? searchScores(f.search) : null;
 
     var result = papers.filter(function (p) {
       if (s !== 'all' && String(p.session) !== s) return false;
@@ -86,7 +165,9 @@
         if (!allMatch) return false;
       }
 
-      if (f.search) {
+      if (scores) {
+        if (!scores[p.id]) return false;
+      } else if (f.search) {
         var q = f.search.toLowerCase();
         var haystack = [
           p.title, p.title_zh, p.affiliation,
@@ -98,23 +179,54 @@
       return true;
     });
 
-    // Sort
+    // Sort: compute each key once, then compare keys (numeric columns in a typed array)
     if (window.APP.sortCol) {
       var col = window.APP.sortCol;
-      var asc = window.APP.sortAsc;
+      var dir = window.APP.sortAsc ? 1 : -1;
+      var numeric = col in numericSortFields;
+      var keys = numeric ? new Float64Array(result.length) : new Array(result.length);
+      result.forEach(function (p, i) { keys[i] = getSortValue(p, col); });
+      var idx = result.map(function (p, i) { return i; });
+      idx.sort(function (a, b) {
+        // Missing values (Infinity) stay last in both directions
+        if (numeric && (keys[a] === Infinity) !== (keys[b] === Infinity)) {
+          return keys[a] === Infinity ? 1 : -1;
+        }
+        if (keys[a] < keys[b]) return -dir;
+        if (keys[a] > keys[b]) return dir;
+        return a - b;
+      });
+      result = idx.map(function (i) { return result[i]; });
+    } else if (scores) {
+      // No explicit sort column: best search matches first
+      var order = {};
+      result.forEach(function (p, i) { order[p.id] = i; });
       result.sort(function (a, b) {
-        var va = getSortValue(a, col);
-        var vb = getSortValue(b, col);
-        if (va < vb) return asc ? -1 : 1;
-        if (va > vb) return asc ? 1 : -1;
-        return 0;
+        return (scores[b.id] - scores[a.id]) || (order[a.id] - order[b.id]);
       });
     }
 
     window.APP.filteredPapers = result;
   }
 
+  // Numeric sort columns -> normalized field (id sorts by its own number)
+  var numericSortFields = {
+    id: null,
+    process_node: 'process_nm',
+    die_area_mm2: 'die_area_mm2',
+    power_mw: 'power_mw',
+    energy_efficiency: 'energy_efficiency_tops_w'
+  };
+
   function getSortValue(paper, col) {
+    var field = numericSortFields[col];
+    if (field) {
+      var value = normalizedValue(paper, field);
+      if (value === null && !paper.normalized) {
+        value = parseFloat(getMetricValue(paper, col));
+      }
+      return value === null || isNaN(value) ? Infinity : value;
+    }
     switch (col) {
       case 'id':
         return parseFloat(paper.id) || 0;
@@ -122,12 +234,6 @@
         return (paper.title || '').toLowerCase();
       case 'affiliation':
         return (paper.affiliation || '').toLowerCase();
-      case 'process_node':
-        return parseFloat(paper.process_node) || 999;
-      case 'die_area_mm2':
-        return parseFloat(getMetricValue(paper, 'die_area_mm2')) || 999;
-      case 'power_mw':
-        return parseFloat(getMetricValue(paper, 'power_mw')) || 999999;
       case 'target_model':
         return (paper.target_model || '').toLowerCase();
       default:
@@ -423,7 +529,7 @@
 
       // Power (new column)
       var power = getMetricValue(p, 'power_mw');
-      html += '<div class="td">' + escapeHtml(formatPowerShort(power)) + '</div>';
+      html += '<div class="td">' + escapeHtml(formatPowerShort(power, normalizedValue(p, 'power_mw'))) + '</div>';
 
       // Efficiency
       html += '<div class="td">' + escapeHtml(getMetricValue(p, 'energy_efficiency') || '-') + '</div>';
@@ -496,7 +602,8 @@
         clearTimeout(searchTimeout);
         searchTimeout = setTimeout(function () {
           window.APP.filters.search = val;
-          rerender();
+          // Usually already loaded; otherwise wait once rather than substring-scan
+          window.loadSearchIndex().then(rerender);
         }, 200);
       });
     }
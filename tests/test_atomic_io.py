@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Tests for scripts/atomic_io.py and the locked BuildManifest.save()."""
+
+import json
+import os
+import sys
+import tempfile
+from multiprocessing import Pool
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
+
+from atomic_io import write_json  # noqa: E402
+from build_cache import BuildManifest  # noqa: E402
+
+
+def _record_stage(args):
+    path, stage = args
+    # Every worker loads the manifest before any has saved
+    manifest = BuildManifest(path)
+    for i in range(20):
+        manifest.record(stage, f"paper{i}", f"{stage}-{i}")
+        manifest.save()
+
+
+def test_parallel_manifest_saves_merge():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, ".build_manifest.json")
+        stages = [f"stage{n}" for n in range(4)]
+        with Pool(len(stages)) as pool:
+            pool.map(_record_stage, [(path, stage) for stage in stages])
+
+        manifest = BuildManifest(path)
+        for stage in stages:
+            assert manifest.get(stage, "paper19") == f"{stage}-19"
+            assert len(manifest.stages[stage]) == 20
+
+
+def test_write_json_replaces_without_leftovers():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "out.json")
+        write_json(path, {"a": "带宽"})
+        write_json(path, {"a": 2}, indent=1)
+        with open(path, encoding="utf-8") as f:
+            assert json.load(f) == {"a": 2}
+        assert os.listdir(tmp) == ["out.json"]
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"[{name}]")
+            fn()
+            print("  PASSED")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Tests for scripts/bench_metrics.py scoring and offline LLM replay."""
+
+import os
+import sys
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
+
+from bench_metrics import GOLDEN_GROUPS, field_values, new_counts, score_paper, summarize  # noqa: E402
+from llm_backend import LLMBackend, OfflineMiss  # noqa: E402
+from llm_cache import ResponseCache  # noqa: E402
+
+GOLDEN = {
+    "id": "1.1",
+    "process_node": "28nm",
+    "power_mw": "356",
+    "metrics_detailed": {
+        "power": {"values": [{"value": "356", "unit": "mW", "condition": "peak"},
+                             {"value": "1.2", "unit": "W", "condition": "system"}]},
+        "energy_efficiency": {"values": [{"value": "12.5", "unit": "TOPS/W", "condition": ""}]},
+    },
+}
+
+
+def test_golden_values_merge_curated_fields_and_metrics_detailed():
+    assert field_values(GOLDEN, "power_mw", GOLDEN_GROUPS) == [356.0, 1200.0]
+    assert field_values(GOLDEN, "process_nm", GOLDEN_GROUPS) == [28.0]
+    assert field_values(GOLDEN, "frequency_mhz", GOLDEN_GROUPS) == []
+
+
+def test_precision_and_recall():
+    predicted = {"metrics_detailed": {
+        # 356.1 mW is the same value within the rounding tolerance; 90 mW is wrong
+        "power": {"values": [{"value": "356.1", "unit": "mW"}, {"value": "90", "unit": "mW"}]},
+        "technology": "28nm",
+        "frequency": {"values": [{"value": "1", "unit": "GHz"}]},
+    }}
+    counts = new_counts()
+    score_paper(counts, GOLDEN, predicted, ("metrics_detailed",))
+    summary = summarize(counts)
+    assert summary["power_mw"] == {"papers": 1, "precision": 0.5, "recall": 0.5}
+    assert summary["process_nm"] == {"papers": 1, "precision": 1.0, "recall": 1.0}
+    assert summary["energy_efficiency_tops_w"] == {"papers": 1, "precision": None, "recall": 0.0}
+    # No golden frequency: the paper is not scored for it
+    assert summary["frequency_mhz"] == {"papers": 0, "precision": None, "recall": None}
+
+
+def test_offline_backend_replays_recorded_responses_only():
+    messages = [{"role": "user", "content": "Extract metrics"}]
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(tmp)
+        backend = LLMBackend(cache=cache, offline=True)
+        cache.put(backend.cache_key(messages), backend.model, '{"technology": "28nm"}',
+                  {"technology": "28nm"})
+        result = backend.complete_json(messages, label="[1.1]")
+        assert result["cached"] and result["parsed"] == {"technology": "28nm"}
+
+        other = [{"role": "user", "content": "Something else"}]
+        try:
+            backend.complete_json(other, label="[1.2]")
+            raise AssertionError("offline backend called the API")
+        except OfflineMiss as e:
+            assert "[1.2]" in str(e)
+        results = backend.complete_json_batch([("[1.1]", messages), ("[1.2]", other)])
+        assert results[0]["parsed"] == {"technology": "28nm"}
+        assert isinstance(results[1], OfflineMiss)
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"[{name}]")
+            fn()
+            print("  PASSED")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Tests for scripts/build_text_json.py (text.md -> text.json sections)."""
+
+import json
+import os
+import sys
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
+
+import build_text_json  # noqa: E402
+
+TEXT_MD = """# Paper 31.3
+
+ISSCC 2026 / SESSION 31 / DIGITAL ACCELERATORS / 31.3
+Large language models demand high memory bandwidth and energy efficient
+compute, which motivates this work on sparse attention for inference.
+
+Figure 31.3.1 shows the overall architecture of the proposed accel-
+erator, which contains 16 cores and a shared 2MB SRAM buffer for
+weights and activations.
+
+The sparse attention unit (Fig. 31.3.2) skips low-score tokens, and is
+compared against a dense baseline in Fig. 2.1.3 of prior work.
+
+This paper presents a 28nm transformer accelerator achieving 45TOPS/W
+through sparse attention.
+Abstract
+References:
+[1] A. Smith, et al., "Prior Accelerator," ISSCC, 2025.
+DIGEST OF TECHNICAL PAPERS •
+523
+
+---
+
+Figure 31.3.1: Overall architecture of the accelerator.
+PE
+SRAM
+Figure 31.3.2: Sparse attention unit.
+979-8-3315-4101-9/26/$31.00 ©2026 IEEE
+"""
+
+
+def sections_by_type(sections, kind):
+    return [s for s in sections if s["type"] == kind]
+
+
+def test_sections():
+    sections = build_text_json.build_sections("31.3", TEXT_MD)
+
+    body = sections_by_type(sections, "body")
+    assert [s["figure"] for s in body] == [None, 1, 2]
+    assert "accelerator, which" in body[1]["text"]  # hyphenation undone
+
+    abstract = sections_by_type(sections, "abstract")
+    assert len(abstract) == 1 and abstract[0]["text"].startswith("This paper presents")
+
+    captions = sections_by_type(sections, "caption")
+    assert [(c["figure"], c["text"]) for c in captions] == [
+        (1, "Figure 31.3.1: Overall architecture of the accelerator."),
+        (2, "Figure 31.3.2: Sparse attention unit."),
+    ]
+
+    assert len(sections_by_type(sections, "references")) == 1
+    text = json.dumps(sections)
+    assert "DIGEST" not in text and "IEEE" not in text and "SESSION" not in text
+
+
+def test_build_paper_is_incremental():
+    with tempfile.TemporaryDirectory() as tmp:
+        build_text_json.DATA_DIR = tmp
+        os.makedirs(os.path.join(tmp, "31.3"))
+        with open(os.path.join(tmp, "31.3", "text.md"), "w", encoding="utf-8") as f:
+            f.write(TEXT_MD)
+
+        manifest = build_text_json.BuildManifest(os.path.join(tmp, "manifest.json"))
+        assert build_text_json.build_paper("31.3", manifest, version="v1") == 7
+        assert build_text_json.build_paper("31.3", manifest, version="v1") is None
+        assert build_text_json.build_paper("31.3", manifest, version="v2") == 7
+
+        with open(os.path.join(tmp, "31.3", "text.json"), encoding="utf-8") as f:
+            data = json.load(f)
+        assert data["paper_id"] == "31.3" and len(data["sections"]) == 7
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"[{name}]")
+            fn()
+            print("  PASSED")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Tests for the grouped (--batch-size) translation path of scripts/extract_bilingual.py."""
+
+import json
+import os
+import re
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
+
+from extract_bilingual import process_papers_grouped, valid_translation  # noqa: E402
+from llm_backend import LLMBackend  # noqa: E402
+
+PAPERS = [
+    {"id": "1.1", "title": "A", "challenges": [{"text": "挑战一"}], "ideas": [{"text": "想法一"}]},
+    {"id": "1.2", "title": "B", "challenges": [{"text": "挑战二"}, {"text": "挑战三"}],
+     "ideas": [{"text": "想法二"}]},
+    {"id": "1.3", "title": "C", "challenges": [{"text": "挑战四"}], "ideas": []},
+]
+
+
+def translation(paper):
+    return {field: [{"text_en": f"{paper['id']} {field} {i}"} for i in range(len(paper[field]))]
+            for field in ("challenges", "ideas")}
+
+
+class ScriptedBackend(LLMBackend):
+    """Answers translation prompts without a provider, recording each request.
+
+    The grouped request gets one valid section (1.1), one with a challenge
+    missing (1.2) and none for 1.3; single-paper requests are answered in full.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.single = []
+        self.grouped = 0
+
+    def _call_openai(self, messages, max_tokens, on_delta=None):
+        prompt = messages[-1]["content"]
+        single = re.search(r'- Paper ID: (\S+)', prompt)
+        if single:
+            pid = single.group(1)
+            self.single.append(pid)
+            answer = translation(next(p for p in PAPERS if p["id"] == pid))
+        else:
+            self.grouped += 1
+            short = translation(PAPERS[1])
+            short["challenges"].pop()
+            answer = {"1.1": translation(PAPERS[0]), "1.2": short}
+        return json.dumps(answer, ensure_ascii=False), 10, 5
+
+
+def test_valid_translation_checks_item_counts():
+    paper = PAPERS[1]
+    assert valid_translation(paper, translation(paper))
+    short = translation(paper)
+    short["challenges"].pop()
+    assert not valid_translation(paper, short)
+    empty = translation(paper)
+    empty["ideas"][0]["text_en"] = ""
+    assert not valid_translation(paper, empty)
+    assert not valid_translation(paper, None)
+
+
+def test_grouped_retries_only_invalid_sections():
+    backend = ScriptedBackend()
+    results = process_papers_grouped(PAPERS, backend, batch_size=3)
+
+    assert backend.grouped == 1
+    # The valid section is used as is; the short and the missing one are re-asked
+    assert backend.single == ["1.2", "1.3"]
+    assert results == {p["id"]: translation(p) for p in PAPERS}
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"[{name}]")
+            fn()
+            print("  PASSED")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Tests for scripts/image_prep.py. The transform tests need Pillow and
+return early without it; the unchanged-upload fallback runs either way."""
+
+import io
+import os
+import sys
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
+
+import image_prep  # noqa: E402
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+def write_figure(path):
+    """A 1000x600 white PNG with a 400x200 black box and a margin of white."""
+    img = Image.new("RGB", (1000, 600), (255, 255, 255))
+    img.paste((0, 0, 0), (300, 200, 700, 400))
+    img.save(path, "PNG")
+
+
+def cache_files(cache_dir):
+    return sorted(name for _, _, files in os.walk(cache_dir) for name in files)
+
+
+def test_prepare_image_crops_resizes_and_caches():
+    if Image is None:
+        print("  Pillow not installed, skipped")
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "fig_6.png")
+        cache_dir = os.path.join(tmp, "cache")
+        write_figure(src)
+
+        data, media_type = image_prep.prepare_image(src, max_edge=212, cache_dir=cache_dir)
+        assert media_type == "image/jpeg"
+        with Image.open(io.BytesIO(data)) as img:
+            # Cropped to the box plus CROP_MARGIN, then scaled to the long edge
+            assert img.format == "JPEG"
+            assert img.size == (212, 112)
+        assert len(cache_files(cache_dir)) == 1
+
+        # Same source and options: served from the cache
+        assert image_prep.prepare_image(src, max_edge=212, cache_dir=cache_dir) == \
+            (data, media_type)
+        assert len(cache_files(cache_dir)) == 1
+
+        # Other options are another cache entry
+        data, media_type = image_prep.prepare_image(src, max_edge=0, fmt="png", crop=False,
+                                                    cache_dir=cache_dir)
+        assert media_type == "image/png"
+        with Image.open(io.BytesIO(data)) as img:
+            assert img.size == (1000, 600)
+        names = cache_files(cache_dir)
+        assert len(names) == 2
+        assert not any(name.endswith(".tmp") for name in names)
+
+
+def test_original_is_sent_without_pillow():
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "fig_7.png")
+        with open(src, "wb") as f:
+            f.write(b"\x89PNG not decoded")
+        cache_dir = os.path.join(tmp, "cache")
+
+        import_pil = image_prep._import_pil
+        image_prep._import_pil = lambda: None
+        try:
+            result = image_prep.prepare_image(src, cache_dir=cache_dir)
+        finally:
+            image_prep._import_pil = import_pil
+        assert result == (b"\x89PNG not decoded", "image/png")
+        assert not os.path.exists(cache_dir)
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"[{name}]")
+            fn()
+            print("  PASSED")
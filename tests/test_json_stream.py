@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Tests for scripts/json_stream.py and the streamed JSON path of LLMBackend."""
+
+import json
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
+
+from json_stream import JSONStreamError, JSONStreamValidator  # noqa: E402
+from llm_backend import LLMBackend  # noqa: E402
+
+SAMPLE = {"technology": "28nm CMOS", "die_area": {"value": "4.5", "unit": "mm²"},
+          "power": {"values": [{"value": "-1.5e-3", "unit": "W", "condition": "\"idle\""}]},
+          "model_benchmarks": [], "quantization": None, "notes": "A\\u00b5 µ"}
+
+
+def feed_chunks(validator, text, size=3):
+    for i in range(0, len(text), size):
+        if validator.feed(text[i:i + size]):
+            return True
+    return False
+
+
+def test_valid_stream_completes_and_drops_trailer():
+    text = "```json\n" + json.dumps(SAMPLE, ensure_ascii=False, indent=2) + "\n```\nHope this helps!"
+    validator = JSONStreamValidator(schema={"die_area": {"object"}, "power": {"string"}})
+    assert feed_chunks(validator, text)
+    assert json.loads(validator.value().split("\n", 1)[1]) == SAMPLE
+    assert validator.keys == list(SAMPLE)
+    assert validator.mismatches == [("power", "object")]
+
+
+def test_invalid_streams_fail_early():
+    cases = {
+        "Sure! Here is the JSON": "does not start",
+        '{"a": 1, "b": tru}': "invalid literal",
+        '{"a": 1 "b": 2}': "expected ','",
+        '{"a": 1, "a": 1, "a": 1}': "repeated",
+        '{"a": "' + "x" * 100: "no complete JSON",
+    }
+    for text, reason in cases.items():
+        validator = JSONStreamValidator(max_chars=50)
+        try:
+            feed_chunks(validator, text)
+        except JSONStreamError as e:
+            assert reason in e.reason, (text, e.reason)
+        else:
+            raise AssertionError(f"not rejected: {text!r}")
+
+
+class ScriptedBackend(LLMBackend):
+    """Streams canned answers in small deltas instead of calling a provider."""
+
+    def __init__(self, answers, **kwargs):
+        super().__init__(stream=True, **kwargs)
+        self.answers = list(answers)
+        self.requests = []
+        self.delivered = []
+
+    def _call_openai(self, messages, max_tokens, on_delta=None):
+        self.requests.append(messages)
+        answer = self.answers.pop(0)
+        sent = []
+        try:
+            for i in range(0, len(answer), 4):
+                sent.append(answer[i:i + 4])
+                if on_delta is not None and on_delta(sent[-1]):
+                    break
+        finally:
+            self.delivered.append(len(sent) * 4)
+        return "".join(sent), 10, 5
+
+
+def test_backend_cancels_bad_stream_and_repairs():
+    runaway = "I could not find " + "any metrics " * 500
+    backend = ScriptedBackend([runaway, '{"technology": "7nm"} and some remarks'])
+    result = backend.complete_json([{"role": "user", "content": "extract"}], label="[t]")
+    assert result["parsed"] == {"technology": "7nm"}
+    # The first answer was abandoned after its first delta
+    assert backend.delivered[0] == 4
+    repair = backend.requests[1]
+    assert repair[1]["role"] == "assistant" and repair[2]["role"] == "user"
+    assert "does not start with a JSON object" in repair[2]["content"]
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"[{name}]")
+            fn()
+            print("  PASSED")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Tests for scripts/metric_gaps.py (regex-first, LLM-on-gaps planning)."""
+
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
+
+from extract_metrics_llm import report_hybrid  # noqa: E402
+from metric_gaps import focus_pattern, gap_fields, merge_detailed, plan_requests  # noqa: E402
+from metric_scanner import detailed_metrics  # noqa: E402
+from prompt_context import build_context  # noqa: E402
+
+TEXT = """The chip is fabricated in 28nm CMOS and occupies 4.5mm2 with 512KB of on-chip SRAM.
+It runs at 200MHz from a 0.6V supply and consumes 35 mW at 0.8V.
+It achieves 12.5 TOPS/W at 0.6V. Its throughput is 4.1 TOPS.
+"""
+
+
+def test_gaps_are_missing_llm_only_and_unconditioned_fields():
+    regex = detailed_metrics(TEXT)
+    assert regex["throughput"]["values"][0]["condition"] == ""
+    # "runs at 200MHz" is not a frequency pattern
+    assert "frequency" not in regex
+    assert gap_fields(regex) == ["frequency", "throughput", "comparison", "quantization",
+                                 "model_benchmarks"]
+    # Two different nodes found: ask the LLM which one the chip uses
+    assert "technology" in gap_fields({"technology": "28nm / 7nm"})
+    assert gap_fields({})[:2] == ["technology", "die_area"]
+
+
+def test_plan_groups_gaps_and_attaches_figures_to_results():
+    assert plan_requests(["power", "comparison"]) == [
+        ("chip", ["power"], False),
+        ("results", ["comparison"], True),
+    ]
+    assert plan_requests(["comparison"]) == [("results", ["comparison"], True)]
+    assert plan_requests([]) == []
+
+
+def test_merge_keeps_regex_fields_not_answered():
+    regex = {"technology": "28nm", "throughput": {"values": [{"value": "4.1", "unit": "TOPS",
+                                                                "condition": ""}]}}
+    answer = {"comparison": "2.1x better than prior art", "throughput": {},
+              "technology": "7nm"}
+    merged = merge_detailed(regex, [(["throughput", "comparison"], answer)])
+    # Not asked for: the regex value stays; asked but empty: the regex value stays
+    assert merged["technology"] == "28nm"
+    assert merged["throughput"] == regex["throughput"]
+    assert list(merged) == ["technology", "throughput", "comparison"]
+    assert merged["comparison"] == "2.1x better than prior art"
+
+
+def test_empty_answer_keeps_regex_metrics():
+    regex = {"technology": "28nm", "die_area": {"value": "4.5", "unit": "mm²", "note": ""}}
+    answers = [(["comparison", "quantization"], {"parsed": {}, "cached": False})]
+    assert report_hybrid("1.1", regex, answers) == regex
+    failed = [(["comparison"], {"parsed": None, "cached": False})]
+    assert report_hybrid("1.1", regex, failed) is None
+    not_object = [(["comparison"], {"parsed": [1, 2], "cached": False})]
+    assert report_hybrid("1.1", regex, not_object) is None
+
+
+def test_focus_pattern_steers_context():
+    filler = "Lorem ipsum dolor sit amet. " * 30
+    paras = [f"Section {i}. " + filler for i in range(10)]
+    quant = "Weights use INT4 quantization with 8-bit activations."
+    paras.insert(7, quant)
+    text = "\n\n".join(paras)
+    assert quant not in build_context(text, 200)
+    assert quant in build_context(text, 200, focus=focus_pattern(["quantization"]))
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"[{name}]")
+            fn()
+            print("  PASSED")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Tests for scripts/metric_scanner.py and extract_metrics.extract_from_text."""
+
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
+
+from extract_metrics import extract_from_text  # noqa: E402
+from metric_scanner import best_matches, condition_for, detailed_metrics, scan  # noqa: E402
+
+TEXT = """The test chip is fabricated in 28nm CMOS and occupies 4.5mm2.
+It achieves 12.5 TOPS/W at 0.6V and a peak throughput of 4.1 TOPS, while
+operating at 0.9 V supply with a 12 V supply for the I/O. The chip runs
+at 1.2GHz clock and consumes 356 mW with 512KB of on-chip SRAM.
+An earlier mode reached 7.3 TOPS/W.
+"""
+
+
+def test_extract_from_text_values():
+    assert extract_from_text(TEXT) == {
+        "technology": "28nm CMOS",
+        "die_area_mm2": "4.5",
+        "supply_voltage": "0.9V",
+        "sram_kb": "512KB of on-chip SRAM",
+        "frequency_mhz": "1200",
+        "power_mw": "356.0",
+        "energy_efficiency": "12.5 TOPS/W",
+        "throughput": "4.1 TOPS,",
+    }
+
+
+def test_scan_returns_every_candidate():
+    matches = scan(TEXT)
+    efficiency = [m["value"] for m in matches if m["category"] == "energy_efficiency"]
+    # No "2.5 TOPS/W" suffix of "12.5 TOPS/W"
+    assert efficiency == ["12.5 TOPS/W", "7.3 TOPS/W"]
+    # "operating at 0.9 V" overlaps the preferred "0.9 V supply"
+    voltages = [(m["priority"], m["value"]) for m in matches if m["category"] == "supply_voltage"]
+    assert (0, "0.9V") in voltages and (4, "0.9V") in voltages
+    # Out-of-range values are reported without a value
+    assert (0, None) in voltages
+    assert [m["start"] for m in matches] == sorted(m["start"] for m in matches)
+    assert TEXT[matches[0]["start"]:matches[0]["end"]] == matches[0]["text"]
+
+
+def test_best_match_prefers_pattern_rank_over_position():
+    best = best_matches(scan("runs at 200MHz operation, 100 MHz clock"))
+    assert best["frequency_mhz"]["value"] == "100"
+    assert best_matches(scan("no numbers here")) == {}
+
+
+def test_detailed_metrics_records_every_value_with_condition():
+    detailed = detailed_metrics(TEXT)
+    assert detailed["technology"] == "28nm"
+    assert detailed["die_area"] == {"value": "4.5", "unit": "mm²", "note": ""}
+    assert detailed["energy_efficiency"]["values"] == [
+        # "peak" belongs to the next clause, about the 4.1 TOPS throughput
+        {"value": "12.5", "unit": "TOPS/W", "condition": "0.6V"},
+        {"value": "7.3", "unit": "TOPS/W", "condition": ""},
+    ]
+    # "4.1 TOPS" is matched by two patterns but recorded once
+    assert len(detailed["throughput"]["values"]) == 1
+    assert detailed["throughput"]["values"][0]["condition"] == "peak"
+    # The 12 V I/O supply is out of range
+    assert [r["value"] for r in detailed["supply_voltage"]["values"]] == ["0.9"]
+
+
+def test_condition_stays_in_sentence():
+    text = ("Prefill runs at 1.1 V. On LLaMA-7B decode with 8-bit KV cache, "
+            "the chip achieves 3.1 TOPS/W at 0.6 V.")
+    match = [m for m in scan(text) if m["category"] == "energy_efficiency"][0]
+    # "7B" is part of the model name, not a bit width; 1.1 V is another sentence
+    assert condition_for(text, match) == "LLaMA-7B, decode, 8-bit, 0.6V"
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"[{name}]")
+            fn()
+            print("  PASSED")
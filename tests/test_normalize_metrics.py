@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Tests for scripts/normalize_metrics.py (canonical numeric metrics)."""
+
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
+
+import normalize_metrics  # noqa: E402
+
+
+def test_parse_quantity():
+    parse = normalize_metrics.parse_quantity
+    assert parse("1.2 W", "power_mw") == [(1200.0, False)]
+    assert parse("<5mW", "power_mw") == [(5.0, True)]
+    assert parse("45-185 MHz", "frequency_mhz") == [(185.0, True)]
+    assert parse("104.6", "power_mw", implied_unit="mw") == [(104.6, False)]
+    assert parse("CoWoS-S module", "die_area_mm2", implied_unit="mm²") == []
+    # TOPS/W is an efficiency, not a throughput
+    assert parse("118.6 TOPS/W", "throughput_tops") == []
+    [(tops, approximate)] = parse("471.0GOPS", "throughput_tops")
+    assert abs(tops - 0.471) < 1e-9 and not approximate
+
+
+def test_process_node():
+    parse = normalize_metrics.parse_process_node
+    assert parse("28nm FDSOI") == [(28.0, False)]
+    assert parse("3nm/6nm") == [(3.0, False), (6.0, False)]
+    assert parse("Intel 3/18A") == [(3.0, True), (1.8, True)]
+
+
+def test_normalize_metrics():
+    paper = {
+        "process_node": "3nm/6nm",
+        "metrics": {"technology": "3nm/6nm", "die_area_mm2": "CoWoS-S",
+                    "energy_efficiency": "17.4TOPS/W"},
+        "metrics_detailed": {
+            "die_area": {"value": "330", "unit": "mm²"},
+            "frequency": {"values": [{"value": "1.2", "unit": "GHz"},
+                                     {"value": "400", "unit": "MHz"}]},
+        },
+    }
+    result = normalize_metrics.normalize_metrics(paper)
+    assert result["process_nm"] == {"value": 3.0, "confidence": "low",
+                                    "source": "metrics.technology"}
+    assert result["die_area_mm2"] == {"value": 330.0, "confidence": "high",
+                                      "source": "metrics_detailed.die_area"}
+    assert result["frequency_mhz"]["value"] == 1200.0
+    assert result["frequency_mhz"]["confidence"] == "low"
+    assert result["energy_efficiency_tops_w"]["confidence"] == "high"
+    assert "power_mw" not in result and "throughput_tops" not in result
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"[{name}]")
+            fn()
+            print("  PASSED")
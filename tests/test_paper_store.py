@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Tests for scripts/paper_store.py (SQLite store behind papers.json)."""
+
+import json
+import os
+import sys
+import tempfile
+from multiprocessing import Pool
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
+
+import paper_store  # noqa: E402
+
+PAPERS = [
+    {"id": "31.3", "session": 31, "title": "A Sparse Accelerator", "tags": ["LLM"],
+     "challenges": [{"text": "带宽受限", "related_idea_idx": 0, "text_en": ""}],
+     "ideas": [{"text": "稀疏注意力", "type": "hw-arch", "color": "#3498db"}],
+     "figures": [{"num": 1, "caption": "Overview.", "path": "images/31.3/fig_1.png"}],
+     "metrics": {"technology": "28nm"}, "metrics_detailed": {}, "die_area_mm2": ""},
+    {"id": "2.1", "session": 2, "title": "A Chiplet GPU", "abstract": None},
+]
+
+
+def make_store(tmp):
+    papers_json = os.path.join(tmp, "papers.json")
+    with open(papers_json, "w", encoding="utf-8") as f:
+        json.dump(PAPERS, f, ensure_ascii=False, indent=2)
+    return paper_store.connect(os.path.join(tmp, "papers.db"), papers_json), papers_json
+
+
+def test_round_trip_is_exact():
+    with tempfile.TemporaryDirectory() as tmp:
+        conn, papers_json = make_store(tmp)
+        with open(papers_json, encoding="utf-8") as f:
+            original = f.read()
+        assert json.dumps(paper_store.get_papers(conn), ensure_ascii=False, indent=2) == original
+        assert paper_store.export_json(conn, papers_json) is False
+
+
+def test_field_level_updates():
+    with tempfile.TemporaryDirectory() as tmp:
+        conn, papers_json = make_store(tmp)
+        paper = paper_store.get_paper(conn, "31.3")
+
+        # Two stages working from the same snapshot keep each other's fields
+        paper["challenges"][0]["text_en"] = "Bandwidth-bound"
+        paper_store.update_fields(conn, "31.3", {"metrics_detailed": {"power": "5mW"}})
+        paper_store.save_translations(conn, paper)
+        paper_store.update_fields(conn, "31.3", {"new_field": [1]})
+
+        stored = paper_store.get_paper(conn, "31.3")
+        assert stored["metrics_detailed"] == {"power": "5mW"}
+        assert stored["challenges"][0]["text_en"] == "Bandwidth-bound"
+        assert list(stored)[-1] == "new_field"
+
+        paper_store.export_json(conn, papers_json)
+        with open(papers_json, encoding="utf-8") as f:
+            assert json.load(f)[0] == stored
+
+
+def test_export_refuses_external_changes():
+    with tempfile.TemporaryDirectory() as tmp:
+        conn, papers_json = make_store(tmp)
+        with open(papers_json, "a", encoding="utf-8") as f:
+            f.write("\n")
+        try:
+            paper_store.export_json(conn, papers_json)
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("export overwrote an externally changed papers.json")
+        assert paper_store.export_json(conn, papers_json, force=True) is True
+
+
+def _stage_worker(args):
+    db, papers_json, field = args
+    conn = paper_store.connect(db, papers_json)
+    for i in range(10):
+        paper_store.update_fields(conn, "31.3", {field: i})
+    conn.close()
+
+
+def test_parallel_stages_keep_each_others_fields():
+    with tempfile.TemporaryDirectory() as tmp:
+        conn, papers_json = make_store(tmp)
+        db = os.path.join(tmp, "papers.db")
+        fields = ["metrics_detailed", "abstract", "figure_paragraphs", "analytical_tags"]
+        with Pool(len(fields)) as pool:
+            pool.map(_stage_worker, [(db, papers_json, field) for field in fields])
+
+        stored = paper_store.get_paper(conn, "31.3")
+        assert all(stored[field] == 9 for field in fields)
+        assert stored["challenges"][0]["text"] == "带宽受限"
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"[{name}]")
+            fn()
+            print("  PASSED")
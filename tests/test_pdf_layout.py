@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Tests for scripts/pdf_layout.py on hand-built get_text("dict") pages."""
+
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
+
+from pdf_layout import page_paragraphs  # noqa: E402
+
+WIDTH, HEIGHT = 612, 792
+
+
+def text_block(x0, y0, lines, x1=None, line_height=11, direction=(1, 0)):
+    """A type-0 block whose lines are (indent, text) pairs stacked from y0."""
+    x1 = x1 or x0 + 250
+    block_lines = []
+    for i, (indent, text) in enumerate(lines):
+        top = y0 + i * line_height
+        block_lines.append({"bbox": (x0 + indent, top, x1, top + line_height), "dir": direction,
+                            "spans": [{"text": text}]})
+    return {"type": 0, "bbox": (x0, y0, x1, y0 + len(lines) * line_height),
+            "lines": block_lines}
+
+
+def page(*blocks):
+    return {"width": WIDTH, "height": HEIGHT, "blocks": list(blocks)}
+
+
+def test_columns_in_reading_order_without_running_text():
+    body, captions = page_paragraphs(page(
+        # Content-stream order: right column and footer come first
+        text_block(312, 110, [(0, "continues in the right column.")]),
+        text_block(50, 770, [(0, "DIGEST OF TECHNICAL PAPERS • 35")], x1=300),
+        text_block(50, 20, [(0, "ISSCC 2026 / SESSION 2 / PROCESSORS / 2.1")], x1=562),
+        text_block(50, 60, [(0, "2.1 A 28nm Accelerator")], x1=562),
+        text_block(50, 110, [(10, "The accelerator keeps all weights on chip and the data-"),
+                             (0, "flow")]),
+        text_block(590, 300, [(0, "SIDEBAR")], x1=600, direction=(0, -1)),
+    ))
+    assert body == [
+        "2.1 A 28nm Accelerator",
+        # Hyphenation undone; the column break joined into one paragraph
+        "The accelerator keeps all weights on chip and the dataflow continues in the right column.",
+    ]
+    assert captions == []
+
+
+def test_indent_splits_paragraphs_and_captions_go_last():
+    body, captions = page_paragraphs(page(
+        text_block(50, 110, [(10, "First paragraph ends here."),
+                             (10, "Second paragraph starts"), (0, "and ends.")]),
+        text_block(312, 540, [(0, "Figure 2.1.1: Chip micrograph.")]),
+        {"type": 1, "bbox": (312, 300, 562, 530)},
+        text_block(330, 400, [(0, "PE array")], x1=400),
+        text_block(312, 600, [(10, "Body text below the figure.")]),
+    ))
+    assert body == ["First paragraph ends here.", "Second paragraph starts and ends.",
+                    "Body text below the figure."]
+    assert captions == ["Figure 2.1.1: Chip micrograph."]
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"[{name}]")
+            fn()
+            print("  PASSED")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Tests for scripts/prompt_context.py (token-budgeted prompt packing)."""
+
+import os
+import sys
+import textwrap
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
+
+from prompt_context import ELISION, build_context, count_tokens, split_paragraphs  # noqa: E402
+
+ABSTRACT = "This paper presents a 28nm accelerator achieving 45 TOPS/W for transformer inference."
+COMPARISON = "Figure 31.3.6 compares with prior art: 45.3 TOPS/W at 0.6V and 12.1 mm2 in 28nm."
+
+
+def make_paper():
+    paras = ["31.3 A 28nm Transformer Accelerator"]
+    paras += [f"Background paragraph {i}. " + "Lorem ipsum dolor sit amet. " * 40 for i in range(20)]
+    paras.insert(12, COMPARISON)
+    paras += [ABSTRACT, "Abstract"]
+    return "\n\n".join(paras)
+
+
+def test_short_text_is_unchanged():
+    text = "Short paper text.\n\nSecond paragraph."
+    assert build_context(text, 1000) == text
+    assert build_context(make_paper(), 0) == make_paper()
+
+
+def test_budget_keeps_abstract_and_comparison_figure():
+    text = make_paper()
+    out = build_context(text, 300)
+    assert count_tokens(out) <= 300
+    assert ABSTRACT in out
+    assert COMPARISON in out
+    assert ELISION in out
+    # Original order is preserved
+    assert out.index(COMPARISON) < out.index(ABSTRACT)
+
+
+def test_oversized_paragraph_is_truncated():
+    text = "Figure 1.1.6 " + "word " * 4000 + "\n\n" + "tail " * 4000
+    out = build_context(text, 100)
+    assert 0 < count_tokens(out) <= 100
+    assert out.startswith("Figure 1.1.6")
+
+
+def make_raw_paper():
+    """text.md as Paper.markdown() writes it: page.get_text() lines, no blank lines."""
+    def wrap(paragraph):
+        return "\n".join(textwrap.wrap(paragraph, 60))
+
+    # A short last line ending a sentence closes a paragraph
+    body = [wrap(f"Section {i} discusses the background in depth. " + "Lorem ipsum dolor sit amet. " * 12)
+            + "\nEnd." for i in range(12)]
+    page1 = ["ISSCC 2026 / SESSION 31 / ACCELERATORS / 31.3", "31.3 A 28nm Transformer Accelerator",
+             wrap(ABSTRACT), "Abstract"] + body[:6]
+    page2 = body[6:9] + [wrap(COMPARISON)] + body[9:]
+    return "# Paper 31.3\n\n" + "".join("\n".join(p) + "\n\n---\n\n" for p in (page1, page2))
+
+
+def test_raw_page_text_is_split_into_paragraphs():
+    text = make_raw_paper()
+    paragraphs = split_paragraphs(text)
+    # The title line has no full stop and runs into the abstract, as in build_text_json
+    assert paragraphs[0].endswith(ABSTRACT)
+    assert paragraphs[1] == "Abstract" and COMPARISON in paragraphs
+    assert len(paragraphs) == 15  # the session header line is dropped
+    out = build_context(text, 300)
+    assert count_tokens(out) <= 300
+    assert ABSTRACT in out
+    assert COMPARISON in out
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"[{name}]")
+            fn()
+            print("  PASSED")
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Tests for scripts/run_journal.py (resumable LLM run journal)."""
+
+import os
+import sys
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
+
+from run_journal import RunJournal  # noqa: E402
+
+
+def test_completed_uses_last_record_and_skips_torn_line():
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = RunJournal(os.path.join(tmp, "run.jsonl"))
+        journal.start_run(model="gpt-4o")
+        journal.append("2.1", "failed", error="timeout")
+        journal.append("2.2", "ok", result={"technology": "3nm"})
+        journal.append("2.1", "ok", result={"technology": "28nm"})
+        journal.append("2.3", "ok", result={"technology": "7nm"})
+        # Simulate a crash in the middle of writing the last record
+        with open(journal.path, "rb+") as f:
+            f.truncate(os.path.getsize(journal.path) - 10)
+
+        assert journal.completed() == {"2.1": {"technology": "28nm"},
+                                       "2.2": {"technology": "3nm"}}
+        assert journal.runs()[0]["model"] == "gpt-4o"
+
+
+def test_reset_keeps_previous_journal():
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = RunJournal(os.path.join(tmp, "run.jsonl"))
+        journal.append("2.1", "ok", result={})
+        journal.reset()
+        assert journal.completed() == {}
+        assert RunJournal(journal.path + ".prev").completed() == {"2.1": {}}
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"[{name}]")
+            fn()
+            print("  PASSED")
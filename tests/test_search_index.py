@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Tests for scripts/search_index.py (overview keyword search index)."""
+
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
+
+import search_index  # noqa: E402
+
+PAPERS = [
+    {"id": "2.1", "title": "A 28nm Sparse Transformer Accelerator", "title_zh": "稀疏加速器",
+     "tags": ["Transformer"], "abstract": "We present sparse attention."},
+    {"id": "2.2", "title": "A Compute-in-Memory Macro", "title_zh": "存内计算宏",
+     "challenges": [{"text": "稀疏度低", "text_en": "Low sparsity"}]},
+]
+
+
+def postings(index, term):
+    flat = index["postings"][index["terms"].index(term)]
+    return {index["docs"][flat[i]]: flat[i + 1] for i in range(0, len(flat), 2)}
+
+
+def test_tokenize():
+    assert search_index.tokenize("3D堆叠结构 for 28nm TOPS/W") == [
+        "3d", "堆叠", "叠结", "结构", "构", "for", "28nm", "tops", "w"]
+    assert search_index.tokenize("存") == ["存"]
+    assert search_index.tokenize(None) == []
+
+
+def test_index():
+    index = search_index.build_search_index(PAPERS)
+    assert index["docs"] == ["2.1", "2.2"]
+    assert index["terms"] == sorted(index["terms"])
+
+    # Title hits outrank abstract / challenge hits; a field counts once
+    assert postings(index, "sparse") == {"2.1": 8 + 1}
+    assert postings(index, "稀疏") == {"2.1": 8, "2.2": 2}
+    assert postings(index, "sparsity") == {"2.2": 2}
+    assert postings(index, "transformer") == {"2.1": 8 + 5}
+    assert "存内" in index["terms"] and "宏" in index["terms"]
+
+
+def test_list_field_counts_once():
+    paper = {"id": "3.1", "ideas": [{"text": "", "text_en": "sparse gating"},
+                                    {"text": "", "text_en": "sparse tiling"}],
+             "tags": ["Sparse", "sparse attention"]}
+    index = search_index.build_search_index([paper])
+    # Two ideas and two tags mention it: still one ideas weight and one tags weight
+    assert postings(index, "sparse") == {"3.1": 2 + 5}
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            print(f"[{name}]")
+            fn()
+            print("  PASSED")